@@ -3,8 +3,9 @@ from app.core.config import settings
 from app.core.security import get_current_admin
 from app.db.mongo.mongodb import find_one
 from app.models.base import OutModel
-from app.schemas.investment import CreateInvestmentPlan, CreateInvestmentSubscription, CreateMonthlyInvestment
+from app.schemas.investment import CreateInvestmentPlan, CreateInvestmentSubscription, CreateMonthlyInvestment, InventoryValuationRequest
 from app.services.inventory.inventory import InventoryService
+from app.services.inventory.valuation import InventoryValuationService
 from app.services.investment.investment import InvestmentService
 
 router = APIRouter()
@@ -22,4 +23,19 @@ async def get_user_subscription_inventory(user_id: str,
             status_code=400,
             comment="error while fetching user subscription inventory",
             data=str(e)
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/valuation")
+async def revalue_inventories(request: InventoryValuationRequest, current_admin=Depends(get_current_admin)):
+    """Mark every inventory to market at the given gold rates, optionally grouped by plan, currency and country"""
+    try:
+        response = await InventoryValuationService.revalue_inventories(request.gold_rates, request.group_by, current_admin)
+        return OutModel(**response)
+    except Exception as e:
+        return OutModel(
+            status="error",
+            status_code=400,
+            comment="error while revaluing inventories",
+            data=str(e)
+        )
@@ -1,19 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile
 from app.core.config import settings
 from app.core.security import get_current_admin
 from app.db.mongo.mongodb import find_one
 from app.models.base import OutModel
 from app.schemas.investment import CreateInvestmentPlan, CreateInvestmentSubscription, CreateMonthlyInvestment
 from app.services.investment.investment import InvestmentService
+from app.services.investment.investment_import import ImportFormat, InvestmentImportService
+from app.utils.idempotency import IDEMPOTENCY_HEADER, IdempotencyStore
 
 router = APIRouter()
 
     
 
 @router.post("/investment-entry-for-subscription")
-async def investment_entry_for_subscription(request: CreateMonthlyInvestment, current_admin = Depends(get_current_admin)):
+async def investment_entry_for_subscription(
+    request: CreateMonthlyInvestment,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, description="Retries with the same key replay the first response"),
+    current_admin = Depends(get_current_admin),
+):
     try:
-        result = await InvestmentService.create_investment_entry(request, current_admin)
+        result = await IdempotencyStore.run(
+            "investment-entry-for-subscription", idempotency_key, current_admin, request,
+            lambda: InvestmentService.create_investment_entry(request, current_admin), response,
+        )
         return OutModel(**result)
     except Exception as e:
         return OutModel(
@@ -22,4 +33,22 @@ async def investment_entry_for_subscription(request: CreateMonthlyInvestment, cu
             comment="failed to create investment entry",
             data=str(e)
         )
-    
+
+
+@router.post("/investment-entries/import")
+async def import_investment_entries(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON with one deposit per line"),
+    import_format: Optional[ImportFormat] = Query(None, description="Defaults to the file extension"),
+    current_admin = Depends(get_current_admin),
+):
+    """Create many investment entries from one file; returns a result per row"""
+    try:
+        result = await InvestmentImportService.import_entries(file, current_admin, import_format)
+        return OutModel(**result)
+    except Exception as e:
+        return OutModel(
+            status="error",
+            status_code=400,
+            comment="failed to import investment entries",
+            data=str(e)
+        )
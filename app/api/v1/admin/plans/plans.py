@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from app.core.config import settings
 from app.core.security import get_current_admin
 from app.db.mongo.mongodb import find_one
@@ -25,9 +26,13 @@ async def create_investment_plan(
         )
     
 @router.get("/all")
-async def get_investment_plans(current_admin=Depends(get_current_admin)):
+async def get_investment_plans(
+    limit: int = Query(settings.DB.DEFAULT_PAGE_SIZE, ge=1, le=settings.DB.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_admin=Depends(get_current_admin)
+):
     try:
-        result = await PlanService.get_investment_plans(current_admin)
+        result = await PlanService.get_investment_plans(current_admin, limit, cursor)
         return OutModel(**result)
     except Exception as e:
         return OutModel(
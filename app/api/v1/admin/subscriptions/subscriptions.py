@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from typing import Optional
 from app.core.config import settings
 from app.core.security import get_current_admin
 from app.db.mongo.mongodb import find_one
@@ -6,15 +7,26 @@ from app.models.base import OutModel
 from app.schemas.investment import CreateInvestmentPlan, CreateInvestmentSubscription, CreateMonthlyInvestment
 from app.services.investment.investment import InvestmentService
 from app.services.subscriptions.subscriptions import SubscriptionService
+from app.utils.idempotency import IDEMPOTENCY_HEADER, IdempotencyStore
+from app.utils.streaming import StreamFormat, streaming_response
 
 router = APIRouter()
 
     
     
 @router.post("/create-user-subscription")
-async def create_user_investment_subscription(request: CreateInvestmentSubscription, current_admin=Depends(get_current_admin)):
+async def create_user_investment_subscription(
+    request: CreateInvestmentSubscription,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, description="Retries with the same key replay the first response"),
+    current_admin=Depends(get_current_admin),
+):
     try:
-        result = await SubscriptionService.create_subscription_for_user(request.user_id, request.plan_id, request.plan_start_date, current_admin)
+        result = await IdempotencyStore.run(
+            "create-user-subscription", idempotency_key, current_admin, request,
+            lambda: SubscriptionService.create_subscription_for_user(request.user_id, request.plan_id, request.plan_start_date, current_admin),
+            response,
+        )
         return OutModel(**result)
     except Exception as e:
         return OutModel(
@@ -26,9 +38,18 @@ async def create_user_investment_subscription(request: CreateInvestmentSubscript
     
 
 @router.get("/user-id")
-async def get_user_subscriptions(user_id: str, current_admin=Depends(get_current_admin)):
+async def get_user_subscriptions(
+    user_id: str,
+    limit: int = Query(settings.DB.DEFAULT_PAGE_SIZE, ge=1, le=settings.DB.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: Optional[StreamFormat] = Query(None, description="Stream subscriptions as ndjson or a chunked json array"),
+    current_admin=Depends(get_current_admin)
+):
     try:
-        result = await SubscriptionService.get_user_subscriptions(user_id, current_admin)
+        if stream:
+            return streaming_response(SubscriptionService.stream_user_subscriptions(user_id, current_admin), stream)
+
+        result = await SubscriptionService.get_user_subscriptions(user_id, current_admin, limit, cursor)
         return OutModel(**result)
     except Exception as e:
         return OutModel(
@@ -42,10 +63,18 @@ async def get_user_subscriptions(user_id: str, current_admin=Depends(get_current
 async def get_investment_subscription_transactions(
     user_id: str,
     subscription_id: str,
+    limit: int = Query(settings.DB.DEFAULT_PAGE_SIZE, ge=1, le=settings.DB.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: Optional[StreamFormat] = Query(None, description="Stream entries as ndjson or a chunked json array"),
     current_admin=Depends(get_current_admin)
 ):
     try:
-        result = await SubscriptionService.get_user_subscription_transactions(user_id,subscription_id)
+        if stream:
+            return streaming_response(
+                SubscriptionService.stream_user_subscription_transactions(user_id, subscription_id), stream
+            )
+
+        result = await SubscriptionService.get_user_subscription_transactions(user_id, subscription_id, limit, cursor)
         return OutModel(**result)
     except Exception as e:
         return OutModel(
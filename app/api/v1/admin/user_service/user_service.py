@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from app.core.config import settings
 from app.db.mongo.mongodb import find_one
 from app.models.base import OutModel
@@ -8,6 +8,8 @@ from app.services.user_service.user_service import UserService
 from pydantic import EmailStr
 from typing import Optional
 from app.core.logging import get_logger
+from app.utils.idempotency import IDEMPOTENCY_HEADER, IdempotencyStore
+from app.utils.streaming import StreamFormat, streaming_response
 
 logger = get_logger(__name__)
 
@@ -17,11 +19,16 @@ router = APIRouter()
 @router.post("/create-user", response_model=OutModel)
 async def create_user(
     request: CreateUserSchema,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, description="Retries with the same key replay the first response"),
     current_admin = Depends(get_current_admin)
 ):
 
     try:
-        result = await UserService.create_user(request, current_admin)
+        result = await IdempotencyStore.run(
+            "create-user", idempotency_key, current_admin, request,
+            lambda: UserService.create_user(request, current_admin), response,
+        )
         return result
     except Exception as e:
         return OutModel(
@@ -33,11 +40,17 @@ async def create_user(
 
 @router.get("/all-users", response_model=OutModel)
 async def get_all_users(
+    limit: int = Query(settings.DB.DEFAULT_PAGE_SIZE, ge=1, le=settings.DB.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: Optional[StreamFormat] = Query(None, description="Stream every user as ndjson or a chunked json array"),
     current_admin = Depends(get_current_admin)
 ):
 
     try:
-        result = await UserService.get_all_users(current_admin)
+        if stream:
+            return streaming_response(UserService.stream_all_users(current_admin), stream)
+
+        result = await UserService.get_all_users(current_admin, limit, cursor)
         return result
     except Exception as e:
         return OutModel(
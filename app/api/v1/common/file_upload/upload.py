@@ -1,60 +1,64 @@
-from fastapi import APIRouter, Depends, File, Form, UploadFile
-from typing import List
+import os
+from fastapi import APIRouter, Depends, File, Form, Query, UploadFile
+from typing import List, Optional
 
 from app.core.security import get_current_admin
 from app.models.base import OutModel
-from app.schemas.common.utils.s3.upload import FileTypeEnum, SingleFileUploadResponse
+from app.schemas.common.utils.s3.upload import (
+    FileTypeEnum,
+    PresignedUploadRequest,
+    PresignedUploadResponse,
+    SingleFileUploadResponse,
+    UploadCompleteRequest,
+)
 from app.services.common.utils.s3.upload import S3FileUploadService
+from app.services.common.utils.storage.local import LocalStorage
+from app.services.common.utils.storage.storage import get_storage
+from app.utils.streaming import StreamFormat, streaming_response
 
 
 router = APIRouter(prefix="/upload", tags=["File Upload"])
 
 
-# @router.post("/files/")
-# async def upload_mutipile_files(file_type: FileTypeEnum = Form(...), files: List[UploadFile] = File(...), current_user = Depends(get_current_user)):
-#     try:
-
-#         if S3FileUploadService.has_valid_files(files):
-
-#             allowed_extensions = S3FileUploadService.get_allowed_extensions()
-
-#             response = await S3FileUploadService.upload_multiple_files(
-#                 files=files,
-#                 user_id=current_user["uuid"],
-#                 file_type=file_type,
-#                 allowed_extensions=allowed_extensions,
-#             )
-
-#             return response
-
-#         else:@router.post("/files/")
-# async def upload_mutipile_files(file_type: FileTypeEnum = Form(...), files: List[UploadFile] = File(...), current_user = Depends(get_current_user)):
-#     try:
-
-#         if S3FileUploadService.has_valid_files(files):
+@router.post("/files/")
+async def upload_multiple_files(
+    file_type: FileTypeEnum = Form(...),
+    files: List[UploadFile] = File(...),
+    user_email: str = Form(...),
+    stream: Optional[StreamFormat] = Query(None, description="Stream per-file results as each upload finishes"),
+    current_user = Depends(get_current_admin),
+):
+    try:
 
-#             allowed_extensions = S3FileUploadService.get_allowed_extensions()
+        if S3FileUploadService.has_valid_files(files):
 
-#             response = await S3FileUploadService.upload_multiple_files(
-#                 files=files,
-#                 user_id=current_user["uuid"],
-#                 file_type=file_type,
-#                 allowed_extensions=allowed_extensions,
-#             )
+            allowed_extensions = S3FileUploadService.get_allowed_extensions()
 
-#             return response
+            if stream:
+                return streaming_response(
+                    S3FileUploadService.iter_upload_results(
+                        files=files,
+                        user_email=user_email,
+                        file_type=file_type,
+                        allowed_extensions=allowed_extensions,
+                    ),
+                    stream,
+                )
 
-#         else:
-#             return OutModel(status="error", status_code=400, comment="empty file list", data=None)
-    
-#     except Exception as err:
-#         return OutModel(status="error", status_code=400, comment="something went wrong", data={"error": str(err)})
+            response = await S3FileUploadService.upload_multiple_files(
+                files=files,
+                user_email=user_email,
+                file_type=file_type,
+                allowed_extensions=allowed_extensions,
+            )
 
+            return response
 
-#             return OutModel(status="error", status_code=400, comment="empty file list", data=None)
+        else:
+            return OutModel(status="error", status_code=400, comment="empty file list", data=None)
     
-#     except Exception as err:
-#         return OutModel(status="error", status_code=400, comment="something went wrong", data={"error": str(err)})
+    except Exception as err:
+        return OutModel(status="error", status_code=400, comment="something went wrong", data={"error": str(err)})
 
 
 
@@ -76,7 +80,8 @@ async def upload_single_file(file_type: FileTypeEnum = Form(...), file: UploadFi
             if response["success"]:
                 upload_data = SingleFileUploadResponse(
                     filename=response["original_filename"],
-                    file_url=response["file_url"]
+                    file_url=response["file_url"],
+                    thumbnail_url=response.get("thumbnail_url")
                 )
 
 
@@ -89,4 +94,76 @@ async def upload_single_file(file_type: FileTypeEnum = Form(...), file: UploadFi
             return OutModel(status="error", status_code=400, comment="empty file, please provide a file", data=None)
     
     except Exception as err:
-        return OutModel(status="error", status_code=400, comment="something went wrong", data={"error": str(err)})
\ No newline at end of file
+        return OutModel(status="error", status_code=400, comment="something went wrong", data={"error": str(err)})
+
+
+
+@router.post("/presigned/")
+async def create_presigned_upload(request: PresignedUploadRequest, current_user = Depends(get_current_admin)):
+    try:
+
+        response = await S3FileUploadService.create_presigned_upload(
+            file_type=request.file_type,
+            user_email=request.user_email,
+            filename=request.filename,
+            content_type=request.content_type,
+            file_size=request.file_size,
+            method=request.method,
+        )
+
+        if response["success"]:
+            upload_data = PresignedUploadResponse(**response)
+            return OutModel(status="success", status_code=200, comment="presigned upload created", data={"upload_data": upload_data})
+
+        return OutModel(status="error", status_code=response["status_code"], comment="presigned upload rejected, check data for more details", data={"error": response["error"]})
+
+    except Exception as err:
+        return OutModel(status="error", status_code=400, comment="something went wrong", data={"error": str(err)})
+
+
+
+@router.post("/complete/")
+async def complete_presigned_upload(request: UploadCompleteRequest, current_user = Depends(get_current_admin)):
+    try:
+
+        response = await S3FileUploadService.complete_presigned_upload(
+            file_type=request.file_type,
+            user_email=request.user_email,
+            file_key=request.file_key,
+            uploaded_by=current_user.get("uuid"),
+        )
+
+        if response["success"]:
+            upload_data = SingleFileUploadResponse(
+                filename=os.path.basename(response["file_key"]),
+                file_url=response["file_url"]
+            )
+            return OutModel(status="success", status_code=200, comment="file upload recorded", data={"upload_data": upload_data})
+
+        return OutModel(status="error", status_code=response["status_code"], comment="upload verification failed, check data for more details", data={"error": response["error"]})
+
+    except Exception as err:
+        return OutModel(status="error", status_code=400, comment="something went wrong", data={"error": str(err)})
+
+
+
+@router.get("/local/{file_key:path}")
+async def download_local_file(file_key: str, current_user = Depends(get_current_admin)):
+    """Serve a file stored by the local storage backend"""
+    try:
+
+        storage = get_storage()
+        if not isinstance(storage, LocalStorage):
+            return OutModel(status="error", status_code=404, comment="local storage is not enabled", data=None)
+
+        response = await storage.file_response(file_key)
+        if response is None:
+            return OutModel(status="error", status_code=404, comment="file not found", data=None)
+
+        return response
+
+    except ValueError as err:
+        return OutModel(status="error", status_code=400, comment="invalid file key", data={"error": str(err)})
+
+    except Exception as err:
+        return OutModel(status="error", status_code=400, comment="something went wrong", data={"error": str(err)})
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.core.config import settings
 from app.db.mongo.mongodb import get_database
 from app.core.logging import get_logger
+from app.core.security import get_current_admin
+from app.utils.cache import cache_stats
+from app.utils.locks import lock_stats
 
 router = APIRouter(tags=["health"])
 
@@ -31,3 +34,16 @@ async def test_common():
             status_code=503,
             detail=f"Database connection failed: {str(e)}"
         )
+
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_admin=Depends(get_current_admin)):
+    """Hit/miss/eviction counters of the in-process caches of this worker"""
+    return cache_stats()
+
+
+
+@router.get("/lock-stats")
+async def get_lock_stats(current_admin=Depends(get_current_admin)):
+    """Acquire/contention/timeout counters of the keyed lock managers of this worker"""
+    return lock_stats()
@@ -23,6 +23,12 @@ class DatabaseTables(BaseModel):
     SUBSCRIPTIONS: str = os.getenv("SUBSCRIPTIONS")
     INVENTORY: str = os.getenv("INVENTORY")
     INVESTMENT_ENTRIES: str = os.getenv("INVESTMENT_ENTRIES")
+    EMAIL_OUTBOX: str = os.getenv("EMAIL_OUTBOX", "email_outbox")
+    UPLOADED_FILES: str = os.getenv("UPLOADED_FILES", "uploaded_files")
+    FILE_HASHES: str = os.getenv("FILE_HASHES", "file_hashes")
+    MIGRATIONS: str = os.getenv("MIGRATIONS", "migrations")
+    LOCKS: str = os.getenv("LOCKS", "locks")
+    IDEMPOTENCY_KEYS: str = os.getenv("IDEMPOTENCY_KEYS", "idempotency_keys")
 
 class DatabaseConfig(BaseModel):
     URL: str = "mongodb://localhost:27017"
@@ -32,12 +38,21 @@ class DatabaseConfig(BaseModel):
     MAX_IDLE_TIME_MS: int = 30000
     SERVER_SELECTION_TIMEOUT_MS: int = 5000
     CONNECT_TIMEOUT_MS: int = 10000
+    VERIFY_QUERY_PLANS: bool = True
+    FAIL_ON_COLLSCAN: bool = False
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 500
+    # Data migrations run at startup; each one checkpoints its progress and resumes
+    RUN_MIGRATIONS: bool = True
+    MIGRATION_BATCH_SIZE: int = 1000
 
 class ServerConfig(BaseModel):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = False  # Set to True for development, False for production
     RELOAD: bool = False
+    # Bodies above this are refused with 413 while still streaming in
+    MAX_REQUEST_BODY_MB: int = 100
 
 class SMTPConfig(BaseModel):
     SMTP_HOST: str = os.getenv("SMTP_HOST")
@@ -45,6 +60,21 @@ class SMTPConfig(BaseModel):
     SMTP_USER: str = os.getenv("SMTP_USER")
     SMTP_PASS: str = os.getenv("SMTP_PASS")
     SMTP_FROM: str = os.getenv("SMTP_FROM")
+    SMTP_START_TLS: bool = True
+    SMTP_POOL_SIZE: int = 4
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 60
+    SMTP_HEALTH_CHECK_AFTER_SECONDS: float = 10
+    SMTP_TIMEOUT_SECONDS: float = 30
+
+class OutboxConfig(BaseModel):
+    WORKERS: int = 4
+    MAX_ATTEMPTS: int = 6
+    BASE_BACKOFF_SECONDS: int = 30
+    MAX_BACKOFF_SECONDS: int = 3600
+    POLL_INTERVAL_SECONDS: float = 5
+    LEASE_SECONDS: int = 120
+    SEND_TIMEOUT_SECONDS: float = 60
+    RETENTION_DAYS: int = 7
 
 class S3Credentials(BaseModel):
     AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID")
@@ -55,10 +85,96 @@ class S3Credentials(BaseModel):
     MAX_FILE_SIZE_MB: int = os.getenv("MAX_FILE_SIZE_MB")
     BASE_DIR: str = os.getenv("BASE_DIR")
     MAX_CONCURRENT_UPLOADS: int = os.getenv("MAX_CONCURRENT_UPLOADS")
+    ENDPOINT_URL: Optional[str] = os.getenv("AWS_ENDPOINT_URL")
+    MAX_POOL_CONNECTIONS: int = 50
+    CONNECT_TIMEOUT_SECONDS: float = 5
+    READ_TIMEOUT_SECONDS: float = 60
+    KEEPALIVE_TIMEOUT_SECONDS: float = 60
+    MULTIPART_THRESHOLD_MB: int = 16
+    MULTIPART_PART_SIZE_MB: int = 8
+    MULTIPART_CONCURRENCY: int = 4
+    PRESIGNED_URL_EXPIRY_SECONDS: int = 900
 
 class SecretKeys(BaseModel):
     SUPER_ADMIN_SECRET_KEY: str = os.getenv("SUPER_ADMIN_SECRET_KEY")
 
+class CacheConfig(BaseModel):
+    PLAN_TTL_SECONDS: int = 300
+    PLAN_MAX_SIZE: int = 1024
+    PRINCIPAL_TTL_SECONDS: int = 60
+    PRINCIPAL_MAX_SIZE: int = 4096
+    TOKEN_TTL_SECONDS: int = 300
+    TOKEN_MAX_SIZE: int = 10000
+
+class HashingConfig(BaseModel):
+    MAX_WORKERS: int = 2
+    MAX_QUEUE: int = 16
+    # None keeps the passlib defaults; use scripts/calibrate_argon2.py to pick values
+    ARGON2_TIME_COST: Optional[int] = None
+    ARGON2_MEMORY_COST: Optional[int] = None
+    ARGON2_PARALLELISM: Optional[int] = None
+
+class LockConfig(BaseModel):
+    # "memory" serializes per key within one worker; "mongo" leases keys across all workers
+    BACKEND: str = "memory"
+    ACQUIRE_TIMEOUT_SECONDS: float = 10
+    LEASE_SECONDS: float = 30
+    RETRY_INTERVAL_MS: int = 10
+    MAX_RETRY_INTERVAL_MS: int = 200
+
+    @field_validator('BACKEND')
+    def validate_backend(cls, v):
+        allowed_backends = ["memory", "mongo"]
+        if v.lower() not in allowed_backends:
+            raise ValueError(f"Lock backend must be one of {allowed_backends}")
+        return v.lower()
+
+class IdempotencyConfig(BaseModel):
+    # Stored responses are replayed for this long, then purged by the TTL index
+    RETENTION_HOURS: int = 24
+    # A claim whose request never finished (crashed worker) can be taken over after this
+    IN_PROGRESS_LEASE_SECONDS: int = 60
+    MAX_KEY_LENGTH: int = 255
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_SIZE: int = 10000
+
+class ImportConfig(BaseModel):
+    # Rows validated and written per bulk write
+    BATCH_SIZE: int = 500
+    MAX_ROWS: int = 50000
+
+class ValuationConfig(BaseModel):
+    # Inventories per cursor batch while loading the valuation columns
+    CURSOR_BATCH_SIZE: int = 10000
+
+class ImageConfig(BaseModel):
+    # Requires Pillow: pip install "investment[images]"
+    ENABLED: bool = False
+    FILE_TYPES: str = "KYC_DOCS"
+    EXTENSIONS: str = ".jpg,.jpeg,.png"
+    MAX_DIMENSION: int = 2048
+    # Larger uploads, or images with more pixels, are stored as uploaded instead of decoded
+    MAX_INPUT_MB: int = 20
+    MAX_PIXELS: int = 50_000_000
+    JPEG_QUALITY: int = 82
+    THUMBNAIL_SIZE: int = 320
+    WORKERS: int = 2
+    MAX_QUEUE: int = 8
+
+class StorageConfig(BaseModel):
+    # "s3" or "local"; local keeps uploads on disk under LOCAL_ROOT (on-prem, benchmarks)
+    BACKEND: str = "s3"
+    LOCAL_ROOT: str = "./storage"
+    LOCAL_BASE_URL: str = "/v1/upload/local"
+    CHUNK_SIZE_KB: int = 1024
+
+    @field_validator('BACKEND')
+    def validate_backend(cls, v):
+        allowed_backends = ["s3", "local"]
+        if v.lower() not in allowed_backends:
+            raise ValueError(f"Storage backend must be one of {allowed_backends}")
+        return v.lower()
+
 class AppConfig(BaseModel):
     TITLE: str = "FastAPI MongoDB Service"
     DESCRIPTION: str = "FastAPI service with MongoDB integration"
@@ -92,8 +208,17 @@ class Settings(BaseSettings):
     JWT: Jwt = Jwt()
     DB_TABLE: DatabaseTables = DatabaseTables()
     S3_CREDENTIALS: S3Credentials = S3Credentials()
+    STORAGE: StorageConfig = StorageConfig()
+    IMAGES: ImageConfig = ImageConfig()
     SECRET_KEYS: SecretKeys = SecretKeys()
     SMTP: SMTPConfig = SMTPConfig()
+    OUTBOX: OutboxConfig = OutboxConfig()
+    CACHE: CacheConfig = CacheConfig()
+    IDEMPOTENCY: IdempotencyConfig = IdempotencyConfig()
+    HASHING: HashingConfig = HashingConfig()
+    LOCKS: LockConfig = LockConfig()
+    IMPORTS: ImportConfig = ImportConfig()
+    VALUATION: ValuationConfig = ValuationConfig()
     model_config = SettingsConfigDict(
         env_file='.env',
         env_file_encoding='utf-8',
@@ -0,0 +1,85 @@
+from typing import Dict, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies above a byte limit with 413 while they are still arriving.
+
+    A declared Content-Length over the limit is refused before any body is read.
+    Chunked bodies are counted as they stream in; once the limit is crossed the
+    application sees a client disconnect, so multipart parsing stops spooling
+    the upload to disk, and whatever it answers is replaced by the 413.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.path_limits = path_limits or {}
+
+    async def _reject(self, send: Send, limit: int) -> None:
+        body = f'{{"detail":"Request body exceeds {limit} bytes"}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.path_limits.get(scope["path"], self.max_body_size)
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > limit:
+                    logger.warning(f"Rejected {scope['path']}: declared body of {declared} bytes exceeds {limit}")
+                    await self._reject(send, limit)
+                    return
+                break
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    logger.warning(f"Rejected {scope['path']}: body exceeded {limit} bytes while streaming")
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if exceeded:
+                # The application's answer to the fake disconnect is dropped in favour of the 413
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+
+        if exceeded and not response_started:
+            await self._reject(send, limit)
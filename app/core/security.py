@@ -1,4 +1,8 @@
 
+import copy
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 import jwt
@@ -8,9 +12,44 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt import InvalidTokenError, ExpiredSignatureError, PyJWTError
 from app.db.mongo.mongodb import find_one
 from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.executor import BoundedExecutor
+
+def _argon2_options() -> dict:
+    """Argon2 parameters from settings; unset values keep the passlib defaults"""
+    options = {
+        "argon2__rounds": settings.HASHING.ARGON2_TIME_COST,
+        "argon2__memory_cost": settings.HASHING.ARGON2_MEMORY_COST,
+        "argon2__parallelism": settings.HASHING.ARGON2_PARALLELISM,
+    }
+    return {key: value for key, value in options.items() if value is not None}
 
 # Configure the password hashing context
-password_context = CryptContext(schemes=["argon2"], deprecated="auto")
+password_context = CryptContext(schemes=["argon2"], deprecated="auto", **_argon2_options())
+
+# Argon2 runs here, never on the event loop. argon2-cffi releases the GIL,
+# so a thread pool gives real parallelism without pickling overhead.
+password_hasher = BoundedExecutor(
+    "password_hashing",
+    lambda workers: ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2"),
+    settings.HASHING.MAX_WORKERS,
+    settings.HASHING.MAX_QUEUE,
+)
+
+# Authenticated principals by admin uuid. Every hit is one admins find_one saved.
+_principal_cache = TTLCache(
+    "admin_principals",
+    settings.CACHE.PRINCIPAL_MAX_SIZE,
+    settings.CACHE.PRINCIPAL_TTL_SECONDS,
+)
+PRINCIPAL_PROJECTION = {"_id": 0, "password": 0}
+
+# Decoded claims by SHA-256 of the bearer token, to skip repeated signature checks
+_verified_token_cache = TTLCache(
+    "verified_tokens",
+    settings.CACHE.TOKEN_MAX_SIZE,
+    settings.CACHE.TOKEN_TTL_SECONDS,
+)
 
 
 async def create_access_token(data: dict):
@@ -30,20 +69,50 @@ async def create_verification_token(data: dict):
 
 
 async def decode_jwt_token(token: str):
+        """
+        Verify a JWT and return its claims.
+        Verified claims are cached by token digest and never outlive the token's exp,
+        so an expired token always falls through to jwt.decode and fails there.
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        payload = _verified_token_cache.get(digest)
+        if payload is not None:
+            return dict(payload)
+
         payload = jwt.decode(token, settings.JWT.SECRET_KEY, algorithms=[settings.JWT.ALGORITHM])
-        return payload
+
+        ttl = settings.CACHE.TOKEN_TTL_SECONDS
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - time.time())
+        _verified_token_cache.set(digest, payload, ttl_seconds=ttl)
+
+        return dict(payload)
 
 async def hash_password(password: str) -> str:
     """
-    Hash a plain-text password using bcrypt.
+    Hash a plain-text password using Argon2 on the bounded hashing pool.
+
+    Raises:
+        ExecutorSaturatedError: If the hashing pool and its queue are full
     """
-    return password_context.hash(password)
+    return await password_hasher.run(password_context.hash, password)
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Verify a plain-text password against the hashed password.
+    Verify a plain-text password against the hashed password on the bounded hashing pool.
+
+    Raises:
+        ExecutorSaturatedError: If the hashing pool and its queue are full
+    """
+    return await password_hasher.run(password_context.verify, plain_password, hashed_password)
+
+def invalidate_admin_principal(admin_id: str) -> None:
+    """
+    Drop a cached principal. Must be called by every path that changes an existing
+    admin (roles, password, deletion) so the change applies before the TTL runs out.
+    A new admin has never been looked up, so creating one needs no invalidation.
     """
-    return password_context.verify(plain_password, hashed_password)
+    _principal_cache.invalidate(admin_id)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
@@ -61,15 +130,21 @@ async def get_current_admin(token: Annotated[str, Depends(oauth2_scheme)]):
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        admin = await find_one(settings.DB_TABLE.ADMINS, {"uuid": admin_id})
+        admin = _principal_cache.get(admin_id)
 
         if admin is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Admin not found",
-            )
+            admin = await find_one(settings.DB_TABLE.ADMINS, {"uuid": admin_id}, PRINCIPAL_PROJECTION)
+
+            if admin is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Admin not found",
+                )
+
+            _principal_cache.set(admin_id, admin)
 
-        return admin
+        # Hand out a copy so request handlers cannot mutate the cached principal
+        return copy.deepcopy(admin)
 
     except ExpiredSignatureError:
         raise HTTPException(
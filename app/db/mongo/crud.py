@@ -1,6 +1,7 @@
 import time
-from typing import Any, Dict, List, Optional, Tuple
-from app.db.mongo.mongodb import get_database
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from app.db.mongo.mongodb import get_database, with_updated_at
 
 
 class MongoHelper:
@@ -29,6 +30,21 @@ class MongoHelper:
             cursor = cursor.sort(sort)
         return await cursor.to_list(length=limit)
 
+    @staticmethod
+    async def iter_many(
+        collection: str,
+        query: Dict[str, Any],
+        batch_size: int = 500,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        projection: Optional[Dict[str, int]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        db = get_database()
+        cursor = db[collection].find(query, projection, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        async for document in cursor:
+            yield document
+
     @staticmethod
     async def insert_one(
         collection: str,
@@ -55,10 +71,29 @@ class MongoHelper:
         upsert: bool = False
     ) -> int:
         db = get_database()
-        result = await db[collection].update_one(query, update, upsert=upsert)
-        if result.modified_count > 0:
-            await db[collection].update_one(query, {"$set": {"updated_at": int(time.time())}})
-        return result.modified_count
+        result = await db[collection].update_one(query, with_updated_at(update), upsert=upsert)
+        # updated_at always changes, so modified_count would count no-op updates too
+        return result.matched_count
+
+    @staticmethod
+    async def update_and_return(
+        collection: str,
+        query: Dict[str, Any],
+        update: Dict[str, Any],
+        projection: Optional[Dict[str, int]] = None,
+        upsert: bool = False,
+        return_document: ReturnDocument = ReturnDocument.AFTER,
+        sort: Optional[List[Tuple[str, int]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        db = get_database()
+        return await db[collection].find_one_and_update(
+            query,
+            with_updated_at(update),
+            projection=projection,
+            upsert=upsert,
+            return_document=return_document,
+            sort=sort
+        )
 
     @staticmethod
     async def update_many(
@@ -0,0 +1,174 @@
+# indexes.py
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ASCENDING, IndexModel
+from app.core.config import settings
+from app.utils.pagination import PAGE_SORT
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Index registry, keyed by the DatabaseTables attribute of each collection.
+# Every hot lookup in the services must be covered by one of these indexes.
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "ADMINS": [
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("phone_number", ASCENDING)], name="phone_number_unique", unique=True),
+    ],
+    "USERS": [
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True),
+        IndexModel([("phone_number", ASCENDING)], name="phone_number_1", unique=True),
+        IndexModel([("created_at", ASCENDING), ("uuid", ASCENDING)], name="created_at_uuid"),
+    ],
+    "AVAILABLE_INVESTMENT_PLANS": [
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING), ("uuid", ASCENDING)], name="status_created_at_uuid"),
+    ],
+    "SUBSCRIPTIONS": [
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING), ("uuid", ASCENDING)], name="user_id_created_at_uuid"),
+    ],
+    "INVENTORY": [
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        IndexModel([("subscription_id", ASCENDING)], name="subscription_id"),
+        IndexModel([("user_id", ASCENDING), ("subscription_id", ASCENDING)], name="user_id_subscription_id"),
+    ],
+    "INVESTMENT_ENTRIES": [
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        IndexModel([("subscription_id", ASCENDING), ("created_at", ASCENDING), ("uuid", ASCENDING)], name="subscription_id_created_at_uuid"),
+        # Bonus already credited this month: a single seek on the materialized month key
+        IndexModel(
+            [("subscription_id", ASCENDING), ("deposit_yyyymm", ASCENDING), ("is_bonus_credited", ASCENDING)],
+            name="subscription_id_deposit_yyyymm_is_bonus_credited",
+        ),
+    ],
+    "EMAIL_OUTBOX": [
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"),
+        # Delivered messages are purged RETENTION_DAYS after sending
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "UPLOADED_FILES": [
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        IndexModel([("file_key", ASCENDING)], name="file_key_unique", unique=True),
+        IndexModel([("user_email", ASCENDING), ("created_at", ASCENDING)], name="user_email_created_at"),
+    ],
+    "LOCKS": [
+        # Leases abandoned by a crashed worker are purged once expired; _id is the lock key
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "IDEMPOTENCY_KEYS": [
+        # Stored responses are purged after RETENTION_HOURS; _id is the scoped key
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "FILE_HASHES": [
+        IndexModel([("uuid", ASCENDING)], name="uuid_unique", unique=True),
+        # One stored object per distinct content, user and file type (keys live under the type's folder)
+        IndexModel(
+            [("user_email", ASCENDING), ("file_type", ASCENDING), ("sha256", ASCENDING)],
+            name="user_email_file_type_sha256_unique",
+            unique=True,
+        ),
+    ],
+}
+
+# Indexes replaced by a registry entry above, dropped on startup if still present
+OBSOLETE_INDEXES: Dict[str, List[str]] = {
+    # Superseded by user_email_file_type_sha256_unique, which allows the same content per file type
+    "FILE_HASHES": ["user_email_sha256_unique"],
+}
+
+# Canonical query shape for each service lookup: (description, collection key, filter, sort).
+# Values are placeholders, only the shape matters for the query planner.
+CANONICAL_QUERIES: List[Tuple[str, str, Dict[str, Any], Optional[List[Tuple[str, int]]]]] = [
+    ("security.get_current_admin", "ADMINS", {"uuid": "__explain__"}, None),
+    ("AuthService.admin_login", "ADMINS", {"email": "__explain__"}, None),
+    ("AuthService.create_*_admin (phone check)", "ADMINS", {"phone_number": "__explain__"}, None),
+    ("UserService.create_user", "USERS", {"email": "__explain__"}, None),
+    ("UserService.get_user_by_id", "USERS", {"uuid": "__explain__"}, None),
+    ("UserService.get_all_users", "USERS", {}, PAGE_SORT),
+    ("PlanService.get_investment_plans", "AVAILABLE_INVESTMENT_PLANS", {"status": "ACTIVE"}, PAGE_SORT),
+    ("PlanService.get_plan_by_id", "AVAILABLE_INVESTMENT_PLANS", {"uuid": "__explain__", "status": "ACTIVE"}, None),
+    ("SubscriptionService.get_user_subscriptions", "SUBSCRIPTIONS", {"user_id": "__explain__"}, PAGE_SORT),
+    ("InvestmentService.create_investment_entry (subscription)", "SUBSCRIPTIONS", {"uuid": "__explain__"}, None),
+    ("InventoryService.get_user_subscription_inventory", "INVENTORY", {"user_id": "__explain__", "subscription_id": "__explain__"}, None),
+    ("InvestmentService.create_investment_entry (inventory)", "INVENTORY", {"subscription_id": "__explain__"}, None),
+    ("SubscriptionService.get_user_subscription_transactions", "INVESTMENT_ENTRIES", {"subscription_id": "__explain__"}, PAGE_SORT),
+    ("InvestmentService.create_investment_entry (bonus check)", "INVESTMENT_ENTRIES", {"subscription_id": "__explain__", "deposit_yyyymm": 0, "is_bonus_credited": True}, None),
+    ("EmailOutbox.claim", "EMAIL_OUTBOX", {"status": "PENDING", "next_attempt_at": {"$lte": 0}}, [("next_attempt_at", 1)]),
+    ("S3FileUploadService.find_existing_upload", "FILE_HASHES", {"user_email": "__explain__", "file_type": "__explain__", "sha256": "__explain__"}, None),
+]
+
+
+def _collection_name(key: str) -> str:
+    """Resolve a registry key to the configured collection name"""
+    name = getattr(settings.DB_TABLE, key)
+    if not name:
+        raise RuntimeError(f"Collection name for {key} is not configured")
+    return name
+
+
+async def ensure_indexes(db) -> None:
+    """
+    Build every index in INDEX_REGISTRY after dropping those listed in OBSOLETE_INDEXES.
+    createIndexes is idempotent, so this is safe to run on every startup.
+    Collections are processed in parallel.
+    """
+    async def build(key: str, indexes: List[IndexModel]) -> None:
+        collection = _collection_name(key)
+        existing = await db[collection].index_information()
+        for name in OBSOLETE_INDEXES.get(key, []):
+            if name in existing:
+                await db[collection].drop_index(name)
+                logger.info(f"Dropped obsolete index {name} on {collection}")
+        names = await db[collection].create_indexes(indexes)
+        logger.debug(f"Indexes ensured on {collection}: {', '.join(names)}")
+
+    await asyncio.gather(*(build(key, indexes) for key, indexes in INDEX_REGISTRY.items()))
+
+
+def _has_collscan(plan: Any) -> bool:
+    """Walk an explain plan tree looking for a COLLSCAN stage"""
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_has_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collscan(value) for value in plan)
+    return False
+
+
+async def verify_query_plans(db, fail_on_collscan: bool = False) -> List[str]:
+    """
+    Explain every canonical query and report those that fall back to a collection scan.
+
+    Returns:
+        List of descriptions of the offending queries
+
+    Raises:
+        RuntimeError: If fail_on_collscan is set and any query does a COLLSCAN
+    """
+    async def explain(description: str, key: str, query: Dict[str, Any], sort) -> Tuple[str, bool]:
+        cursor = db[_collection_name(key)].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = await cursor.explain()
+        return description, _has_collscan(plan.get("queryPlanner", {}).get("winningPlan", {}))
+
+    results = await asyncio.gather(*(explain(*query) for query in CANONICAL_QUERIES))
+    offenders = [description for description, collscan in results if collscan]
+
+    for description in offenders:
+        logger.error(f"COLLSCAN detected for canonical query: {description}")
+
+    if offenders and fail_on_collscan:
+        raise RuntimeError(f"Queries falling back to COLLSCAN: {', '.join(offenders)}")
+
+    if not offenders:
+        logger.info(f"Verified {len(CANONICAL_QUERIES)} canonical queries, all index-backed")
+
+    return offenders
@@ -0,0 +1,233 @@
+# migrations.py
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.utils.dates import deposit_date_fields
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+STATUS_RUNNING = "RUNNING"
+STATUS_COMPLETED = "COMPLETED"
+
+
+async def _load_state(db, name: str) -> Dict:
+    return await db[settings.DB_TABLE.MIGRATIONS].find_one({"_id": name}) or {}
+
+
+async def _save_state(db, name: str, update: Dict) -> None:
+    update = dict(update)
+    update["$set"] = {"updated_at": int(time.time()), **update.get("$set", {})}
+    await db[settings.DB_TABLE.MIGRATIONS].update_one({"_id": name}, update, upsert=True)
+
+
+async def backfill_deposit_month(db, batch_size: Optional[int] = None) -> None:
+    """
+    Materialize deposit_yyyymm and deposit_ts on investment entries written before
+    those fields existed.
+
+    Entries are walked in _id order in batches and updated with one unordered
+    bulk write per batch. The last _id of each batch is checkpointed, so an
+    interrupted run resumes where it stopped instead of rescanning. Entries whose
+    deposit_date cannot be parsed are counted and left untouched.
+    """
+    name = "backfill_deposit_month"
+    batch_size = batch_size or settings.DB.MIGRATION_BATCH_SIZE
+    collection = db[settings.DB_TABLE.INVESTMENT_ENTRIES]
+
+    state = await _load_state(db, name)
+    if state.get("status") == STATUS_COMPLETED:
+        return
+
+    last_id = state.get("last_id")
+    processed = skipped = 0
+
+    while True:
+        query = {"deposit_yyyymm": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+
+        batch = await collection.find(query, {"deposit_date": 1}) \
+            .sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        operations = []
+        batch_skipped = 0
+        for document in batch:
+            try:
+                fields = deposit_date_fields(document.get("deposit_date") or "")
+            except ValueError:
+                batch_skipped += 1
+                logger.warning(f"Skipping investment entry {document['_id']}: unparseable deposit_date {document.get('deposit_date')!r}")
+                continue
+            operations.append(UpdateOne({"_id": document["_id"], "deposit_yyyymm": {"$exists": False}}, {"$set": fields}))
+
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+
+        last_id = batch[-1]["_id"]
+        processed += len(operations)
+        skipped += batch_skipped
+        await _save_state(db, name, {
+            "$set": {"status": STATUS_RUNNING, "last_id": last_id},
+            "$inc": {"processed": len(operations), "skipped": batch_skipped},
+        })
+
+    await _save_state(db, name, {"$set": {"status": STATUS_COMPLETED, "completed_at": int(time.time())}})
+    logger.info(f"Migration {name} completed: {processed} entries backfilled, {skipped} skipped")
+
+
+async def backfill_installment_counters(db, batch_size: Optional[int] = None) -> None:
+    """
+    Set installments_paid, last_deposit_date and last_deposit_ts on subscriptions
+    created before the counter existed.
+
+    Entries are grouped per subscription in one aggregation and the counters are
+    written in unordered bulk batches. Only subscriptions still missing the
+    counter are touched, so a rerun after an interruption picks up the rest and
+    never overwrites a counter already maintained by create_investment_entry.
+    Runs after backfill_deposit_month, which provides deposit_ts.
+    """
+    name = "backfill_installment_counters"
+    batch_size = batch_size or settings.DB.MIGRATION_BATCH_SIZE
+    subscriptions = db[settings.DB_TABLE.SUBSCRIPTIONS]
+
+    state = await _load_state(db, name)
+    if state.get("status") == STATUS_COMPLETED:
+        return
+
+    await _save_state(db, name, {"$set": {"status": STATUS_RUNNING}})
+
+    pipeline = [
+        {"$sort": {"subscription_id": 1, "deposit_ts": -1}},
+        {"$group": {
+            "_id": "$subscription_id",
+            "installments_paid": {"$sum": 1},
+            "last_deposit_date": {"$first": "$deposit_date"},
+            "last_deposit_ts": {"$first": "$deposit_ts"},
+        }},
+    ]
+
+    def counter_update(group: Dict) -> UpdateOne:
+        return UpdateOne(
+            {"uuid": group["_id"], "installments_paid": {"$exists": False}},
+            {"$set": {
+                "installments_paid": group["installments_paid"],
+                "last_deposit_date": group["last_deposit_date"],
+                "last_deposit_ts": group.get("last_deposit_ts"),
+            }},
+        )
+
+    updated = 0
+    operations = []
+    cursor = db[settings.DB_TABLE.INVESTMENT_ENTRIES].aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+    async for group in cursor:
+        operations.append(counter_update(group))
+        if len(operations) >= batch_size:
+            updated += (await subscriptions.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+    if operations:
+        updated += (await subscriptions.bulk_write(operations, ordered=False)).modified_count
+
+    # Subscriptions without any entry start from zero
+    empty = await subscriptions.update_many(
+        {"installments_paid": {"$exists": False}},
+        {"$set": {"installments_paid": 0, "last_deposit_date": None, "last_deposit_ts": None}},
+    )
+
+    await _save_state(db, name, {"$set": {"status": STATUS_COMPLETED, "completed_at": int(time.time())}})
+    logger.info(f"Migration {name} completed: {updated} subscriptions counted, {empty.modified_count} without entries")
+
+
+async def backfill_created_at(db, batch_size: Optional[int] = None) -> None:
+    """
+    Set created_at on documents of the paginated collections written without it,
+    from the creation time embedded in their ObjectId _id.
+
+    Keyset cursors are built from (created_at, uuid), so every listed document
+    needs a real created_at. Documents are walked in _id order in unordered bulk
+    batches; those whose _id is not an ObjectId are counted and left untouched.
+    """
+    name = "backfill_created_at"
+    batch_size = batch_size or settings.DB.MIGRATION_BATCH_SIZE
+
+    state = await _load_state(db, name)
+    if state.get("status") == STATUS_COMPLETED:
+        return
+
+    await _save_state(db, name, {"$set": {"status": STATUS_RUNNING}})
+
+    processed = skipped = 0
+    for table in (
+        settings.DB_TABLE.USERS,
+        settings.DB_TABLE.SUBSCRIPTIONS,
+        settings.DB_TABLE.INVESTMENT_ENTRIES,
+        settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS,
+    ):
+        collection = db[table]
+        # Range queries on _id only compare within one BSON type, so walk the ObjectIds alone
+        not_object_id = {"created_at": None, "_id": {"$not": {"$type": "objectId"}}}
+        table_skipped = await collection.count_documents(not_object_id)
+        if table_skipped:
+            logger.warning(f"Skipping {table_skipped} {table} documents without created_at: no ObjectId to derive it from")
+        skipped += table_skipped
+
+        last_id = None
+        while True:
+            query = {"created_at": None, "_id": {"$type": "objectId"}}
+            if last_id is not None:
+                query["_id"]["$gt"] = last_id
+
+            batch = await collection.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+            if not batch:
+                break
+
+            await collection.bulk_write([
+                UpdateOne(
+                    {"_id": document["_id"], "created_at": None},
+                    {"$set": {"created_at": int(document["_id"].generation_time.timestamp())}},
+                )
+                for document in batch
+            ], ordered=False)
+            processed += len(batch)
+            last_id = batch[-1]["_id"]
+
+    await _save_state(db, name, {"$set": {"status": STATUS_COMPLETED, "completed_at": int(time.time()), "processed": processed, "skipped": skipped}})
+    logger.info(f"Migration {name} completed: {processed} documents backfilled, {skipped} skipped")
+
+
+# Data migrations in the order they must run. Each one is idempotent and resumable.
+MIGRATIONS: Dict[str, Callable[..., Awaitable[None]]] = {
+    "backfill_deposit_month": backfill_deposit_month,
+    "backfill_installment_counters": backfill_installment_counters,
+    "backfill_created_at": backfill_created_at,
+}
+
+
+async def run_migrations(db) -> None:
+    """Run every pending migration in MIGRATIONS, in order"""
+    for name, migration in MIGRATIONS.items():
+        started = time.perf_counter()
+        await migration(db)
+        logger.debug(f"Migration {name} checked in {time.perf_counter() - started:.2f}s")
+
+
+async def _main() -> None:
+    # Imported here: mongodb imports this module for the startup hook
+    from app.db.mongo.mongodb import close_mongodb_connection, connect_to_mongodb, get_database
+
+    await connect_to_mongodb()
+    try:
+        await run_migrations(get_database())
+    finally:
+        await close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    # Run pending migrations without starting the API: python -m app.db.mongo.migrations
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -2,10 +2,15 @@
 import logging
 import motor.motor_asyncio
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.results import BulkWriteResult
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-from typing import Optional, Dict, Any, List
+from typing import AsyncIterator, Optional, Dict, Any, List, Tuple
 import time 
 from app.core.config import settings
+from app.db.mongo.indexes import ensure_indexes, verify_query_plans
+from app.db.mongo.migrations import run_migrations
+from app.utils.pagination import PAGE_SORT, encode_cursor, keyset_query
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -101,23 +106,22 @@ async def initialize_collections() -> None:
     
     # Create indices for better query performance
     # These operations are idempotent - safe to run multiple times
-    
     try:
-        # Example: Create index on 'name' field in 'users' collection
-        await db[settings.DB_TABLE.USERS].create_index("email", unique=True)
-        await db[settings.DB_TABLE.USERS].create_index("phone_number", unique=True)
-        
-        # # Example: Create compound index
-        # await db.products.create_index([
-        #     ("category", 1),
-        #     ("created_at", -1)  # -1 for descending order
-        # ])
-        
+        # Build the per-collection index registry in parallel
+        await ensure_indexes(db)
         logger.info("MongoDB collections and indices initialized")
     except Exception as e:
         logger.error(f"Error initializing MongoDB collections: {str(e)}")
         raise
 
+    if settings.DB.RUN_MIGRATIONS:
+        # Backfills must finish before requests query the fields they materialize
+        await run_migrations(db)
+
+    if settings.DB.VERIFY_QUERY_PLANS:
+        # Fails startup only when FAIL_ON_COLLSCAN is set, otherwise logs loudly
+        await verify_query_plans(db, fail_on_collscan=settings.DB.FAIL_ON_COLLSCAN)
+
 # Helper functions for common database operations
 
 async def find_one(collection: str, query: Dict[str, Any], projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
@@ -142,26 +146,131 @@ async def find_many(
         
     return await cursor.to_list(length=limit)
 
+async def find_page(
+    collection: str,
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, int]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one keyset page ordered by (created_at, uuid).
+    Returns the page and the continuation token for the next one (None on the last page).
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or tampered with
+        MissingSortKeyError: If the last document of a full page has no created_at
+    """
+    db = get_database()
+    documents = await db[collection].find(keyset_query(query, cursor), projection) \
+        .sort(PAGE_SORT).limit(limit + 1).to_list(length=limit + 1)
+
+    if len(documents) <= limit:
+        return documents, None
+
+    documents = documents[:limit]
+    return documents, encode_cursor(documents[-1])
+
+async def iter_many(
+    collection: str,
+    query: Dict[str, Any],
+    batch_size: int = 500,
+    sort: List[tuple] = None,
+    projection: Optional[Dict[str, int]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream documents from the specified collection.
+    Documents are yielded as each cursor batch arrives, so only one batch
+    is held in memory regardless of the size of the result set.
+    """
+    db = get_database()
+    cursor = db[collection].find(query, projection, batch_size=batch_size)
+
+    if sort:
+        cursor = cursor.sort(sort)
+
+    async for document in cursor:
+        yield document
+
+async def count_documents(collection: str, query: Dict[str, Any]) -> int:
+    """Count documents matching the query in the specified collection"""
+    db = get_database()
+    return await db[collection].count_documents(query)
+
 async def insert_one(collection: str, document: Dict[str, Any]) -> str:
     """Insert a document into the specified collection"""
     db = get_database()
     result = await db[collection].insert_one(document)
     return str(result.inserted_id)
 
+async def insert_many(collection: str, documents: List[Dict[str, Any]], ordered: bool = True) -> int:
+    """Insert several documents in one round trip; returns the number inserted"""
+    db = get_database()
+    result = await db[collection].insert_many(documents, ordered=ordered)
+    return len(result.inserted_ids)
+
+async def bulk_write(collection: str, operations: List[Any], ordered: bool = True) -> BulkWriteResult:
+    """
+    Send a batch of write operations (InsertOne, UpdateOne, ...) in one round trip.
+    With ordered=False the server applies every operation it can and reports
+    the failed ones in BulkWriteError.details instead of stopping at the first.
+    """
+    db = get_database()
+    return await db[collection].bulk_write(operations, ordered=ordered)
+
+def with_updated_at(update: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold updated_at into the $set of an update document, keeping any caller-supplied value"""
+    update = dict(update)
+    update["$set"] = {"updated_at": int(time.time()), **update.get("$set", {})}
+    return update
+
 async def update_one(
     collection: str, 
     query: Dict[str, Any], 
     update: Dict[str, Any],
     upsert: bool = False
 ) -> int:
-    """Update a document in the specified collection"""
+    """
+    Update a document in the specified collection.
+    Returns the number of documents matched: updated_at is always set, so a matched
+    document always counts as modified even when nothing else changed.
+    """
     db = get_database()
-    result = await db[collection].update_one(query, update, upsert=upsert)
+    result = await db[collection].update_one(query, with_updated_at(update), upsert=upsert)
+    return result.matched_count
 
-    if result.modified_count > 0:
-        await db[collection].update_one(query, {"$set": {"updated_at": int(time.time())}})
-        
-    return result.modified_count
+async def update_many(
+    collection: str,
+    query: Dict[str, Any],
+    update: Dict[str, Any]
+) -> int:
+    """Update every matching document; returns the number matched"""
+    db = get_database()
+    result = await db[collection].update_many(query, with_updated_at(update))
+    return result.matched_count
+
+async def update_and_return(
+    collection: str,
+    query: Dict[str, Any],
+    update: Dict[str, Any],
+    projection: Optional[Dict[str, int]] = None,
+    upsert: bool = False,
+    return_document: ReturnDocument = ReturnDocument.AFTER,
+    sort: List[tuple] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Update a single document and return it in one round trip.
+    Returns the post-image by default, or None if nothing matched.
+    """
+    db = get_database()
+    return await db[collection].find_one_and_update(
+        query,
+        with_updated_at(update),
+        projection=projection,
+        upsert=upsert,
+        return_document=return_document,
+        sort=sort
+    )
 
 async def delete_one(collection: str, query: Dict[str, Any]) -> int:
     """Delete a document from the specified collection"""
@@ -169,6 +278,12 @@ async def delete_one(collection: str, query: Dict[str, Any]) -> int:
     result = await db[collection].delete_one(query)
     return result.deleted_count
 
+async def delete_many(collection: str, query: Dict[str, Any]) -> int:
+    """Delete every matching document from the specified collection"""
+    db = get_database()
+    result = await db[collection].delete_many(query)
+    return result.deleted_count
+
 async def aggregate(collection: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Run an aggregation pipeline on the specified collection"""
     db = get_database()
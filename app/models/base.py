@@ -6,4 +6,6 @@ class OutModel(BaseModel):
     status: str
     status_code: int
     comment: Optional[str]
-    data: Any
\ No newline at end of file
+    data: Any
+    limit: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -10,5 +10,7 @@ class InvestmentInventory(BaseModel):
     bonus_percentage_earned: float = 0
     status: str
     currency: str
+    # Bumped by every balance update; writers compare-and-swap on it
+    version: int = 0
     created_at: int = 0
     updated_at: int = 0
\ No newline at end of file
@@ -21,6 +21,10 @@ class UserInvestmentSubscription(BaseModel):
     plan_id: str = Field(..., description="Linked base plan UUID")
     plan_start_date: str = Field(..., description="Subscription start date (DD-MM-YYYY)")
     is_eligible_for_bonus: bool = True
+    # Maintained by create_investment_entry alongside each inserted entry
+    installments_paid: int = 0
+    last_deposit_date: Optional[str] = None
+    last_deposit_ts: Optional[int] = None
     metadata: Optional[dict] = None
     status: Literal["ACTIVE", "INACTIVE", "COMPLETED"] = "ACTIVE"
     created_at: int = 0
@@ -32,6 +36,9 @@ class InvestmentEntry(BaseModel):
     user_id: str
     subscription_id: str
     deposit_date: str
+    # Materialized from deposit_date (see app.utils.dates.deposit_date_fields)
+    deposit_yyyymm: int
+    deposit_ts: int
     amount_invested: float
     gold_rate: float
     grams_purchased: float
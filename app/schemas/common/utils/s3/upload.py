@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Any, Dict, List
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
 from enum import Enum
 
 
@@ -11,6 +11,7 @@ class FileTypeEnum(str, Enum):
 class SingleFileUploadResponse(BaseModel):
     filename: str
     file_url: str
+    thumbnail_url: Optional[str] = None
 
 
 class MultiFileUploadResponse(BaseModel):
@@ -18,4 +19,28 @@ class MultiFileUploadResponse(BaseModel):
     successful_uploads: int
     failed_uploads: int
     successful_urls: List[str]
-    file_data: List[Dict[str, Any]]
\ No newline at end of file
+    file_data: List[Dict[str, Any]]
+
+
+class PresignedUploadRequest(BaseModel):
+    file_type: FileTypeEnum
+    user_email: str
+    filename: str
+    content_type: str
+    file_size: int = Field(..., gt=0)
+    method: Literal["POST", "PUT"] = "POST"
+
+
+class PresignedUploadResponse(BaseModel):
+    method: str
+    url: str
+    fields: Optional[Dict[str, str]] = None
+    headers: Optional[Dict[str, str]] = None
+    file_key: str
+    expires_in: int
+
+
+class UploadCompleteRequest(BaseModel):
+    file_type: FileTypeEnum
+    user_email: str
+    file_key: str
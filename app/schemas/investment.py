@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Literal, Optional
+from typing import Annotated, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field, field_validator
 
 class CreateInvestmentPlan(BaseModel):
@@ -54,4 +54,16 @@ class CreateMonthlyInvestment(BaseModel):
             datetime.strptime(value, "%d-%m-%Y")
             return value
         except ValueError:
-            raise ValueError("deposit_date must be in DD-MM-YYYY format")
\ No newline at end of file
+            raise ValueError("deposit_date must be in DD-MM-YYYY format")
+
+
+class InventoryValuationRequest(BaseModel):
+    gold_rates: Dict[str, Annotated[float, Field(gt=0, allow_inf_nan=False)]] = Field(
+        ..., min_length=1, description="Gold rate per 24k gram, by inventory currency"
+    )
+    group_by: List[Literal["plan", "currency", "country"]] = Field(default_factory=list)
+
+    @field_validator("group_by")
+    @classmethod
+    def dedupe_group_by(cls, value: List[str]) -> List[str]:
+        return list(dict.fromkeys(value))
@@ -13,11 +13,22 @@ from icecream import ic
 from app.core.security import create_access_token
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.utils.executor import ExecutorSaturatedError
 
 logger = get_logger(__name__)
 
 class AuthService:
 
+    @staticmethod
+    def _hashing_busy() -> OutModel:
+        logger.warning("Password hashing pool saturated, rejecting request")
+        return OutModel(
+            status="error",
+            status_code=503,
+            comment="Server is busy, please retry shortly",
+            data="",
+        )
+
     @staticmethod
     async def create_super_admin(payload:CreateSuperAdmin, secret_key: str) -> OutModel:
         """
@@ -59,6 +70,11 @@ class AuthService:
                 data="",
             )
 
+        try:
+            password_hash = await hash_password(payload.password)
+        except ExecutorSaturatedError:
+            return AuthService._hashing_busy()
+
         now = int(time.time())
         # Prepare admin data
         admin_data = SuperAdmin(
@@ -69,7 +85,7 @@ class AuthService:
             country=payload.country,
             country_code=payload.country_code,
             phone_number=payload.phone_number,
-            password=await hash_password(payload.password),
+            password=password_hash,
             user_type="SUPER_ADMIN",
             created_at=now,
             updated_at=now,
@@ -137,6 +153,11 @@ class AuthService:
                 data=""
             )
 
+        try:
+            password_hash = await hash_password(payload.password)
+        except ExecutorSaturatedError:
+            return AuthService._hashing_busy()
+
         now = int(time.time())
         # Prepare dept-admin data
         dept_admin_data = DepartmentAdmin(
@@ -147,7 +168,7 @@ class AuthService:
             country=payload.country,
             country_code=payload.country_code,
             phone_number=payload.phone_number,
-            password=await hash_password(payload.password),
+            password=password_hash,
             user_type="DEPT_ADMIN",
             created_by=current_admin["uuid"],
             created_at=now,
@@ -245,6 +266,9 @@ class AuthService:
                 data=new_admin
             )
 
+        except ExecutorSaturatedError:
+            return AuthService._hashing_busy()
+
         except Exception as e:
             logger.error(f"Failed to create admin: {str(e)}")
             return OutModel(
@@ -344,6 +368,9 @@ class AuthService:
                 }
             )
 
+        except ExecutorSaturatedError:
+            return AuthService._hashing_busy()
+
         except Exception as e:
             logger.error(f"Failed to login admin: {str(e)}")
             return OutModel(
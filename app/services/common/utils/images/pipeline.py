@@ -0,0 +1,116 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.executor import BoundedExecutor, ExecutorSaturatedError
+
+try:
+    from app.services.common.utils.images.transform import normalize_image
+except ImportError:  # Pillow is optional: pip install "investment[images]"
+    normalize_image = None
+
+
+logger = get_logger(__name__)
+
+# Spawned (not forked) workers: forking a process that runs an event loop and
+# client threads can copy held locks into the child
+image_processor = BoundedExecutor(
+    "image_processing",
+    lambda workers: ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")),
+    settings.IMAGES.WORKERS,
+    settings.IMAGES.MAX_QUEUE,
+)
+
+
+def _split_setting(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class ImagePipeline:
+    """Optional normalization of uploaded photos before they are stored"""
+
+    @staticmethod
+    def applies_to(file_type: str, filename: Optional[str]) -> bool:
+        if not settings.IMAGES.ENABLED or not filename:
+            return False
+
+        if normalize_image is None:
+            logger.warning("IMAGES__ENABLED is set but Pillow is not installed, storing images as uploaded")
+            return False
+
+        file_type = getattr(file_type, "value", file_type)
+        extension = os.path.splitext(filename.lower())[1].lstrip(".")
+        extensions = [ext.lstrip(".").lower() for ext in _split_setting(settings.IMAGES.EXTENSIONS)]
+        return file_type in _split_setting(settings.IMAGES.FILE_TYPES) and extension in extensions
+
+    @staticmethod
+    async def process(file: UploadFile) -> Optional[Dict[str, Any]]:
+        """
+        Run normalize_image on the process pool.
+
+        At most IMAGES__MAX_INPUT_MB is read into the buffer handed to the worker;
+        larger uploads are not decoded at all.
+
+        Returns:
+            The normalized image, thumbnail and per-stage timings, or None when the
+            upload is too large, the pool is saturated or the image cannot be
+            decoded; the caller then stores the original upload unchanged.
+        """
+        max_bytes = settings.IMAGES.MAX_INPUT_MB * 1024 * 1024
+        start = time.perf_counter()
+        await file.seek(0)
+        data = await file.read(max_bytes + 1)
+        await file.seek(0)
+        read_ms = round((time.perf_counter() - start) * 1000, 2)
+        if len(data) > max_bytes:
+            logger.warning(f"{file.filename} is larger than {settings.IMAGES.MAX_INPUT_MB}MB, storing without normalization")
+            return None
+
+        start = time.perf_counter()
+        try:
+            result = await image_processor.run(
+                normalize_image,
+                data,
+                settings.IMAGES.MAX_DIMENSION,
+                settings.IMAGES.JPEG_QUALITY,
+                settings.IMAGES.THUMBNAIL_SIZE,
+                settings.IMAGES.MAX_PIXELS,
+            )
+        except ExecutorSaturatedError:
+            logger.warning(f"Image pool saturated, storing {file.filename} without normalization")
+            return None
+        except Exception as e:
+            logger.warning(f"Could not normalize {file.filename}, storing as uploaded: {str(e) or type(e).__name__}")
+            return None
+        total_ms = (time.perf_counter() - start) * 1000
+
+        timings = result["timings_ms"]
+        # Whatever the worker did not account for is pickling, pipe transfer and queueing
+        timings["transfer"] = round(max(total_ms - sum(timings.values()), 0), 2)
+        timings["read"] = read_ms
+
+        logger.info(
+            f"Normalized {file.filename}: {len(data)} -> {len(result['image'])} bytes, "
+            f"{result['original_width']}x{result['original_height']} -> {result['width']}x{result['height']}, "
+            f"timings {timings}"
+        )
+        result["original_size"] = len(data)
+        return result
+
+    @staticmethod
+    def normalized_filename(filename: str, image_format: str) -> str:
+        extension = "png" if image_format == "PNG" else "jpg"
+        return f"{os.path.splitext(filename)[0]}.{extension}"
+
+    @staticmethod
+    def shutdown() -> None:
+        image_processor.shutdown()
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        return image_processor.stats()
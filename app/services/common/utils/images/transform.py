@@ -0,0 +1,88 @@
+"""
+CPU-bound image work run inside the image processing pool.
+
+Kept free of application imports so spawned worker processes start quickly
+and never load settings, database clients or the event loop machinery.
+"""
+import time
+from io import BytesIO
+from typing import Any, Dict
+
+from PIL import Image, ImageOps
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    """Whether any pixel is actually transparent, not just whether the mode could carry alpha"""
+    if image.mode not in ("RGBA", "LA", "PA"):
+        if "transparency" not in image.info:
+            return False
+        image = image.convert("RGBA")
+    return image.getchannel("A").getextrema()[0] < 255
+
+
+def normalize_image(data: bytes, max_dimension: int, quality: int, thumbnail_size: int, max_pixels: int) -> Dict[str, Any]:
+    """
+    Downsize, re-encode and strip metadata, then build a thumbnail.
+    EXIF orientation is applied to the pixels first so stripping it does not rotate the photo.
+
+    Photos become progressive JPEG. Images with transparent pixels stay PNG, since
+    JPEG has no alpha channel and flattening would paint the transparent areas white.
+    Raises ValueError, before decoding any pixels, when the image has more than max_pixels.
+    """
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    # Opening only parses the header, so the size check runs before any decode
+    image = Image.open(BytesIO(data))
+    original_width, original_height = image.size
+    if original_width * original_height > max_pixels:
+        raise ValueError(f"{original_width}x{original_height} image exceeds {max_pixels} pixels")
+    # JPEG can decode straight to a reduced scale, which is much cheaper than a full decode
+    image.draft("RGB", (max_dimension, max_dimension))
+    image.load()
+    timings["decode"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    image = ImageOps.exif_transpose(image)
+    image_format = "PNG" if _has_alpha(image) else "JPEG"
+    if image_format == "PNG":
+        image = image.convert("RGBA")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    timings["resize"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    output = BytesIO()
+    # No exif/icc arguments: the saved file carries no camera metadata or GPS position
+    if image_format == "PNG":
+        image.save(output, "PNG", optimize=True)
+    else:
+        image.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+    timings["encode"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    thumbnail = image.copy()
+    thumbnail.thumbnail((thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS)
+    thumbnail_output = BytesIO()
+    if image_format == "PNG":
+        thumbnail.save(thumbnail_output, "PNG", optimize=True)
+    else:
+        thumbnail.save(thumbnail_output, "JPEG", quality=75, optimize=True)
+    timings["thumbnail"] = _elapsed_ms(start)
+
+    return {
+        "image": output.getvalue(),
+        "thumbnail": thumbnail_output.getvalue(),
+        "format": image_format,
+        "content_type": f"image/{image_format.lower()}",
+        "width": image.width,
+        "height": image.height,
+        "original_width": original_width,
+        "original_height": original_height,
+        "timings_ms": timings,
+    }
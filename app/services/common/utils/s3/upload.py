@@ -1,35 +1,33 @@
+import io
 import os
+import time
+import hashlib
 import uuid
 import asyncio
-import aioboto3
 
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from botocore.exceptions import ClientError, NoCredentialsError
+from pymongo.errors import DuplicateKeyError
 from fastapi import UploadFile
 from functools import lru_cache
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.db.mongo.mongodb import delete_one, find_one, insert_one, update_and_return
 from app.models.base import OutModel
+from app.utils.common import generate_uuid
+from app.utils.timing import record_timing
+from app.utils.file_validation import FileValidationError, SNIFF_BYTES, StreamingValidator, matches_signature
 from app.schemas.common.utils.s3.upload import MultiFileUploadResponse
+from app.services.common.utils.images.pipeline import ImagePipeline
+from app.services.common.utils.storage.storage import get_storage
 
 
 logger = get_logger(__name__)
 
 
 class S3FileUploadService:
-    """Simplified AWS S3 file upload service with async support"""
-
-
-    @staticmethod
-    def get_session():
-        """Get aioboto3 session with credentials from environment"""
-        return aioboto3.Session(
-            aws_access_key_id = settings.S3_CREDENTIALS.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key = settings.S3_CREDENTIALS.AWS_SECRET_ACCESS_KEY,
-            region_name = settings.S3_CREDENTIALS.AWS_REGION
-        )
-
+    """File upload service with async support, storing through the configured StorageBackend"""
 
     @staticmethod
     def get_path(user_email: str, file_type: str, filename: str, base: str) -> str:
@@ -75,12 +73,11 @@ class S3FileUploadService:
         generate_unique_name: bool = True
     ) -> Dict[str, Any]:
         """
-        Upload a single file to S3 bucket with structured path
+        Upload a single file to the storage backend with structured path
         
         Args:
             file: FastAPI UploadFile object
-            bucket_name: S3 bucket name
-            user_id: User ID for folder structure
+            user_email: User email for folder structure
             file_type: File type for folder structure (e.g., "profile_images", "documents")
             base: Base folder name (default: "app_documents")
             allowed_extensions: List of allowed file extensions (e.g., [".pdf", ".doc", ".jpg"])
@@ -90,7 +87,7 @@ class S3FileUploadService:
         Returns:
             Dict with upload result
         """
-        bucket_name = settings.S3_CREDENTIALS.AWS_BUCKET_NAME
+        storage = get_storage()
         base = settings.S3_CREDENTIALS.BASE_DIR
         max_size_mb = settings.S3_CREDENTIALS.MAX_FILE_SIZE_MB
 
@@ -110,43 +107,109 @@ class S3FileUploadService:
                     "file_url": None
                 }
             
+            timings: Dict[str, float] = {}
+            stage_start = time.perf_counter()
+
+            # Hash the spooled upload in chunks while checking its signature and size, so
+            # a disguised or oversized file is rejected without reading the rest of it
+            validator = StreamingValidator(
+                os.path.splitext(file.filename.lower())[1],
+                int(max_size_mb) * 1024 * 1024,
+            )
+            try:
+                sha256, file_size = await asyncio.to_thread(S3FileUploadService.hash_spool, file.file, validator)
+                _, content_type = validator.finish()
+            except FileValidationError as err:
+                logger.warning(f"File validation failed for {file.filename}: {err}")
+                return {
+                    "success": False,
+                    "error": str(err),
+                    "status_code": 400,
+                    "file_key": None,
+                    "file_url": None
+                }
+            content_type = content_type or file.content_type
+            stage_start = record_timing(timings, "hash", stage_start)
+
+            # Same content already stored for this user: reuse the existing object
+            existing = await S3FileUploadService.find_existing_upload(user_email, sha256, file_type)
+            stage_start = record_timing(timings, "dedup_lookup", stage_start)
+            if existing:
+                logger.info(f"Duplicate upload of {file.filename} for {user_email}, reusing {existing['file_key']}")
+                return {
+                    "success": True,
+                    "file_key": existing["file_key"],
+                    "file_url": existing["file_url"],
+                    "file_size": existing["file_size"],
+                    "thumbnail_url": existing.get("thumbnail_url"),
+                    "bucket": existing["bucket"],
+                    "original_filename": file.filename,
+                    "sha256": sha256,
+                    "deduplicated": True,
+                    "timings_ms": timings
+                }
+
+            # Optionally downsize and strip photos off the event loop before storing them
+            filename = file.filename
+            normalized = None
+            if ImagePipeline.applies_to(file_type, filename):
+                normalized = await ImagePipeline.process(file)
+                if normalized:
+                    filename = ImagePipeline.normalized_filename(filename, normalized["format"])
+                    timings.update({f"normalize_{stage}": ms for stage, ms in normalized["timings_ms"].items()})
+                stage_start = time.perf_counter()
+
             # Generate final filename (with UUID if needed)
-            final_filename = S3FileUploadService.generate_unique_filename(file.filename, generate_unique_name)
+            final_filename = S3FileUploadService.generate_unique_filename(filename, generate_unique_name)
             
             # Generate file key using internal path method
             file_key = S3FileUploadService.get_path(user_email, file_type, final_filename, base)
-            
-            # Get file size efficiently for FastAPI UploadFile
-            if hasattr(file, 'size') and file.size is not None:
-                # FastAPI UploadFile has size attribute
-                file_size = file.size
-            else:
-                # Fallback: read to get size, then reset
-                await file.seek(0)
-                content = await file.read()
-                file_size = len(content)
-                await file.seek(0)  # Reset to beginning
-                        
-            # Upload to S3 directly
-            session = S3FileUploadService.get_session()
-            async with session.client('s3') as s3_client:
-                await s3_client.put_object(
-                    Bucket=bucket_name,
-                    Key=file_key,
-                    Body=file.file  # Pass file object directly
+            thumbnail_key = None
+
+            if normalized:
+                thumbnail_key = S3FileUploadService.get_path(user_email, file_type, f"thumbnails/{final_filename}", base)
+                file_size = len(normalized["image"])
+                await asyncio.gather(
+                    storage.put(file_key, io.BytesIO(normalized["image"]), content_type=normalized["content_type"]),
+                    storage.put(thumbnail_key, io.BytesIO(normalized["thumbnail"]), content_type=normalized["content_type"]),
+                )
+            elif file_size >= settings.S3_CREDENTIALS.MULTIPART_THRESHOLD_MB * 1024 * 1024:
+                # Large documents are streamed in parts so memory stays bounded
+                await storage.put_multipart(
+                    file_key,
+                    file,
+                    part_size=settings.S3_CREDENTIALS.MULTIPART_PART_SIZE_MB * 1024 * 1024,
+                    max_concurrency=settings.S3_CREDENTIALS.MULTIPART_CONCURRENCY,
+                    content_type=content_type,
                 )
+            else:
+                # Pass the spooled file object directly
+                await storage.put(file_key, file.file, content_type=content_type)
             
+            stage_start = record_timing(timings, "store", stage_start)
+
             # Generate public URL
-            aws_region = os.getenv('AWS_REGION', 'us-east-1')
-            file_url = f"https://{bucket_name}.s3.{aws_region}.amazonaws.com/{file_key}"
+            stored = await S3FileUploadService.record_file_hash(user_email, sha256, file_type, {
+                "file_key": file_key,
+                "file_url": storage.get_url(file_key),
+                "file_size": file_size,
+                "thumbnail_key": thumbnail_key,
+                "thumbnail_url": storage.get_url(thumbnail_key) if thumbnail_key else None,
+            })
+            record_timing(timings, "record", stage_start)
+            logger.info(f"Stored {file.filename} for {user_email} as {stored['file_key']}, timings {timings}")
                         
             return {
                 "success": True,
-                "file_key": file_key,
-                "file_url": file_url,
-                "file_size": file_size,
-                "bucket": bucket_name,
-                "original_filename": file.filename
+                "file_key": stored["file_key"],
+                "file_url": stored["file_url"],
+                "file_size": stored["file_size"],
+                "thumbnail_url": stored["thumbnail_url"],
+                "bucket": storage.location,
+                "original_filename": file.filename,
+                "sha256": sha256,
+                "deduplicated": False,
+                "timings_ms": timings
             }
             
         except NoCredentialsError:
@@ -181,101 +244,326 @@ class S3FileUploadService:
             }
 
 
+    @staticmethod
+    def hash_spool(
+        fileobj,
+        validator: Optional[StreamingValidator] = None,
+        chunk_size: int = 1024 * 1024,
+    ) -> Tuple[str, int]:
+        """
+        SHA-256 hex digest and size of a seekable upload spool, leaving the position at the start.
+        Each chunk is fed to the validator first, so reading stops at the first invalid chunk.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fileobj.seek(0)
+        try:
+            while chunk := fileobj.read(chunk_size):
+                if validator is not None:
+                    validator.feed(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        finally:
+            fileobj.seek(0)
+        return digest.hexdigest(), size
+
+
+    @staticmethod
+    def _file_hash_filter(user_email: str, sha256: str, file_type: str) -> Dict[str, Any]:
+        return {"user_email": user_email, "file_type": getattr(file_type, "value", file_type), "sha256": sha256}
+
+
+    @staticmethod
+    async def find_existing_upload(user_email: str, sha256: str, file_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an already stored object with the same content and file type for this user.
+        Keys live under the folder of their file type, so types never share an object.
+        An entry whose object has since been deleted, or that lives in another
+        bucket or storage backend, is dropped.
+        """
+        existing = await find_one(
+            settings.DB_TABLE.FILE_HASHES,
+            S3FileUploadService._file_hash_filter(user_email, sha256, file_type),
+            {"_id": 0},
+        )
+        if existing is None:
+            return None
+
+        storage = get_storage()
+        if existing["bucket"] != storage.location or await storage.head(existing["file_key"]) is None:
+            logger.warning(f"Stale file hash entry for {existing['file_key']}, uploading again")
+            await delete_one(settings.DB_TABLE.FILE_HASHES, {"uuid": existing["uuid"]})
+            return None
+
+        return existing
+
+
+    @staticmethod
+    async def record_file_hash(
+        user_email: str,
+        sha256: str,
+        file_type: str,
+        stored: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        Index a stored object (file_key, file_url, file_size, thumbnail_key, thumbnail_url)
+        by content hash. If a concurrent upload of the same content won the race,
+        remove our copy and return the winner's entry instead.
+        """
+        storage = get_storage()
+        now = int(time.time())
+        try:
+            await insert_one(settings.DB_TABLE.FILE_HASHES, {
+                "uuid": await generate_uuid(),
+                "user_email": user_email,
+                "sha256": sha256,
+                "file_type": getattr(file_type, "value", file_type),
+                "bucket": storage.location,
+                **stored,
+                "created_at": now,
+                "updated_at": now,
+            })
+            return stored
+        except DuplicateKeyError:
+            winner = await find_one(
+                settings.DB_TABLE.FILE_HASHES,
+                S3FileUploadService._file_hash_filter(user_email, sha256, file_type),
+                {"_id": 0},
+            )
+            if winner is None:
+                # The winner's entry was dropped as stale in the meantime; keep our copy
+                logger.warning(f"File hash entry for {stored['file_key']} vanished after a duplicate key, keeping our object")
+                return stored
+            await storage.delete(stored["file_key"])
+            if stored.get("thumbnail_key"):
+                await storage.delete(stored["thumbnail_key"])
+            return {key: winner.get(key) for key in stored}
+
+
+    @staticmethod
+    async def create_presigned_upload(
+        file_type: str,
+        user_email: str,
+        filename: str,
+        content_type: str,
+        file_size: int,
+        method: str = "POST",
+    ) -> Dict[str, Any]:
+        """
+        Issue a presigned POST or PUT so the client uploads straight to S3.
+
+        The object key follows get_path, and the signature pins the content type
+        and the declared size, so the API worker only ever sees this JSON request.
+        """
+        storage = get_storage()
+        if not storage.supports_presigned:
+            return {"success": False, "error": f"Direct uploads are not supported by the {storage.name} storage backend", "status_code": 400}
+
+        base = settings.S3_CREDENTIALS.BASE_DIR
+        max_size_bytes = int(settings.S3_CREDENTIALS.MAX_FILE_SIZE_MB) * 1024 * 1024
+        expires_in = settings.S3_CREDENTIALS.PRESIGNED_URL_EXPIRY_SECONDS
+
+        if not filename or not filename.strip():
+            return {"success": False, "error": "No filename provided", "status_code": 400}
+
+        if file_size > max_size_bytes:
+            return {
+                "success": False,
+                "error": f"File size {file_size / (1024 * 1024):.2f}MB exceeds {settings.S3_CREDENTIALS.MAX_FILE_SIZE_MB}MB limit",
+                "status_code": 400,
+            }
+
+        allowed_extensions = S3FileUploadService.get_allowed_extensions()
+        if allowed_extensions:
+            file_extension = os.path.splitext(filename.lower())[1]
+            if file_extension not in allowed_extensions:
+                return {
+                    "success": False,
+                    "error": f"File extension '{file_extension}' not allowed. Allowed extensions: {allowed_extensions}",
+                    "status_code": 400,
+                }
+
+        final_filename = S3FileUploadService.generate_unique_filename(filename, True)
+        file_key = S3FileUploadService.get_path(user_email, file_type, final_filename, base)
+
+        if method == "PUT":
+            presigned = await storage.create_presigned_put(file_key, content_type, file_size, expires_in)
+        else:
+            presigned = await storage.create_presigned_post(file_key, content_type, file_size, expires_in)
+
+        return {
+            "success": True,
+            "method": method,
+            **presigned,
+            "file_key": file_key,
+            "expires_in": expires_in,
+        }
+
+
+    @staticmethod
+    async def complete_presigned_upload(
+        file_type: str,
+        user_email: str,
+        file_key: str,
+        uploaded_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Verify a directly uploaded object with HEAD and record it in UPLOADED_FILES.
+        Completing the same key twice refreshes the record instead of duplicating it.
+        """
+        storage = get_storage()
+        base = settings.S3_CREDENTIALS.BASE_DIR
+        max_size_bytes = int(settings.S3_CREDENTIALS.MAX_FILE_SIZE_MB) * 1024 * 1024
+
+        # Only keys issued for this user and file type can be completed
+        prefix = S3FileUploadService.get_path(user_email, file_type, "", base)
+        if not file_key.startswith(prefix) or ".." in file_key or file_key == prefix:
+            return {"success": False, "error": "File key does not belong to this user and file type", "status_code": 400}
+
+        head = await storage.head(file_key)
+        if head is None:
+            return {"success": False, "error": "Uploaded file not found", "status_code": 404}
+
+        file_size = head["size"]
+        if file_size > max_size_bytes:
+            await storage.delete(file_key)
+            return {
+                "success": False,
+                "error": f"File size {file_size / (1024 * 1024):.2f}MB exceeds {settings.S3_CREDENTIALS.MAX_FILE_SIZE_MB}MB limit",
+                "status_code": 400,
+            }
+
+        # The client chose the bytes; make sure they are what the extension claims
+        file_extension = os.path.splitext(file_key.lower())[1]
+        if not matches_signature(await storage.read_head(file_key, SNIFF_BYTES), file_extension):
+            await storage.delete(file_key)
+            return {"success": False, "error": f"File content does not match its '{file_extension}' extension", "status_code": 400}
+
+        file_url = storage.get_url(file_key)
+        now = int(time.time())
+        record = await update_and_return(
+            settings.DB_TABLE.UPLOADED_FILES,
+            {"file_key": file_key},
+            {
+                "$setOnInsert": {
+                    "uuid": await generate_uuid(),
+                    "file_key": file_key,
+                    "created_at": now,
+                },
+                "$set": {
+                    "user_email": user_email,
+                    "file_type": getattr(file_type, "value", file_type),
+                    "bucket": storage.location,
+                    "file_url": file_url,
+                    "file_size": file_size,
+                    "content_type": head["content_type"],
+                    "etag": head["etag"],
+                    "uploaded_by": uploaded_by,
+                },
+            },
+            projection={"_id": 0},
+            upsert=True,
+        )
+
+        return {
+            "success": True,
+            "file_key": file_key,
+            "file_url": file_url,
+            "file_size": file_size,
+            "bucket": storage.location,
+            "record": record,
+        }
+
+
+    @staticmethod
+    async def iter_upload_results(
+        files: List[UploadFile],
+        user_email: str,
+        file_type: str,
+        allowed_extensions: Optional[List[str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Upload files concurrently (at most MAX_CONCURRENT_UPLOADS at a time) and
+        yield one per-file result as each upload finishes, in completion order.
+        Closing the iterator early cancels the uploads still in flight.
+        """
+        max_concurrent = int(settings.S3_CREDENTIALS.MAX_CONCURRENT_UPLOADS)
+
+        # Create semaphore to limit concurrent uploads
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def upload_with_semaphore(file: UploadFile, index: int) -> Dict[str, Any]:
+            filename = file.filename or f"file_{index}"
+            async with semaphore:
+                try:
+                    result = await S3FileUploadService.upload_single_file(
+                        file=file,
+                        user_email=user_email,
+                        file_type=file_type,
+                        allowed_extensions=allowed_extensions,
+                        generate_unique_name=True
+                    )
+                except Exception as err:
+                    logger.error(f"Exception during upload of {filename}: {err}")
+                    result = {"success": False, "error": f"Upload exception: {str(err)}"}
+
+            success = result.get("success", False)
+            return {
+                "index": index,
+                "filename": filename,
+                "success": success,
+                "file_url": result.get("file_url"),
+                "file_key": result.get("file_key"),
+                "error": result.get("error") if not success else None,
+                "file_size": result.get("file_size"),
+                "thumbnail_url": result.get("thumbnail_url"),
+                "deduplicated": result.get("deduplicated", False)
+            }
+
+        tasks = [asyncio.create_task(upload_with_semaphore(file, i)) for i, file in enumerate(files)]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
     @staticmethod
     async def upload_multiple_files(
         files: List[UploadFile],
-        user_id: str,
+        user_email: str,
         file_type: str,
         allowed_extensions: Optional[List[str]] = None,
-    ) -> Dict[str, Any]:
+    ) -> OutModel:
         """
         Upload multiple files to S3 concurrently with structured path
         
         Args:
             files: List of FastAPI UploadFile objects
-            bucket_name: S3 bucket name
-            user_id: User ID for folder structure
-            file_type: File type for folder structure (e.g., "profile_images", "documents")
-            base: Base folder name (default: "app_documents")
+            user_email: User email for folder structure
+            file_type: File type for folder structure (e.g., "KYC_DOCS", "MEDIAS")
             allowed_extensions: List of allowed file extensions (e.g., [".pdf", ".doc", ".jpg"])
-            max_size_mb: Maximum file size in MB per file
-            generate_unique_name: Whether to generate unique filenames
-            max_concurrent: Maximum number of concurrent uploads
             
         Returns:
-            Dict with upload results for all files
+            OutModel with upload results for all files, in request order
         """
-
-        generate_unique_name = True
-        max_concurrent = int(settings.S3_CREDENTIALS.MAX_CONCURRENT_UPLOADS)
-                
-        # Create semaphore to limit concurrent uploads
-        semaphore = asyncio.Semaphore(max_concurrent)
-        
-        async def upload_with_semaphore(file_with_index):
-            file, index = file_with_index
-            async with semaphore:
-                result = await S3FileUploadService.upload_single_file(
-                    file=file,
-                    user_id=user_id,
-                    file_type=file_type,
-                    allowed_extensions=allowed_extensions,
-                    generate_unique_name=generate_unique_name
-                )
-                # Add filename to result for safety
-                result["original_filename"] = file.filename or f"file_{index}"
-                return result
-        
         try:
-            # Create tasks for concurrent uploads
-            tasks = [upload_with_semaphore((file, i)) for i, file in enumerate(files)]
-            
-            # Execute all uploads concurrently
-            upload_results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Process results
-            results = []
-            successful_uploads = 0
-            failed_uploads = 0
-            successful_urls = []
-            
-            for result in upload_results:
-                
-                # Handle exceptions
-                if isinstance(result, Exception):
-                    logger.error(f"Exception during upload: {result}")
-                    result = {
-                        "success": False,
-                        "error": f"Upload exception: {str(result)}",
-                        "file_key": None,
-                        "file_url": None,
-                        "original_filename": "unknown"
-                    }
-                
-                # Get filename from result (now guaranteed to exist)
-                filename = result.get("original_filename", "unknown")
-                
-                # Count successes and failures
-                if result.get("success", False):
-                    successful_uploads += 1
-                    if result.get("file_url"):
-                        successful_urls.append(result["file_url"])
-                else:
-                    failed_uploads += 1
-                
-                results.append({
-                    "filename": filename,
-                    "success": result.get("success", False),
-                    "file_url": result.get("file_url"),
-                    "file_key": result.get("file_key"),
-                    "error": result.get("error") if not result.get("success", False) else None,
-                    "file_size": result.get("file_size")
-                })
+            results = [
+                result async for result in S3FileUploadService.iter_upload_results(
+                    files, user_email, file_type, allowed_extensions
+                )
+            ]
+            results.sort(key=lambda result: result.pop("index"))
+
+            successful_urls = [result["file_url"] for result in results if result["success"] and result["file_url"]]
+            successful_uploads = sum(1 for result in results if result["success"])
                         
             upload_data = MultiFileUploadResponse(
                 total_files=len(files),
                 successful_uploads=successful_uploads,
-                failed_uploads=failed_uploads,
+                failed_uploads=len(results) - successful_uploads,
                 successful_urls=successful_urls,
                 file_data=results
             )
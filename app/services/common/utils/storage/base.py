@@ -0,0 +1,56 @@
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Dict, Optional
+from fastapi import UploadFile
+
+
+class StorageBackend(ABC):
+    """
+    Where uploaded documents are stored.
+    Keys are the relative paths built by S3FileUploadService.get_path.
+    """
+
+    name: str = "base"
+    # Whether clients can upload straight to the backend with presigned URLs
+    supports_presigned: bool = False
+
+    @property
+    @abstractmethod
+    def location(self) -> str:
+        """Bucket name or root directory, recorded alongside each stored file"""
+
+    async def start(self) -> None:
+        """Open long-lived resources; called once from the application lifespan"""
+
+    async def close(self) -> None:
+        """Release resources opened by start()"""
+
+    @abstractmethod
+    async def put(self, key: str, fileobj: BinaryIO, content_type: Optional[str] = None) -> None:
+        """Store a seekable file object in a single request"""
+
+    @abstractmethod
+    async def put_multipart(
+        self,
+        key: str,
+        file: UploadFile,
+        part_size: int,
+        max_concurrency: int,
+        content_type: Optional[str] = None,
+    ) -> int:
+        """Stream a large upload in parts with bounded memory; returns the stored size"""
+
+    @abstractmethod
+    def get_url(self, key: str) -> str:
+        """URL the stored file is served from"""
+
+    @abstractmethod
+    async def head(self, key: str) -> Optional[Dict[str, Any]]:
+        """size, content_type and etag of a stored file, or None if it does not exist"""
+
+    @abstractmethod
+    async def read_head(self, key: str, length: int) -> bytes:
+        """First length bytes of a stored file, for content sniffing"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove a stored file; deleting a missing key is not an error"""
@@ -0,0 +1,116 @@
+import uuid
+import mimetypes
+import anyio
+
+from pathlib import Path
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Optional
+from fastapi import UploadFile
+from starlette.responses import FileResponse
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.common.utils.storage.base import StorageBackend
+
+
+logger = get_logger(__name__)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files on local disk under a root directory, written with async file I/O.
+    Writes go to a temporary file that is renamed into place, so readers never
+    see a partial document.
+    """
+
+    name = "local"
+    supports_presigned = False
+
+    def __init__(self, root: Optional[str] = None, base_url: Optional[str] = None, chunk_size: Optional[int] = None):
+        self.root = Path(root or settings.STORAGE.LOCAL_ROOT).resolve()
+        self.base_url = (base_url or settings.STORAGE.LOCAL_BASE_URL).rstrip("/")
+        self.chunk_size = chunk_size or settings.STORAGE.CHUNK_SIZE_KB * 1024
+
+    @property
+    def location(self) -> str:
+        return str(self.root)
+
+    async def start(self) -> None:
+        await anyio.Path(self.root).mkdir(parents=True, exist_ok=True)
+        logger.info(f"Local storage rooted at {self.root}")
+
+    def resolve(self, key: str) -> Path:
+        """
+        Absolute path for a key.
+
+        Raises:
+            ValueError: If the key escapes the storage root
+        """
+        path = (self.root / key.lstrip("/")).resolve()
+        if not path.is_relative_to(self.root) or path == self.root:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    async def _write(self, key: str, read_chunk: Callable[[int], Awaitable[bytes]]) -> int:
+        path = self.resolve(key)
+        await anyio.Path(path.parent).mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+
+        size = 0
+        try:
+            async with await anyio.open_file(temp_path, "wb") as target:
+                while chunk := await read_chunk(self.chunk_size):
+                    await target.write(chunk)
+                    size += len(chunk)
+            await anyio.Path(temp_path).rename(path)
+        except BaseException:
+            with anyio.CancelScope(shield=True):
+                await anyio.Path(temp_path).unlink(missing_ok=True)
+            raise
+        return size
+
+    async def put(self, key: str, fileobj: BinaryIO, content_type: Optional[str] = None) -> None:
+        fileobj.seek(0)
+        await self._write(key, lambda size: anyio.to_thread.run_sync(fileobj.read, size))
+
+    async def put_multipart(
+        self,
+        key: str,
+        file: UploadFile,
+        part_size: int,
+        max_concurrency: int,
+        content_type: Optional[str] = None,
+    ) -> int:
+        # A local disk gains nothing from parallel parts; stream it in chunks instead
+        await file.seek(0)
+        return await self._write(key, file.read)
+
+    def get_url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    async def head(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            stat_result = await anyio.Path(self.resolve(key)).stat()
+        except FileNotFoundError:
+            return None
+        return {
+            "size": stat_result.st_size,
+            "content_type": mimetypes.guess_type(key)[0] or "application/octet-stream",
+            "etag": f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}",
+        }
+
+    async def read_head(self, key: str, length: int) -> bytes:
+        async with await anyio.open_file(self.resolve(key), "rb") as source:
+            return await source.read(length)
+
+    async def delete(self, key: str) -> None:
+        await anyio.Path(self.resolve(key)).unlink(missing_ok=True)
+
+    async def file_response(self, key: str) -> Optional[FileResponse]:
+        """
+        Download response for a stored file, or None if it does not exist.
+        FileResponse reads the file in chunks off the event loop and handles Range and HEAD.
+        """
+        path = self.resolve(key)
+        if not await anyio.Path(path).is_file():
+            return None
+        return FileResponse(path, filename=path.name)
@@ -0,0 +1,235 @@
+import asyncio
+import aioboto3
+from aiobotocore.config import AioConfig
+
+from contextlib import AsyncExitStack
+from typing import Any, BinaryIO, Dict, List, Optional
+from botocore.exceptions import ClientError
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.common.utils.storage.base import StorageBackend
+
+
+logger = get_logger(__name__)
+
+NOT_FOUND_CODES = ("404", "NoSuchKey", "NotFound")
+
+
+class S3Storage(StorageBackend):
+    """AWS S3 (or any S3-compatible endpoint) through one shared aioboto3 client"""
+
+    name = "s3"
+    supports_presigned = True
+
+    def __init__(self, bucket_name: Optional[str] = None):
+        self.bucket_name = bucket_name or settings.S3_CREDENTIALS.AWS_BUCKET_NAME
+        self._client = None
+        self._client_exit_stack: Optional[AsyncExitStack] = None
+
+    @property
+    def location(self) -> str:
+        return self.bucket_name
+
+    @staticmethod
+    def get_session():
+        """Get aioboto3 session with credentials from environment"""
+        return aioboto3.Session(
+            aws_access_key_id = settings.S3_CREDENTIALS.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key = settings.S3_CREDENTIALS.AWS_SECRET_ACCESS_KEY,
+            region_name = settings.S3_CREDENTIALS.AWS_REGION
+        )
+
+    async def start(self) -> None:
+        """
+        Create the shared S3 client. Called once from the application lifespan so
+        credential resolution, client construction and the HTTPS connection pool
+        are paid once per worker instead of once per upload.
+        """
+        if self._client is not None:
+            return
+
+        config = AioConfig(
+            max_pool_connections=settings.S3_CREDENTIALS.MAX_POOL_CONNECTIONS,
+            connect_timeout=settings.S3_CREDENTIALS.CONNECT_TIMEOUT_SECONDS,
+            read_timeout=settings.S3_CREDENTIALS.READ_TIMEOUT_SECONDS,
+            tcp_keepalive=True,
+            connector_args={"keepalive_timeout": settings.S3_CREDENTIALS.KEEPALIVE_TIMEOUT_SECONDS},
+        )
+
+        exit_stack = AsyncExitStack()
+        self._client = await exit_stack.enter_async_context(
+            self.get_session().client(
+                "s3",
+                config=config,
+                endpoint_url=settings.S3_CREDENTIALS.ENDPOINT_URL or None,
+            )
+        )
+        self._client_exit_stack = exit_stack
+        logger.info("Shared S3 client created")
+
+    async def close(self) -> None:
+        """Close the shared S3 client and its connection pool"""
+        exit_stack = self._client_exit_stack
+        self._client = None
+        self._client_exit_stack = None
+        if exit_stack is not None:
+            await exit_stack.aclose()
+            logger.info("Shared S3 client closed")
+
+    @property
+    def client(self):
+        """
+        The shared S3 client.
+
+        Raises:
+            RuntimeError: If start() has not been called during startup
+        """
+        if self._client is None:
+            raise RuntimeError(
+                "S3 client not initialized. "
+                "Ensure the storage backend is started during startup."
+            )
+        return self._client
+
+    def get_url(self, key: str) -> str:
+        """Public URL of an object, honouring a custom endpoint (e.g. a local S3 stand-in)"""
+        endpoint_url = settings.S3_CREDENTIALS.ENDPOINT_URL
+        if endpoint_url:
+            return f"{endpoint_url.rstrip('/')}/{self.bucket_name}/{key}"
+        aws_region = settings.S3_CREDENTIALS.AWS_REGION or "us-east-1"
+        return f"https://{self.bucket_name}.s3.{aws_region}.amazonaws.com/{key}"
+
+    async def put(self, key: str, fileobj: BinaryIO, content_type: Optional[str] = None) -> None:
+        extra = {"ContentType": content_type} if content_type else {}
+        await self.client.put_object(Bucket=self.bucket_name, Key=key, Body=fileobj, **extra)
+
+    async def put_multipart(
+        self,
+        key: str,
+        file: UploadFile,
+        part_size: int,
+        max_concurrency: int,
+        content_type: Optional[str] = None,
+    ) -> int:
+        """
+        Stream an upload to S3 as a multipart upload.
+
+        Parts are read sequentially from the UploadFile spool and sent in parallel.
+        The semaphore is taken before a part is read, so at most max_concurrency
+        parts are held in memory regardless of file size. Any failure aborts the
+        multipart upload so no orphaned parts are left in the bucket.
+        """
+        # S3 rejects non-final parts smaller than 5 MiB
+        part_size = max(part_size, 5 * 1024 * 1024)
+
+        s3_client = self.client
+        extra = {"ContentType": content_type} if content_type else {}
+        multipart = await s3_client.create_multipart_upload(Bucket=self.bucket_name, Key=key, **extra)
+        upload_id = multipart["UploadId"]
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        parts: List[Dict[str, Any]] = []
+        tasks: List[asyncio.Task] = []
+        total_size = 0
+
+        async def upload_part(part_number: int, body: bytes) -> None:
+            try:
+                response = await s3_client.upload_part(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+                parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+            finally:
+                semaphore.release()
+
+        try:
+            await file.seek(0)
+            part_number = 0
+            while True:
+                await semaphore.acquire()
+                body = await file.read(part_size)
+                if not body:
+                    semaphore.release()
+                    break
+
+                part_number += 1
+                total_size += len(body)
+                tasks.append(asyncio.create_task(upload_part(part_number, body)))
+
+                # Surface a failed part before reading the rest of the file
+                if any(task.done() and task.exception() for task in tasks):
+                    break
+
+            await asyncio.gather(*tasks)
+
+            if part_number == 0:
+                # Zero-byte file: multipart needs at least one part
+                await s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+                await s3_client.put_object(Bucket=self.bucket_name, Key=key, Body=b"", **extra)
+                return 0
+
+            parts.sort(key=lambda part: part["PartNumber"])
+            await s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+            logger.info(f"Multipart upload of {key} completed: {part_number} parts, {total_size} bytes")
+            return total_size
+
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+            except Exception as abort_err:
+                logger.error(f"Failed to abort multipart upload {upload_id} for {key}: {abort_err}")
+            raise
+
+    async def head(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = await self.client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as err:
+            if err.response["Error"]["Code"] in NOT_FOUND_CODES:
+                return None
+            raise
+        return {
+            "size": response["ContentLength"],
+            "content_type": response.get("ContentType"),
+            "etag": response.get("ETag", "").strip('"'),
+        }
+
+    async def read_head(self, key: str, length: int) -> bytes:
+        response = await self.client.get_object(Bucket=self.bucket_name, Key=key, Range=f"bytes=0-{length - 1}")
+        async with response["Body"] as body:
+            return await body.read()
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete_object(Bucket=self.bucket_name, Key=key)
+
+    async def create_presigned_put(self, key: str, content_type: str, file_size: int, expires_in: int) -> Dict[str, Any]:
+        """Presigned PUT URL that pins the content type and length"""
+        url = await self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket_name, "Key": key, "ContentType": content_type, "ContentLength": file_size},
+            ExpiresIn=expires_in,
+        )
+        return {"url": url, "headers": {"Content-Type": content_type, "Content-Length": str(file_size)}}
+
+    async def create_presigned_post(self, key: str, content_type: str, file_size: int, expires_in: int) -> Dict[str, Any]:
+        """Presigned POST form limited to the content type and at most file_size bytes"""
+        presigned = await self.client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, file_size]],
+            ExpiresIn=expires_in,
+        )
+        return {"url": presigned["url"], "fields": presigned["fields"]}
@@ -0,0 +1,37 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.services.common.utils.storage.base import StorageBackend
+from app.services.common.utils.storage.local import LocalStorage
+from app.services.common.utils.storage.s3 import S3Storage
+
+
+STORAGE_BACKENDS = {
+    "s3": S3Storage,
+    "local": LocalStorage,
+}
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """The configured storage backend (STORAGE__BACKEND), created on first use"""
+    global _storage
+    if _storage is None:
+        _storage = STORAGE_BACKENDS[settings.STORAGE.BACKEND]()
+    return _storage
+
+
+def set_storage(storage: Optional[StorageBackend]) -> None:
+    """Swap the active backend, e.g. from a benchmark or a maintenance script"""
+    global _storage
+    _storage = storage
+
+
+async def start_storage() -> None:
+    await get_storage().start()
+
+
+async def close_storage() -> None:
+    if _storage is not None:
+        await _storage.close()
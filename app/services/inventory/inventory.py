@@ -1,4 +1,5 @@
-from app.db.mongo.mongodb import find_one, insert_one
+from typing import Dict, Optional
+from app.db.mongo.mongodb import find_one, insert_one, update_and_return
 from app.models.inventory import InvestmentInventory
 from app.utils.common import generate_uuid
 from app.core.config import settings
@@ -7,8 +8,49 @@ import time
 
 logger = get_logger(__name__)
 
+class InventoryVersionConflict(RuntimeError):
+    """Raised when an inventory changed between the read and a compare-and-swap update"""
+
+
 class InventoryService:
 
+    @staticmethod
+    def _version_filter(subscription_id: str, version: Optional[int]) -> dict:
+        if version is None:
+            # Inventory written before versioning
+            return {"subscription_id": subscription_id, "version": {"$exists": False}}
+        return {"subscription_id": subscription_id, "version": version}
+
+    @staticmethod
+    async def apply_balance_change(subscription_id: str, version: Optional[int], increments: Dict[str, float]) -> Optional[dict]:
+        """
+        Increment balances of a subscription's inventory if it is still at the version
+        the caller read, bumping the version in the same write.
+
+        A version mismatch means another writer changed the inventory after the caller
+        validated against it, so nothing is applied and the caller must re-run its
+        checks on fresh state.
+
+        Returns:
+            The updated inventory, or None if the subscription has no inventory
+
+        Raises:
+            InventoryVersionConflict: If the inventory is no longer at version
+        """
+        updated = await update_and_return(
+            settings.DB_TABLE.INVENTORY,
+            InventoryService._version_filter(subscription_id, version),
+            {"$inc": {**increments, "version": 1}},
+            projection={"_id": 0},
+        )
+        if updated is not None:
+            return updated
+
+        current = await find_one(settings.DB_TABLE.INVENTORY, {"subscription_id": subscription_id}, {"_id": 0, "version": 1})
+        if current is None:
+            return None
+        raise InventoryVersionConflict(f"Inventory of {subscription_id} moved from version {version} to {current.get('version')}")
+
     @staticmethod
     async def create_investment_inventory_for_subscription(user_id: str, subscription_id: str):
         """
@@ -0,0 +1,236 @@
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.mongo.mongodb import iter_many
+from app.utils.timing import record_timing
+
+logger = get_logger(__name__)
+
+ValuationGroup = Literal["plan", "currency", "country"]
+
+# Label for inventories whose subscription, user or field is missing
+UNKNOWN = "UNKNOWN"
+
+INVENTORY_PROJECTION = {
+    "_id": 0,
+    "subscription_id": 1,
+    "user_id": 1,
+    "currency": 1,
+    "gold_grams_24k": 1,
+    "invested_amount": 1,
+    "bonus_percentage_earned": 1,
+}
+
+# Summed per group and in the totals, in output order
+METRICS = ("gold_grams_24k", "invested_amount", "market_value", "unrealized_pnl", "bonus_accrued")
+
+
+class _Labels:
+    """Interns string labels as dense integer codes, so grouping works on int arrays"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: Optional[str]) -> int:
+        value = value or UNKNOWN
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+@dataclass
+class InventoryColumns:
+    """Inventories as parallel columns; group keys are codes into the matching labels"""
+    gold_grams_24k: np.ndarray
+    invested_amount: np.ndarray
+    bonus_percentage_earned: np.ndarray
+    codes: Dict[str, np.ndarray] = field(default_factory=dict)
+    labels: Dict[str, List[str]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.gold_grams_24k)
+
+
+def revalue(columns: InventoryColumns, gold_rates: Dict[str, float], group_by: Sequence[ValuationGroup] = ()) -> Dict[str, Any]:
+    """
+    Mark every inventory to market at the gold rate of its currency.
+
+        market_value   = gold_grams_24k * rate
+        unrealized_pnl = market_value - invested_amount
+        bonus_accrued  = invested_amount * bonus_percentage_earned / 100
+
+    Amounts in different currencies are never added up: totals are reported per
+    currency, and currency is always part of the group key. Inventories in a
+    currency without a rate are left out and counted as unpriced. Groups are the
+    distinct combinations of the keys, largest market value first.
+    """
+    currency_labels = columns.labels["currency"]
+    rates = np.array([gold_rates.get(currency, np.nan) for currency in currency_labels], dtype=np.float64)
+    rate = rates[columns.codes["currency"]] if len(currency_labels) else np.empty(0)
+
+    priced = ~np.isnan(rate)
+    values = {
+        "gold_grams_24k": columns.gold_grams_24k[priced],
+        "invested_amount": columns.invested_amount[priced],
+    }
+    values["market_value"] = values["gold_grams_24k"] * rate[priced]
+    values["unrealized_pnl"] = values["market_value"] - values["invested_amount"]
+    values["bonus_accrued"] = values["invested_amount"] * columns.bonus_percentage_earned[priced] / 100
+
+    unpriced = int(len(columns) - priced.sum())
+    missing_rates = sorted({
+        currency_labels[code] for code in np.unique(columns.codes["currency"][~priced])
+    }) if unpriced else []
+
+    totals = {group.pop("currency"): group for group in _aggregate(columns, priced, values, ["currency"])}
+    groups = []
+    if group_by:
+        keys = list(group_by) if "currency" in group_by else [*group_by, "currency"]
+        groups = _aggregate(columns, priced, values, keys)
+
+    return {
+        "gold_rates": gold_rates,
+        "group_by": list(group_by),
+        "totals": totals,
+        "unpriced_inventories": unpriced,
+        "missing_rates": missing_rates,
+        "groups": groups,
+    }
+
+
+def _aggregate(columns: InventoryColumns, priced: np.ndarray, values: Dict[str, np.ndarray], keys: Sequence[str]) -> List[Dict[str, Any]]:
+    """Sum every metric per distinct combination of the key codes, largest market value first"""
+    if not priced.any():
+        return []
+
+    # One integer key per combination of codes, then one bincount per metric
+    dims = tuple(len(columns.labels[key]) for key in keys)
+    combined = np.ravel_multi_index([columns.codes[key][priced] for key in keys], dims)
+    unique_keys, inverse = np.unique(combined, return_inverse=True)
+    counts = np.bincount(inverse)
+    sums = {metric: np.bincount(inverse, weights=values[metric], minlength=len(unique_keys)) for metric in METRICS}
+    key_codes = np.unravel_index(unique_keys, dims)
+
+    groups = []
+    for index in np.argsort(-sums["market_value"], kind="stable"):
+        group = {key: columns.labels[key][key_codes[position][index]] for position, key in enumerate(keys)}
+        group.update(_summarize(int(counts[index]), {metric: sums[metric][index] for metric in METRICS}))
+        groups.append(group)
+    return groups
+
+
+def _summarize(count: int, sums: Dict[str, float]) -> Dict[str, Any]:
+    invested = float(sums["invested_amount"])
+    return {
+        "inventories": count,
+        "gold_grams_24k": round(float(sums["gold_grams_24k"]), 4),
+        "invested_amount": round(invested, 2),
+        "market_value": round(float(sums["market_value"]), 2),
+        "unrealized_pnl": round(float(sums["unrealized_pnl"]), 2),
+        "unrealized_pnl_pct": round(float(sums["unrealized_pnl"]) / invested * 100, 2) if invested else 0.0,
+        "bonus_accrued": round(float(sums["bonus_accrued"]), 2),
+    }
+
+
+class InventoryValuationService:
+    """
+    Portfolio mark-to-market over every inventory.
+
+    Inventories are streamed through a projected cursor straight into typed
+    arrays, so only the valuation fields of one cursor batch are ever held as
+    documents. Plan and country live on the subscription and the user; those
+    collections are only read when the grouping needs them, and only as
+    id -> label code maps.
+    """
+
+    @staticmethod
+    async def _label_map(collection: str, label_field: str, labels: _Labels) -> Dict[str, int]:
+        codes = {}
+        async for document in iter_many(
+            collection, {}, batch_size=settings.VALUATION.CURSOR_BATCH_SIZE,
+            projection={"_id": 0, "uuid": 1, label_field: 1},
+        ):
+            codes[document.get("uuid")] = labels.code(document.get(label_field))
+        return codes
+
+    @staticmethod
+    async def _plan_names() -> Dict[str, str]:
+        return {
+            plan["uuid"]: plan.get("plan_name")
+            async for plan in iter_many(settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS, {}, projection={"_id": 0, "uuid": 1, "plan_name": 1})
+        }
+
+    @staticmethod
+    async def load_columns(group_by: Sequence[ValuationGroup] = ()) -> InventoryColumns:
+        """Stream every inventory into columns, with codes for currency and each group_by key"""
+        labels = {"currency": _Labels()}
+        joins = {}
+        if "plan" in group_by:
+            labels["plan"] = _Labels()
+            joins["plan"] = ("subscription_id", await InventoryValuationService._label_map(settings.DB_TABLE.SUBSCRIPTIONS, "plan_id", labels["plan"]))
+        if "country" in group_by:
+            labels["country"] = _Labels()
+            joins["country"] = ("user_id", await InventoryValuationService._label_map(settings.DB_TABLE.USERS, "country", labels["country"]))
+
+        gold_grams, invested, bonus_pct = array("d"), array("d"), array("d")
+        codes = {name: array("q") for name in labels}
+        unknown = {name: labels[name].code(UNKNOWN) for name in joins}
+
+        async for inventory in iter_many(
+            settings.DB_TABLE.INVENTORY, {}, batch_size=settings.VALUATION.CURSOR_BATCH_SIZE, projection=INVENTORY_PROJECTION,
+        ):
+            gold_grams.append(inventory.get("gold_grams_24k") or 0)
+            invested.append(inventory.get("invested_amount") or 0)
+            bonus_pct.append(inventory.get("bonus_percentage_earned") or 0)
+            codes["currency"].append(labels["currency"].code(inventory.get("currency")))
+            for name, (key_field, label_codes) in joins.items():
+                codes[name].append(label_codes.get(inventory.get(key_field), unknown[name]))
+
+        return InventoryColumns(
+            gold_grams_24k=np.frombuffer(gold_grams, dtype=np.float64),
+            invested_amount=np.frombuffer(invested, dtype=np.float64),
+            bonus_percentage_earned=np.frombuffer(bonus_pct, dtype=np.float64),
+            codes={name: np.frombuffer(values, dtype=np.int64) for name, values in codes.items()},
+            labels={name: label.values for name, label in labels.items()},
+        )
+
+    @staticmethod
+    async def revalue_inventories(gold_rates: Dict[str, float], group_by: Sequence[ValuationGroup], current_admin: dict):
+        try:
+            timings: Dict[str, float] = {}
+            stage_start = time.perf_counter()
+            columns = await InventoryValuationService.load_columns(group_by)
+            stage_start = record_timing(timings, "load", stage_start)
+
+            valuation = revalue(columns, gold_rates, group_by)
+            record_timing(timings, "compute", stage_start)
+
+            if "plan" in group_by and valuation["groups"]:
+                plan_names = await InventoryValuationService._plan_names()
+                for group in valuation["groups"]:
+                    group["plan_name"] = plan_names.get(group["plan"])
+
+            logger.info(f"Revalued {len(columns)} inventories for {current_admin.get('email')} by {list(group_by)}: {timings}")
+            return {
+                "status": "success",
+                "status_code": 200,
+                "comment": "Inventories revalued successfully",
+                "data": {**valuation, "timings_ms": timings},
+            }
+        except Exception as e:
+            logger.error(f"Error while revaluing inventories: {e}")
+            return {
+                "status": "error",
+                "status_code": 500,
+                "comment": "Internal server error while revaluing inventories",
+                "data": str(e),
+            }
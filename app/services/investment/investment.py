@@ -1,9 +1,14 @@
-from datetime import datetime, timedelta
-from app.services.inventory.inventory import InventoryService
+import asyncio
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+from app.services.inventory.inventory import InventoryService, InventoryVersionConflict
 from app.services.subscriptions.subscriptions import SubscriptionService
 from app.utils.common import generate_uuid
+from app.utils.dates import deposit_date_fields, parse_date
+from app.utils.locks import LockTimeoutError, get_lock_manager
+from app.utils.timing import record_timing
 from app.models.user import User
-from app.db.mongo.mongodb import find_many, find_one, insert_one, update_one
+from app.db.mongo.mongodb import count_documents, delete_one, find_one, insert_one
 import time
 from icecream import ic
 from app.core.security import create_access_token
@@ -12,171 +17,270 @@ from app.models.investment import InvestmentEntry, InvestmentPlan, UserInvestmen
 from app.models.inventory import InvestmentInventory
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.utils.email_service.email import EmailService, InvestmentConfirmationTemplate
+from app.utils.email_service.outbox import EmailOutbox
 
 logger = get_logger(__name__)
 
-class InvestmentService:
+# Fields create_investment_entry needs from the subscription
+SUBSCRIPTION_PROJECTION = {
+    "_id": 0,
+    "user_id": 1,
+    "plan_start_date": 1,
+    "metadata.plan_details": 1,
+    "installments_paid": 1,
+    "last_deposit_date": 1,
+    "last_deposit_ts": 1,
+}
 
-    @staticmethod
-    async def create_investment_entry(request: object, current_admin: dict):
-        try:
-            # 1️⃣ Validate Subscription
-            subscription = await find_one(
-                settings.DB_TABLE.SUBSCRIPTIONS, {"uuid": request.subscription_id}
-            )
-            if not subscription:
-                return {
-                    "status": "error",
-                    "status_code": 404,
-                    "comment": f"Subscription not found with id: {request.subscription_id}",
-                    "data": None,
-                }
-
-            # 2️⃣ Ensure subscription belongs to user
-            if subscription["user_id"] != request.user_id:
-                return {
-                    "status": "error",
-                    "status_code": 400,
-                    "comment": "Subscription does not belong to given user_id",
-                    "data": None,
-                }
-
-            # 3️⃣ Extract plan info
-            plan = subscription["metadata"]["plan_details"]
-
-            # 4️⃣ Compute allowed deposit range
-            start_date = datetime.strptime(subscription["plan_start_date"], "%d-%m-%Y").date()
-            payment_date = datetime.strptime(request.deposit_date, "%d-%m-%Y").date()
-
-            # Determine expected deposit date (next month * 30)
-            entries_response = await SubscriptionService.get_user_subscription_transactions(
-                user_id=request.user_id,
-                subscription_id=request.subscription_id,
-            )
+# Serializes deposits per subscription (in-process, or across workers with LOCKS__BACKEND=mongo)
+deposit_locks = get_lock_manager("deposits")
 
-            months_passed = (
-                len(entries_response["data"])
-                if entries_response["status"] == "success" and entries_response["data"]
-                else 0
-            )
+# Times a deposit is validated and recorded again after its inventory update lost
+# the compare-and-swap to a writer outside the lock
+DEPOSIT_ATTEMPTS = 3
 
-            expected_date = start_date + timedelta(days=months_passed * 30)
-            relaxation_days = plan.get("relaxation_days", 0)
-            allowed_last_date = expected_date + timedelta(days=relaxation_days)
 
-            # 5️⃣ Check on-time payment
-            on_time = payment_date <= allowed_last_date
-            min_amount = plan.get("minimum_investment_amount", 0)
-            if request.amount_invested < min_amount:
-                on_time = False
+class InvestmentService:
+
+    @staticmethod
+    async def _find_notification_user(user_id: str) -> Optional[dict]:
+        """Recipient of the deposit confirmation; a failed lookup only skips the email"""
+        try:
+            return await find_one(settings.DB_TABLE.USERS, {"uuid": user_id}, {"_id": 0, "email": 1, "full_name": 1})
+        except Exception as lookup_err:
+            logger.warning(f"User lookup for deposit email failed: {lookup_err}")
+            return None
 
-            # 6️⃣ Determine if bonus already credited for this month
-            payment_month = payment_date.month
-            payment_year = payment_date.year
+    @staticmethod
+    async def prefetch_deposit_context(
+        request: object, deposit_yyyymm: int
+    ) -> Tuple[Optional[dict], Optional[dict], Optional[dict], Optional[dict]]:
+        """
+        Every read a deposit needs before it commits, issued concurrently.
+        None of them depends on another: the bonus check is keyed by the requested
+        subscription and month, and ownership is verified once the subscription is back.
 
-            existing_bonus_entry = await find_one(
+        Returns:
+            The subscription, the bonus entry already credited this month (or None),
+            the inventory version and the user to notify (or None)
+        """
+        return await asyncio.gather(
+            find_one(
+                settings.DB_TABLE.SUBSCRIPTIONS,
+                {"uuid": request.subscription_id},
+                SUBSCRIPTION_PROJECTION,
+            ),
+            find_one(
                 settings.DB_TABLE.INVESTMENT_ENTRIES,
                 {
                     "subscription_id": request.subscription_id,
-                    "user_id": request.user_id,
+                    "deposit_yyyymm": deposit_yyyymm,
                     "is_bonus_credited": True,
-                    "$expr": {
-                        "$and": [
-                            {"$eq": [{"$month": {"$dateFromString": {"dateString": "$deposit_date"}}}, payment_month]},
-                            {"$eq": [{"$year": {"$dateFromString": {"dateString": "$deposit_date"}}}, payment_year]},
-                        ]
-                    },
                 },
-            )
-
-            # ✅ Bonus logic
-            bonus_earned = 0
-            is_bonus_credited = False
-            if on_time and not existing_bonus_entry:
-                bonus_earned = round(plan["bonus_percentage"] / 12, 2)
-                is_bonus_credited = True
-
-            created_by = {"email": current_admin["email"]}
-
-            # 7️⃣ Build investment entry
-            entry = InvestmentEntry(
-                uuid=await generate_uuid(),
-                user_id=request.user_id,
-                subscription_id=request.subscription_id,
-                deposit_date=request.deposit_date,
-                amount_invested=request.amount_invested,
-                gold_rate=request.gold_rate,
-                grams_purchased=request.grams_purchased,
-                payment_method=request.payment_method,
-                transaction_reference=request.transaction_ref,
-                payment_proof_url=request.payment_proof_url,
-                bonus_earned=bonus_earned,
-                is_bonus_eligible=on_time,
-                is_bonus_credited=is_bonus_credited,  # ✅ added field
-                remarks=request.remarks,
-                metadata={"created_by": created_by},
-                created_at=int(time.time()),
-                updated_at=int(time.time()),
-            )
-
-            # 8️⃣ Insert entry
-            await insert_one(settings.DB_TABLE.INVESTMENT_ENTRIES, entry.model_dump())
-
-            # 9️⃣ Update inventory
-            update_payload = {
-                "$inc": {
-                    "invested_amount": request.amount_invested,
-                    "gold_grams_24k": request.grams_purchased,
-                },
-                "$set": {"updated_at": int(time.time())},
-            }
-
-            if is_bonus_credited and bonus_earned > 0:
-                update_payload["$inc"]["bonus_percentage_earned"] = bonus_earned
-
-            await update_one(
+                {"_id": 1},
+            ),
+            find_one(
                 settings.DB_TABLE.INVENTORY,
                 {"subscription_id": request.subscription_id},
-                update_payload,
-            )
+                {"_id": 0, "version": 1},
+            ),
+            InvestmentService._find_notification_user(request.user_id),
+        )
 
-            # 🔁 Fetch Updated Inventory
-            updated_inventory = await find_one(
-                collection=settings.DB_TABLE.INVENTORY,
-                query={"subscription_id": request.subscription_id},
-            )
+    @staticmethod
+    async def create_investment_entry(request: object, current_admin: dict):
+        try:
+            timings: Dict[str, float] = {}
+            stage_start = time.perf_counter()
 
-            # 1️⃣0️⃣ Email notification
-            try:
-                user = await find_one(settings.DB_TABLE.USERS, {"uuid": request.user_id})
-                if user and user.get("email"):
-                    await InvestmentConfirmationTemplate.send_investment_confirmation(
-                        to_email=user["email"],
-                        user_name=f"{user.get("full_name")}".strip(),
-                        plan_name=plan["plan_name"],
-                        payment_amount=request.amount_invested,
-                        grams_purchased=request.grams_purchased,
-                        deposit_date=request.deposit_date,
-                        currency=updated_inventory.get("currency", "AED"),
-                        total_invested=updated_inventory.get("invested_amount", 0),
-                        total_grams=updated_inventory.get("gold_grams_24k", 0),
-                    )
-            except Exception as mail_err:
-                logger.warning(f"Email send failed: {mail_err}")
+            # Deposits on one subscription run one at a time, so the bonus check and the
+            # balance update always see the previous deposit; other subscriptions never wait
+            async with deposit_locks.lock(request.subscription_id):
+                stage_start = record_timing(timings, "lock", stage_start)
+                for attempt in range(1, DEPOSIT_ATTEMPTS + 1):
+                    try:
+                        return await InvestmentService._record_deposit(request, current_admin, timings, stage_start)
+                    except InventoryVersionConflict as conflict:
+                        # The entry and installment were rolled back; re-run the bonus and
+                        # on-time checks against what the other writer left behind
+                        logger.warning(f"{conflict}, validating deposit again (attempt {attempt}/{DEPOSIT_ATTEMPTS})")
+                        stage_start = time.perf_counter()
 
             return {
-                "status": "success",
-                "status_code": 200,
-                "comment": "Investment entry created successfully",
-                "data": entry.model_dump(),
+                "status": "error",
+                "status_code": 409,
+                "comment": "The inventory of this subscription kept changing, please retry",
+                "data": None,
+            }
+
+        except LockTimeoutError:
+            return {
+                "status": "error",
+                "status_code": 409,
+                "comment": "Another deposit for this subscription is still being processed, please retry",
+                "data": None,
             }
 
         except Exception as e:
             logger.error(f"Error creating investment entry: {str(e)}")
             return {
                 "status": "error",
-                "status_code": 400,
+                "status_code": 500,
                 "comment": "Something went wrong",
                 "data": str(e),
             }
+
+    @staticmethod
+    async def _record_deposit(request: object, current_admin: dict, timings: Dict[str, float], stage_start: float) -> dict:
+        """Deposit flow of create_investment_entry, run while holding the subscription's lock"""
+        # 1️⃣ Prefetch subscription, this month's bonus entry, the inventory version and the user in one concurrent stage
+        deposit_fields = deposit_date_fields(request.deposit_date)
+        subscription, existing_bonus_entry, inventory, user = await InvestmentService.prefetch_deposit_context(
+            request, deposit_fields["deposit_yyyymm"]
+        )
+        stage_start = record_timing(timings, "prefetch", stage_start)
+
+        if not subscription:
+            return {
+                "status": "error",
+                "status_code": 404,
+                "comment": f"Subscription not found with id: {request.subscription_id}",
+                "data": None,
+            }
+
+        # 2️⃣ Ensure subscription belongs to user
+        if subscription["user_id"] != request.user_id:
+            return {
+                "status": "error",
+                "status_code": 400,
+                "comment": "Subscription does not belong to given user_id",
+                "data": None,
+            }
+
+        # 3️⃣ Extract plan info
+        plan = subscription["metadata"]["plan_details"]
+
+        # 4️⃣ Compute allowed deposit range
+        start_date = parse_date(subscription["plan_start_date"])
+        payment_date = parse_date(request.deposit_date)
+
+        # Determine expected deposit date (next month * 30) from the installment counter
+        months_passed = subscription.get("installments_paid")
+        if months_passed is None:
+            # Subscription predates the counter and the backfill has not reached it yet
+            months_passed = await count_documents(
+                settings.DB_TABLE.INVESTMENT_ENTRIES,
+                {"subscription_id": request.subscription_id},
+            )
+            stage_start = record_timing(timings, "legacy_count", stage_start)
+
+        expected_date = start_date + timedelta(days=months_passed * 30)
+        relaxation_days = plan.get("relaxation_days", 0)
+        allowed_last_date = expected_date + timedelta(days=relaxation_days)
+
+        # 5️⃣ Check on-time payment
+        on_time = payment_date <= allowed_last_date
+        min_amount = plan.get("minimum_investment_amount", 0)
+        if request.amount_invested < min_amount:
+            on_time = False
+
+        # 6️⃣ Bonus logic: at most one credited bonus per subscription and month
+        bonus_earned = 0
+        is_bonus_credited = False
+        if on_time and not existing_bonus_entry:
+            bonus_earned = round(plan["bonus_percentage"] / 12, 2)
+            is_bonus_credited = True
+
+        created_by = {"email": current_admin["email"]}
+
+        # 7️⃣ Build investment entry
+        entry = InvestmentEntry(
+            uuid=await generate_uuid(),
+            user_id=request.user_id,
+            subscription_id=request.subscription_id,
+            deposit_date=request.deposit_date,
+            **deposit_fields,
+            amount_invested=request.amount_invested,
+            gold_rate=request.gold_rate,
+            grams_purchased=request.grams_purchased,
+            payment_method=request.payment_method,
+            transaction_reference=request.transaction_ref,
+            payment_proof_url=request.payment_proof_url,
+            bonus_earned=bonus_earned,
+            is_bonus_eligible=on_time,
+            is_bonus_credited=is_bonus_credited,  # ✅ added field
+            remarks=request.remarks,
+            metadata={"created_by": created_by},
+            created_at=int(time.time()),
+            updated_at=int(time.time()),
+        )
+
+        # 8️⃣ Claim the installment on the subscription, then insert the entry.
+        # The counter only advances from the value read above, so two concurrent
+        # deposits cannot both be validated against the same installment.
+        claimed = await SubscriptionService.claim_installment(
+            request.subscription_id, subscription, months_passed, request.deposit_date, deposit_fields["deposit_ts"]
+        )
+        stage_start = record_timing(timings, "claim", stage_start)
+        if not claimed:
+            return {
+                "status": "error",
+                "status_code": 409,
+                "comment": "Another deposit for this subscription was recorded at the same time, please retry",
+                "data": None,
+            }
+
+        try:
+            await insert_one(settings.DB_TABLE.INVESTMENT_ENTRIES, entry.model_dump())
+        except Exception:
+            await SubscriptionService.release_installment(request.subscription_id, subscription, months_passed)
+            raise
+        stage_start = record_timing(timings, "insert", stage_start)
+
+        # 9️⃣ Update inventory and read back the new totals in one round trip
+        update_payload = {
+            "$inc": {
+                "invested_amount": request.amount_invested,
+                "gold_grams_24k": request.grams_purchased,
+            },
+        }
+
+        if is_bonus_credited and bonus_earned > 0:
+            update_payload["$inc"]["bonus_percentage_earned"] = bonus_earned
+
+        try:
+            updated_inventory = await InventoryService.apply_balance_change(
+                request.subscription_id, (inventory or {}).get("version"), update_payload["$inc"]
+            ) or {}
+        except Exception:
+            await delete_one(settings.DB_TABLE.INVESTMENT_ENTRIES, {"uuid": entry.uuid})
+            await SubscriptionService.release_installment(request.subscription_id, subscription, months_passed)
+            raise
+        stage_start = record_timing(timings, "inventory", stage_start)
+
+        # 1️⃣0️⃣ Queue email notification, delivered by the outbox workers
+        try:
+            if user and user.get("email"):
+                await EmailOutbox.enqueue("investment_confirmation", {
+                    "to_email": user["email"],
+                    "user_name": f"{user.get("full_name")}".strip(),
+                    "plan_name": plan["plan_name"],
+                    "payment_amount": request.amount_invested,
+                    "grams_purchased": request.grams_purchased,
+                    "deposit_date": request.deposit_date,
+                    "currency": updated_inventory.get("currency", "AED"),
+                    "total_invested": updated_inventory.get("invested_amount", 0),
+                    "total_grams": updated_inventory.get("gold_grams_24k", 0),
+                })
+        except Exception as mail_err:
+            logger.warning(f"Email enqueue failed: {mail_err}")
+        record_timing(timings, "notify", stage_start)
+
+        logger.info(f"Investment entry {entry.uuid} created for subscription {request.subscription_id}, timings {timings}")
+
+        return {
+            "status": "success",
+            "status_code": 200,
+            "comment": "Investment entry created successfully",
+            "data": entry.model_dump(),
+        }
@@ -0,0 +1,525 @@
+import asyncio
+import csv
+import io
+import json
+import time
+from datetime import timedelta
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterator, List, Literal, Optional, Set, Tuple
+
+import anyio
+from fastapi import UploadFile
+from pydantic import ValidationError
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.mongo.mongodb import aggregate, bulk_write, delete_many, iter_many
+from app.models.investment import InvestmentEntry
+from app.schemas.investment import CreateMonthlyInvestment
+from app.services.inventory.inventory import InventoryService, InventoryVersionConflict
+from app.services.investment.investment import DEPOSIT_ATTEMPTS, SUBSCRIPTION_PROJECTION, deposit_locks
+from app.services.subscriptions.subscriptions import SubscriptionService
+from app.utils.common import generate_uuid
+from app.utils.dates import deposit_date_fields, parse_date
+from app.utils.email_service.outbox import EmailOutbox
+from app.utils.locks import LockTimeoutError
+from app.utils.timing import record_timing
+
+logger = get_logger(__name__)
+
+ImportFormat = Literal["csv", "ndjson"]
+
+# A parsed row: its 1-based position in the file and the raw fields, or why it could not be parsed
+RawRow = Tuple[int, Any]
+# A validated row: its position, the request and its materialized deposit date fields
+ParsedRow = Tuple[int, CreateMonthlyInvestment, Dict[str, int]]
+
+
+class ImportFileError(ValueError):
+    """Raised when the import file as a whole cannot be read"""
+
+
+def _csv_rows(text: io.TextIOBase) -> Iterator[RawRow]:
+    reader = csv.DictReader(text)
+    missing = {"user_id", "subscription_id", "deposit_date"} - set(reader.fieldnames or [])
+    if missing:
+        raise ImportFileError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+    for row_number, row in enumerate(reader, start=1):
+        # Empty cells fall back to the schema defaults instead of failing as ""
+        yield row_number, {key: value for key, value in row.items() if key is not None and value not in ("", None)}
+
+
+def _ndjson_rows(text: io.TextIOBase) -> Iterator[RawRow]:
+    row_number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ValueError(f"Invalid JSON: {e.msg}")
+
+
+async def _collect(documents: AsyncIterator[Dict[str, Any]], key: Any) -> Dict[Any, Dict[str, Any]]:
+    """Index documents by a field, or by a tuple of fields"""
+    if isinstance(key, tuple):
+        return {tuple(document[field] for field in key): document async for document in documents}
+    return {document[key]: document async for document in documents}
+
+
+def _format_validation_error(err: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in err.errors())
+
+
+class InvestmentImportService:
+
+    @staticmethod
+    def detect_format(file: UploadFile, requested: Optional[ImportFormat] = None) -> ImportFormat:
+        """Format from the query parameter, else from the file name or content type"""
+        if requested:
+            return requested
+        filename = (file.filename or "").lower()
+        content_type = (file.content_type or "").lower()
+        if filename.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type:
+            return "ndjson"
+        if filename.endswith(".csv") or "csv" in content_type:
+            return "csv"
+        raise ImportFileError("Cannot tell the file format; pass import_format=csv or ndjson")
+
+    @staticmethod
+    async def iter_row_batches(file: UploadFile, import_format: ImportFormat, batch_size: int) -> AsyncIterator[List[RawRow]]:
+        """
+        Stream the upload's spool in batches of parsed rows.
+        Parsing runs in a worker thread one batch at a time, so only one batch is held
+        in memory and the event loop is not blocked by large files.
+        """
+        await file.seek(0)
+        text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        rows = _csv_rows(text) if import_format == "csv" else _ndjson_rows(text)
+        try:
+            while True:
+                try:
+                    batch = await anyio.to_thread.run_sync(lambda: list(islice(rows, batch_size)))
+                except (csv.Error, UnicodeDecodeError) as e:
+                    raise ImportFileError(f"Unreadable {import_format} file: {e}")
+                if not batch:
+                    return
+                yield batch
+        finally:
+            # Leave the spool open for UploadFile to close
+            text.detach()
+
+    @staticmethod
+    async def _preload(subscription_ids: List[str], months: List[int]) -> Tuple[Dict[str, dict], Dict[str, dict], Set[Tuple[str, int]], Dict[str, dict]]:
+        """
+        Everything a batch needs in four set-based reads instead of several lookups per row,
+        the first three issued concurrently:
+        subscriptions (plan details included), inventories, the (subscription, month)
+        pairs whose bonus is already credited, and the users to notify.
+        Subscriptions predating the installment counter get it from one grouped count.
+        """
+        subscriptions, inventories, credited_months = await asyncio.gather(
+            _collect(iter_many(
+                settings.DB_TABLE.SUBSCRIPTIONS,
+                {"uuid": {"$in": subscription_ids}},
+                projection={**SUBSCRIPTION_PROJECTION, "uuid": 1},
+            ), key="uuid"),
+            _collect(iter_many(
+                settings.DB_TABLE.INVENTORY,
+                {"subscription_id": {"$in": subscription_ids}},
+                projection={"_id": 0, "subscription_id": 1, "version": 1, "invested_amount": 1, "gold_grams_24k": 1, "currency": 1},
+            ), key="subscription_id"),
+            _collect(iter_many(
+                settings.DB_TABLE.INVESTMENT_ENTRIES,
+                {"subscription_id": {"$in": subscription_ids}, "deposit_yyyymm": {"$in": months}, "is_bonus_credited": True},
+                projection={"_id": 0, "subscription_id": 1, "deposit_yyyymm": 1},
+            ), key=("subscription_id", "deposit_yyyymm")),
+        )
+        credited_months = set(credited_months)
+
+        user_ids = list({subscription["user_id"] for subscription in subscriptions.values()})
+        users = await _collect(iter_many(
+            settings.DB_TABLE.USERS,
+            {"uuid": {"$in": user_ids}},
+            projection={"_id": 0, "uuid": 1, "email": 1, "full_name": 1},
+        ), key="uuid")
+
+        legacy_ids = [uuid for uuid, subscription in subscriptions.items() if subscription.get("installments_paid") is None]
+        if legacy_ids:
+            counts = await aggregate(settings.DB_TABLE.INVESTMENT_ENTRIES, [
+                {"$match": {"subscription_id": {"$in": legacy_ids}}},
+                {"$group": {"_id": "$subscription_id", "count": {"$sum": 1}}},
+            ])
+            counted = {group["_id"]: group["count"] for group in counts}
+            for uuid in legacy_ids:
+                subscriptions[uuid]["legacy_installments_paid"] = counted.get(uuid, 0)
+
+        return subscriptions, inventories, credited_months, users
+
+    @staticmethod
+    def _parse_rows(rows: List[RawRow], report: List[Dict[str, Any]]) -> List[ParsedRow]:
+        requests: List[ParsedRow] = []
+        for row_number, raw in rows:
+            try:
+                if isinstance(raw, Exception):
+                    raise raw
+                if not isinstance(raw, dict):
+                    raise ValueError("Row must be an object")
+                request = CreateMonthlyInvestment.model_validate(raw)
+                requests.append((row_number, request, deposit_date_fields(request.deposit_date)))
+            except ValidationError as e:
+                report.append({"row": row_number, "status": "FAILED", "error": _format_validation_error(e)})
+            except ValueError as e:
+                report.append({"row": row_number, "status": "FAILED", "error": str(e)})
+        return requests
+
+    @staticmethod
+    async def _import_batch(rows: List[RawRow], current_admin: dict, report: List[Dict[str, Any]]) -> None:
+        """
+        Validate one batch of rows against preloaded state and write it with set-based writes.
+
+        Rows are written per subscription as one unit, the way a single deposit is:
+        the installment counter is claimed first, then the entries are inserted, then
+        the inventory is compare-and-swapped on its version. If any step misses for a
+        subscription (counter or inventory moved, an insert was rejected) its entries
+        are deleted, the counter is released and its remaining rows are validated
+        again against fresh state, up to DEPOSIT_ATTEMPTS times.
+        """
+        requests = InvestmentImportService._parse_rows(rows, report)
+        if not requests:
+            return
+
+        subscription_ids = sorted({request.subscription_id for _, request, _ in requests})
+        notifications: List[Dict[str, Any]] = []
+
+        # Same per-subscription locks as single deposits, so the two paths never interleave
+        async with deposit_locks.lock_many(subscription_ids):
+            pending = requests
+            for attempt in range(1, DEPOSIT_ATTEMPTS + 1):
+                pending = await InvestmentImportService._write_rows(pending, current_admin, report, notifications)
+                if not pending:
+                    break
+                retried = len({request.subscription_id for _, request, _ in pending})
+                logger.warning(f"Import: {retried} subscriptions changed under the lock, validating their rows again (attempt {attempt}/{DEPOSIT_ATTEMPTS})")
+
+            report.extend(
+                {"row": row_number, "status": "FAILED", "error": "Subscription kept changing during the import, retry this row"}
+                for row_number, _, _ in pending
+            )
+
+        try:
+            await EmailOutbox.enqueue_many("investment_confirmation", notifications)
+        except Exception as mail_err:
+            logger.warning(f"Email enqueue failed for imported deposits: {mail_err}")
+
+    @staticmethod
+    async def _plan_rows(
+        requests: List[ParsedRow],
+        subscriptions: Dict[str, dict],
+        inventories: Dict[str, dict],
+        credited_months: Set[Tuple[str, int]],
+        current_admin: dict,
+        report: List[Dict[str, Any]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """Apply the single-deposit rules to every row in memory, grouped by subscription in file order"""
+        created_by = {"email": current_admin["email"]}
+        now = int(time.time())
+        groups: Dict[str, Dict[str, Any]] = {}
+
+        for row_number, request, fields in requests:
+            subscription = subscriptions.get(request.subscription_id)
+            if not subscription:
+                report.append({"row": row_number, "status": "FAILED", "error": f"Subscription not found with id: {request.subscription_id}"})
+                continue
+            if subscription["user_id"] != request.user_id:
+                report.append({"row": row_number, "status": "FAILED", "error": "Subscription does not belong to given user_id"})
+                continue
+            if request.subscription_id not in inventories:
+                logger.error(f"Import: subscription {request.subscription_id} has no inventory, row {row_number} not imported")
+                report.append({"row": row_number, "status": "FAILED", "error": f"Inventory not found for subscription: {request.subscription_id}"})
+                continue
+
+            group = groups.get(request.subscription_id)
+            if group is None:
+                installments_paid = subscription.get("installments_paid")
+                if installments_paid is None:
+                    installments_paid = subscription["legacy_installments_paid"]
+                group = groups[request.subscription_id] = {
+                    "subscription": subscription,
+                    "inventory": inventories[request.subscription_id],
+                    "installments_paid": installments_paid,
+                    "rows": [],
+                }
+
+            # Same rules as InvestmentService.create_investment_entry
+            plan = subscription["metadata"]["plan_details"]
+            paid_before = group["installments_paid"] + len(group["rows"])
+            expected_date = parse_date(subscription["plan_start_date"]) + timedelta(days=paid_before * 30)
+            allowed_last_date = expected_date + timedelta(days=plan.get("relaxation_days", 0))
+            on_time = parse_date(request.deposit_date) <= allowed_last_date
+            if request.amount_invested < plan.get("minimum_investment_amount", 0):
+                on_time = False
+
+            month_key = (request.subscription_id, fields["deposit_yyyymm"])
+            bonus_earned = 0
+            is_bonus_credited = False
+            if on_time and month_key not in credited_months:
+                bonus_earned = round(plan["bonus_percentage"] / 12, 2)
+                is_bonus_credited = True
+                credited_months.add(month_key)
+
+            entry = InvestmentEntry(
+                uuid=await generate_uuid(),
+                user_id=request.user_id,
+                subscription_id=request.subscription_id,
+                deposit_date=request.deposit_date,
+                **fields,
+                amount_invested=request.amount_invested,
+                gold_rate=request.gold_rate,
+                grams_purchased=request.grams_purchased,
+                payment_method=request.payment_method,
+                transaction_reference=request.transaction_ref,
+                payment_proof_url=request.payment_proof_url,
+                bonus_earned=bonus_earned,
+                is_bonus_eligible=on_time,
+                is_bonus_credited=is_bonus_credited,
+                remarks=request.remarks,
+                metadata={"created_by": created_by, "import": True},
+                created_at=now,
+                updated_at=now,
+            ).model_dump()
+
+            group["rows"].append({"row": row_number, "request": request, "fields": fields, "entry": entry, "plan": plan})
+
+        return groups
+
+    @staticmethod
+    async def _claim_counters(groups: Dict[str, Dict[str, Any]]) -> Set[str]:
+        """Advance every subscription's counter by its row count; returns the subscriptions claimed"""
+        async def claim(subscription_id: str, group: Dict[str, Any]) -> bool:
+            latest = group["rows"][0]
+            for row in group["rows"]:
+                if row["fields"]["deposit_ts"] >= latest["fields"]["deposit_ts"]:
+                    latest = row
+            return await SubscriptionService.claim_installment(
+                subscription_id, group["subscription"], group["installments_paid"],
+                latest["request"].deposit_date, latest["fields"]["deposit_ts"], count=len(group["rows"]),
+            )
+
+        results = await asyncio.gather(*(claim(subscription_id, group) for subscription_id, group in groups.items()), return_exceptions=True)
+        claimed = {subscription_id for subscription_id, result in zip(groups, results) if result is True}
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            await InvestmentImportService._roll_back({subscription_id: groups[subscription_id] for subscription_id in claimed})
+            raise errors[0]
+        return claimed
+
+    @staticmethod
+    async def _roll_back(groups: Dict[str, Dict[str, Any]]) -> None:
+        """Delete the entries of these subscriptions' rows and release their claimed counters"""
+        if not groups:
+            return
+        await delete_many(settings.DB_TABLE.INVESTMENT_ENTRIES, {
+            "uuid": {"$in": [row["entry"]["uuid"] for group in groups.values() for row in group["rows"]]},
+        })
+        await asyncio.gather(*(
+            SubscriptionService.release_installment(subscription_id, group["subscription"], group["installments_paid"], count=len(group["rows"]))
+            for subscription_id, group in groups.items()
+        ))
+
+    @staticmethod
+    async def _write_rows(
+        requests: List[ParsedRow],
+        current_admin: dict,
+        report: List[Dict[str, Any]],
+        notifications: List[Dict[str, Any]],
+    ) -> List[ParsedRow]:
+        """
+        One attempt at writing the rows, run under their subscriptions' locks.
+        Returns the rows of subscriptions that were rolled back and must be validated again.
+        """
+        subscription_ids = sorted({request.subscription_id for _, request, _ in requests})
+        months = sorted({fields["deposit_yyyymm"] for _, _, fields in requests})
+        subscriptions, inventories, credited_months, users = await InvestmentImportService._preload(subscription_ids, months)
+
+        groups = await InvestmentImportService._plan_rows(requests, subscriptions, inventories, credited_months, current_admin, report)
+        if not groups:
+            return []
+
+        retry: List[ParsedRow] = []
+
+        def retry_rows(group: Dict[str, Any]) -> None:
+            retry.extend((row["row"], row["request"], row["fields"]) for row in group["rows"])
+
+        # 1. Counters first, so no other writer validates against the same installments
+        claimed = await InvestmentImportService._claim_counters(groups)
+        for subscription_id, group in groups.items():
+            if subscription_id not in claimed:
+                retry_rows(group)
+        groups = {subscription_id: group for subscription_id, group in groups.items() if subscription_id in claimed}
+        if not groups:
+            return retry
+
+        # 2. Entries in one unordered insert; a rejected row takes its subscription's other rows back
+        planned = [row for group in groups.values() for row in group["rows"]]
+        rejected: Dict[str, str] = {}
+        try:
+            await bulk_write(settings.DB_TABLE.INVESTMENT_ENTRIES, [InsertOne(row["entry"]) for row in planned], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                rejected[planned[error["index"]]["entry"]["uuid"]] = error.get("errmsg", "Insert failed")
+        except Exception:
+            await InvestmentImportService._roll_back(groups)
+            raise
+
+        if rejected:
+            rolled_back = {row["entry"]["subscription_id"] for row in planned if row["entry"]["uuid"] in rejected}
+            await InvestmentImportService._roll_back({subscription_id: groups[subscription_id] for subscription_id in rolled_back})
+            for subscription_id in rolled_back:
+                group = groups.pop(subscription_id)
+                for row in group["rows"]:
+                    error = rejected.get(row["entry"]["uuid"])
+                    if error:
+                        report.append({"row": row["row"], "status": "FAILED", "error": error})
+                    else:
+                        retry.append((row["row"], row["request"], row["fields"]))
+
+        # 3. One balance update per subscription, compare-and-swapped on the inventory version
+        def increments(group: Dict[str, Any]) -> Dict[str, float]:
+            balance = {"invested_amount": 0, "gold_grams_24k": 0}
+            for row in group["rows"]:
+                balance["invested_amount"] += row["entry"]["amount_invested"]
+                balance["gold_grams_24k"] += row["entry"]["grams_purchased"]
+                if row["entry"]["is_bonus_credited"] and row["entry"]["bonus_earned"] > 0:
+                    balance["bonus_percentage_earned"] = balance.get("bonus_percentage_earned", 0) + row["entry"]["bonus_earned"]
+            return balance
+
+        results = await asyncio.gather(*(
+            InventoryService.apply_balance_change(subscription_id, group["inventory"].get("version"), increments(group))
+            for subscription_id, group in groups.items()
+        ), return_exceptions=True)
+
+        failed = {}
+        for (subscription_id, group), result in zip(groups.items(), results):
+            if isinstance(result, InventoryVersionConflict):
+                retry_rows(group)
+            elif isinstance(result, BaseException) or result is None:
+                error = str(result) if isinstance(result, BaseException) else f"Inventory not found for subscription: {subscription_id}"
+                logger.error(f"Import: balances of subscription {subscription_id} not applied, rows rolled back: {error}")
+                report.extend({"row": row["row"], "status": "FAILED", "error": error} for row in group["rows"])
+            else:
+                continue
+            failed[subscription_id] = group
+        await InvestmentImportService._roll_back(failed)
+
+        for subscription_id, group in groups.items():
+            if subscription_id in failed:
+                continue
+            # Running totals as the single-deposit confirmation email reports them
+            inventory = group["inventory"]
+            total_invested = inventory.get("invested_amount", 0)
+            total_grams = inventory.get("gold_grams_24k", 0)
+            for row in group["rows"]:
+                entry = row["entry"]
+                total_invested += entry["amount_invested"]
+                total_grams += entry["grams_purchased"]
+                report.append({
+                    "row": row["row"],
+                    "status": "CREATED",
+                    "entry_id": entry["uuid"],
+                    "subscription_id": subscription_id,
+                    "bonus_earned": entry["bonus_earned"],
+                })
+                user = users.get(entry["user_id"])
+                if user and user.get("email"):
+                    notifications.append({
+                        "to_email": user["email"],
+                        "user_name": f"{user.get('full_name')}".strip(),
+                        "plan_name": row["plan"]["plan_name"],
+                        "payment_amount": entry["amount_invested"],
+                        "grams_purchased": entry["grams_purchased"],
+                        "deposit_date": entry["deposit_date"],
+                        "currency": inventory.get("currency", "AED"),
+                        "total_invested": total_invested,
+                        "total_grams": total_grams,
+                    })
+
+        return retry
+
+    @staticmethod
+    async def import_entries(file: UploadFile, current_admin: dict, import_format: Optional[ImportFormat] = None):
+        """
+        Create investment entries from a CSV or NDJSON upload.
+
+        Rows are parsed and validated batch by batch. Each batch preloads its
+        subscriptions, inventories, credited bonus months and users with set-based
+        reads and applies the same rules as a single deposit in memory. Entries go
+        in with one unordered bulk insert; counters and balances are
+        compare-and-swapped per subscription, concurrently. The report has one
+        result per row in file order.
+        """
+        report: List[Dict[str, Any]] = []
+        try:
+            import_format = InvestmentImportService.detect_format(file, import_format)
+            batch_size = settings.IMPORTS.BATCH_SIZE
+            timings: Dict[str, float] = {}
+            started = stage_start = time.perf_counter()
+            rows_seen = 0
+
+            async for rows in InvestmentImportService.iter_row_batches(file, import_format, batch_size):
+                rows_seen += len(rows)
+                if rows_seen > settings.IMPORTS.MAX_ROWS:
+                    raise ImportFileError(f"Import exceeds {settings.IMPORTS.MAX_ROWS} rows; split the file")
+
+                batch_report: List[Dict[str, Any]] = []
+                try:
+                    await InvestmentImportService._import_batch(rows, current_admin, batch_report)
+                except LockTimeoutError:
+                    # Nothing of this batch was written; its rows can be resubmitted as they are
+                    reported = {result["row"] for result in batch_report}
+                    batch_report.extend(
+                        {"row": row_number, "status": "FAILED", "error": "Subscription busy with another deposit, retry this row"}
+                        for row_number, _ in rows if row_number not in reported
+                    )
+                report.extend(batch_report)
+            record_timing(timings, "total", stage_start)
+
+            report.sort(key=lambda result: result["row"])
+            created = sum(1 for result in report if result["status"] == "CREATED")
+            elapsed = time.perf_counter() - started
+            summary = {
+                "rows": len(report),
+                "created": created,
+                "failed": len(report) - created,
+                "elapsed_ms": timings["total"],
+                "rows_per_second": round(len(report) / elapsed, 1) if elapsed else None,
+            }
+            logger.info(f"Imported {file.filename} ({import_format}) for {current_admin['email']}: {summary}")
+
+            return {
+                "status": "success",
+                "status_code": 200,
+                "comment": f"Imported {created} of {len(report)} rows",
+                "data": {"summary": summary, "results": report},
+            }
+
+        except ImportFileError as e:
+            return {
+                "status": "error",
+                "status_code": 400,
+                "comment": str(e),
+                # Rows of earlier batches that were already imported, if any
+                "data": {"results": sorted(report, key=lambda result: result["row"])} if report else None,
+            }
+
+        except Exception as e:
+            logger.error(f"Error importing investment entries: {str(e)}")
+            return {
+                "status": "error",
+                "status_code": 500,
+                "comment": "Something went wrong",
+                "data": {"error": str(e), "results": sorted(report, key=lambda result: result["row"])},
+            }
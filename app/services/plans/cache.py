@@ -0,0 +1,69 @@
+import copy
+from typing import Any, Dict, List, Optional
+from app.db.mongo.mongodb import find_one, iter_many
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.cache import TTLCache
+from app.utils.pagination import PAGE_SORT
+
+logger = get_logger(__name__)
+
+_CATALOG_KEY = "active"
+
+
+class PlanCache:
+    """
+    Read-through cache for investment plans.
+    Plans are cached by uuid (any status), and the ACTIVE plans are cached as one
+    sorted catalog snapshot. PlanService invalidates both on every plan write;
+    other workers pick up the change when their TTL expires.
+    """
+
+    _plans = TTLCache("plans", settings.CACHE.PLAN_MAX_SIZE, settings.CACHE.PLAN_TTL_SECONDS)
+    _catalog = TTLCache("plans_catalog", 1, settings.CACHE.PLAN_TTL_SECONDS)
+
+    @staticmethod
+    async def get_plan(plan_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a plan by uuid, hitting Mongo only on a cache miss"""
+        plan = PlanCache._plans.get(plan_id)
+        if plan is None:
+            plan = await find_one(
+                collection=settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS,
+                query={"uuid": plan_id},
+                projection={"_id": 0}
+            )
+            if plan is None:
+                return None
+            PlanCache._plans.set(plan_id, plan)
+
+        # Callers get their own copy so they cannot mutate the cached document
+        return copy.deepcopy(plan)
+
+    @staticmethod
+    async def get_active_catalog() -> List[Dict[str, Any]]:
+        """All ACTIVE plans ordered by (created_at, uuid)"""
+        catalog = PlanCache._catalog.get(_CATALOG_KEY)
+        if catalog is None:
+            catalog = [
+                plan async for plan in iter_many(
+                    collection=settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS,
+                    query={"status": "ACTIVE"},
+                    sort=PAGE_SORT,
+                    projection={"_id": 0}
+                )
+            ]
+            PlanCache._catalog.set(_CATALOG_KEY, catalog)
+            for plan in catalog:
+                PlanCache._plans.set(plan["uuid"], plan)
+            logger.debug(f"Loaded {len(catalog)} active plans into the catalog cache")
+
+        return copy.deepcopy(catalog)
+
+    @staticmethod
+    def invalidate(plan_id: Optional[str] = None) -> None:
+        """Drop a plan (or every plan) and the active catalog snapshot"""
+        if plan_id is None:
+            PlanCache._plans.clear()
+        else:
+            PlanCache._plans.invalidate(plan_id)
+        PlanCache._catalog.invalidate(_CATALOG_KEY)
@@ -1,7 +1,9 @@
 from app.services.inventory.inventory import InventoryService
 from app.utils.common import generate_uuid
 from app.models.user import User
-from app.db.mongo.mongodb import find_many, find_one, insert_one, update_one
+from typing import Optional
+from app.db.mongo.mongodb import insert_one, update_and_return
+from app.services.plans.cache import PlanCache
 import time
 from icecream import ic
 from app.core.security import create_access_token
@@ -10,6 +12,7 @@ from app.models.investment import InvestmentPlan, UserInvestmentSubscription
 from app.models.inventory import InvestmentInventory
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.utils.pagination import InvalidCursorError, MissingSortKeyError, page_from_sorted
 
 logger = get_logger(__name__)
 
@@ -36,6 +39,7 @@ class PlanService:
             )
 
             await insert_one(collection=settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS, document=investment_plan.model_dump())
+            PlanCache.invalidate(investment_plan.uuid)
         
             return {
                 "status": "success",
@@ -54,15 +58,36 @@ class PlanService:
             }
         
     @staticmethod
-    async def get_investment_plans(current_admin: dict):
+    async def get_investment_plans(current_admin: dict, limit: int = settings.DB.DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
         try:
-            investment_plans = await find_many(collection=settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS, query={"status": "ACTIVE"}, projection={"_id": 0})
+            investment_plans, next_cursor = page_from_sorted(
+                await PlanCache.get_active_catalog(), limit, cursor
+            )
 
             return {
                 "status": "success",
                 "status_code": 200,
                 "comment": "Investment plans fetched successfully",
-                "data": investment_plans or []
+                "data": investment_plans or [],
+                "limit": limit,
+                "next_cursor": next_cursor
+            }
+
+        except InvalidCursorError as e:
+            return {
+                "status":"error",
+                "status_code": 400,
+                "comment": "Invalid cursor",
+                "data": str(e)
+            }
+
+        except MissingSortKeyError as e:
+            logger.error(f"Investment plan catalog cannot be paginated, error: {str(e)}")
+            return {
+                "status":"error",
+                "status_code": 500,
+                "comment": "Some records have no created_at, run the backfill_created_at migration",
+                "data": str(e)
             }
         
         except Exception as e:
@@ -77,9 +102,9 @@ class PlanService:
     @staticmethod
     async def get_plan_by_id(plan_id: str, current_admin: dict):
         try:
-            plan = await find_many(collection=settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS, query={"uuid": plan_id,"status": "ACTIVE"}, projection={"_id": 0})
+            plan = await PlanCache.get_plan(plan_id)
 
-            if not plan:
+            if not plan or plan.get("status") != "ACTIVE":
                 return {
                 "status": "error",
                 "status_code": 404,
@@ -91,7 +116,7 @@ class PlanService:
                 "status": "success",
                 "status_code": 200,
                 "comment": "Investment plan fetched successfully",
-                "data": plan
+                "data": [plan]
             }
         
         except Exception as e:
@@ -118,49 +143,28 @@ class PlanService:
                     "data":""
                 }
 
-            # Fetch current plan
-            plan = await find_one(
-                collection=settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS,
-                query={"uuid": plan_id},
-                projection={"_id": 0}
-            )
-
-            if not plan:
-                return {
-                    "status":"error",
-                    "status_code":404,
-                    "comment":"Investment plan not found",
-                    "data":""
-                }
-
-            # Add updated_by and updated_at
+            # Add updated_by (updated_at is set by the DB helper)
             update_data["metadata.last_updated_by"] = {"email": current_admin.get("email")}
-            update_data["updated_at"] = int(time.time())
 
             logger.info(f"Updating investment plan {plan_id} with data: {update_data}")
 
-            # Perform DB update
-            result = await update_one(
+            # Perform DB update and fetch the updated plan in one round trip
+            updated_plan = await update_and_return(
                 collection=settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS,
                 query={"uuid": plan_id},
-                update={"$set": update_data}
+                update={"$set": update_data},
+                projection={"_id": 0}
             )
+            PlanCache.invalidate(plan_id)
 
-            if not result.get("modified_count"):
+            if not updated_plan:
                 return {
                     "status":"error",
-                    "status_code":400,
-                    "comment":"No changes were made to the plan",
+                    "status_code":404,
+                    "comment":"Investment plan not found",
                     "data":""
                 }
 
-            # Fetch updated plan
-            updated_plan = await find_one(
-                collection=settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS,
-                query={"uuid": plan_id},
-                projection={"_id": 0}
-            )
-
             return {
                 "status":"success",
                 "status_code":200,
@@ -1,9 +1,10 @@
-import asyncio
 from datetime import datetime, timedelta
 from app.services.inventory.inventory import InventoryService
+from app.services.plans.cache import PlanCache
 from app.utils.common import generate_uuid
 from app.models.user import User
-from app.db.mongo.mongodb import find_many, find_one, insert_one, update_one
+from typing import Optional
+from app.db.mongo.mongodb import find_one, find_page, insert_one, iter_many, update_and_return, update_one
 import time
 from icecream import ic
 from app.core.security import create_access_token
@@ -12,7 +13,8 @@ from app.models.investment import InvestmentEntry, InvestmentPlan, UserInvestmen
 from app.models.inventory import InvestmentInventory
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.utils.email_service.email import SubscriptionEmailTemplate
+from app.utils.email_service.outbox import EmailOutbox
+from app.utils.pagination import InvalidCursorError, MissingSortKeyError
 
 logger = get_logger(__name__)
 
@@ -40,12 +42,8 @@ class SubscriptionService:
                 }
 
             # Validate plan
-            plan = await find_one(
-                collection=settings.DB_TABLE.AVAILABLE_INVESTMENT_PLANS,
-                query={"uuid": plan_id, "status": "ACTIVE"},
-                projection={"_id": 0}
-            )
-            if not plan:
+            plan = await PlanCache.get_plan(plan_id)
+            if not plan or plan.get("status") != "ACTIVE":
                 return {
                     "status": "error",
                     "status_code": 404,
@@ -80,17 +78,15 @@ class SubscriptionService:
             except Exception as e:
                 logger.error(f"Failed to create inventory for subscription {subscription.uuid}: {str(e)}")
 
-            # Send subscription confirmation email asynchronously
+            # Queue subscription confirmation email for the outbox workers
             try:
-                asyncio.create_task(
-                    SubscriptionEmailTemplate.send_subscription_created_email(
-                        user_email=user["email"],
-                        full_name=user.get("full_name", "User"),
-                        plan=plan
-                    )
-                )
+                await EmailOutbox.enqueue("subscription_created", {
+                    "user_email": user["email"],
+                    "full_name": user.get("full_name", "User"),
+                    "plan": plan
+                })
             except Exception as email_err:
-                logger.error(f"Failed to send subscription created email: {str(email_err)}")
+                logger.error(f"Failed to queue subscription created email: {str(email_err)}")
 
 
             return {
@@ -110,15 +106,69 @@ class SubscriptionService:
             }
 
     @staticmethod
-    async def get_user_subscription_transactions(user_id: str, subscription_id: str):
-        """Fetch all previous investments for a user's subscription"""
+    def _counter_filter(subscription_id: str, subscription: dict, installments_paid: int) -> dict:
+        if "installments_paid" in subscription:
+            return {"uuid": subscription_id, "installments_paid": installments_paid}
+        return {"uuid": subscription_id, "installments_paid": {"$exists": False}}
+
+    @staticmethod
+    async def claim_installment(
+        subscription_id: str,
+        subscription: dict,
+        installments_paid: int,
+        deposit_date: str,
+        deposit_ts: int,
+        count: int = 1
+    ) -> bool:
+        """
+        Advance the subscription's installment counter by count from the value the
+        caller validated against. Returns False if another deposit moved it first.
+        last_deposit_date only moves forward, so backdated entries leave it alone;
+        for several installments pass the latest deposit among them.
+        """
+        update = {"installments_paid": installments_paid + count}
+        if deposit_ts >= (subscription.get("last_deposit_ts") or 0):
+            update.update({"last_deposit_date": deposit_date, "last_deposit_ts": deposit_ts})
+
+        claimed = await update_and_return(
+            settings.DB_TABLE.SUBSCRIPTIONS,
+            SubscriptionService._counter_filter(subscription_id, subscription, installments_paid),
+            {"$set": update},
+            projection={"_id": 1},
+        )
+        return claimed is not None
+
+    @staticmethod
+    async def release_installment(subscription_id: str, subscription: dict, installments_paid: int, count: int = 1) -> None:
+        """Undo claim_installment after the entry insert or the balance update failed"""
+        restored = await update_one(
+            settings.DB_TABLE.SUBSCRIPTIONS,
+            {"uuid": subscription_id, "installments_paid": installments_paid + count},
+            {"$set": {
+                "installments_paid": installments_paid,
+                "last_deposit_date": subscription.get("last_deposit_date"),
+                "last_deposit_ts": subscription.get("last_deposit_ts"),
+            }},
+        )
+        if not restored:
+            logger.error(f"Could not release installments {installments_paid + 1}-{installments_paid + count} of subscription {subscription_id}; counter needs a recount")
+
+    @staticmethod
+    async def get_user_subscription_transactions(
+        user_id: str,
+        subscription_id: str,
+        limit: int = settings.DB.DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ):
+        """Fetch one page of previous investments for a user's subscription"""
         try:
-            entries = await find_many(
+            entries, next_cursor = await find_page(
                 collection=settings.DB_TABLE.INVESTMENT_ENTRIES,
-                query={"subscription_id": subscription_id},projection={"_id":0}
+                query={"subscription_id": subscription_id},
+                limit=limit, cursor=cursor, projection={"_id":0}
             )
 
-            if not entries:
+            if not entries and not cursor:
                 return {
                     "status": "error",
                     "status_code": 404,
@@ -131,6 +181,25 @@ class SubscriptionService:
                 "status_code": 200,
                 "comment": "Successfully fetched investment entries",
                 "data": entries,
+                "limit": limit,
+                "next_cursor": next_cursor,
+            }
+
+        except InvalidCursorError as e:
+            return {
+                "status": "error",
+                "status_code": 400,
+                "comment": "Invalid cursor",
+                "data": str(e),
+            }
+
+        except MissingSortKeyError as e:
+            logger.error(f"Investment entries for subscription-id: {subscription_id} cannot be paginated, error: {str(e)}")
+            return {
+                "status": "error",
+                "status_code": 500,
+                "comment": "Some records have no created_at, run the backfill_created_at migration",
+                "data": str(e),
             }
 
         except Exception as e:
@@ -146,15 +215,50 @@ class SubscriptionService:
             }
 
     @staticmethod
-    async def get_user_subscriptions(user_id: str,current_admin: dict):
+    def stream_user_subscription_transactions(user_id: str, subscription_id: str):
+        """Stream all investment entries for a user's subscription"""
+        return iter_many(
+            collection=settings.DB_TABLE.INVESTMENT_ENTRIES,
+            query={"subscription_id": subscription_id}, projection={"_id":0}
+        )
+
+    @staticmethod
+    async def get_user_subscriptions(
+        user_id: str,
+        current_admin: dict,
+        limit: int = settings.DB.DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ):
         try:
-            investment_plans = await find_many(collection=settings.DB_TABLE.SUBSCRIPTIONS, query={"user_id": user_id}, projection={"_id": 0})
+            investment_plans, next_cursor = await find_page(
+                collection=settings.DB_TABLE.SUBSCRIPTIONS, query={"user_id": user_id},
+                limit=limit, cursor=cursor, projection={"_id": 0}
+            )
 
             return {
                 "status": "success",
                 "status_code": 200,
                 "comment": "Investment plans fetched successfully",
-                "data": investment_plans or []
+                "data": investment_plans or [],
+                "limit": limit,
+                "next_cursor": next_cursor
+            }
+
+        except InvalidCursorError as e:
+            return {
+                "status":"error",
+                "status_code": 400,
+                "comment": "Invalid cursor",
+                "data": str(e)
+            }
+
+        except MissingSortKeyError as e:
+            logger.error(f"Subscriptions for user-id: {user_id} cannot be paginated, error: {str(e)}")
+            return {
+                "status":"error",
+                "status_code": 500,
+                "comment": "Some records have no created_at, run the backfill_created_at migration",
+                "data": str(e)
             }
         
         except Exception as e:
@@ -165,5 +269,8 @@ class SubscriptionService:
                 "comment": "something went wrong",
                 "data": str(e)
             }
-        
-    
\ No newline at end of file
+
+    @staticmethod
+    def stream_user_subscriptions(user_id: str, current_admin: dict):
+        """Stream all subscriptions of a user"""
+        return iter_many(collection=settings.DB_TABLE.SUBSCRIPTIONS, query={"user_id": user_id}, projection={"_id": 0})
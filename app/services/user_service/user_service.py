@@ -1,13 +1,14 @@
-import asyncio
 from app.utils.common import generate_uuid
 from app.models.user import User
-from app.db.mongo.mongodb import find_many, find_one, insert_one, update_one
+from typing import Optional
+from app.db.mongo.mongodb import find_one, find_page, insert_one, iter_many
 import time
 from icecream import ic
 from app.core.security import create_access_token
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.utils.email_service.email import UserEmailTemplate
+from app.utils.email_service.outbox import EmailOutbox
+from app.utils.pagination import InvalidCursorError, MissingSortKeyError
 
 logger = get_logger(__name__)
 
@@ -50,16 +51,14 @@ class UserService:
 
             await insert_one(collection=settings.DB_TABLE.USERS, document=user_document.model_dump())
 
-            # Send welcome email asynchronously
+            # Queue welcome email for the outbox workers
             try:
-                asyncio.create_task(
-                    UserEmailTemplate.send_account_created_email(
-                        user_email=request.email,
-                        full_name=request.full_name,
-                    )
-                )
+                await EmailOutbox.enqueue("account_created", {
+                    "user_email": request.email,
+                    "full_name": request.full_name,
+                })
             except Exception as email_err:
-                logger.error(f"Failed to send account creation email: {str(email_err)}")
+                logger.error(f"Failed to queue account creation email: {str(email_err)}")
 
             return {
                 "status":"success",
@@ -73,17 +72,17 @@ class UserService:
             logger.error(f"Error while creating user, error : {str(e)}")
             return {
                 "status":"error",
-                "status_code":400,
+                "status_code":500,
                 "comment": "Something went wrong",
                 "data": str(e)
             }
         
     @staticmethod
-    async def get_all_users(current_admin: dict):
+    async def get_all_users(current_admin: dict, limit: int = settings.DB.DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
         try:
-            users = await find_many(collection=settings.DB_TABLE.USERS, query={}, projection={"_id":0})
+            users, next_cursor = await find_page(collection=settings.DB_TABLE.USERS, query={}, limit=limit, cursor=cursor, projection={"_id":0})
 
-            if not users:
+            if not users and not cursor:
                 return {"status": "error",
                         "status_code": 400,
                         "comment": "No users found",
@@ -94,7 +93,26 @@ class UserService:
                 "status": "success",
                 "status_code": 200,
                 "comment": "Users fetched successfully",
-                "data": users
+                "data": users,
+                "limit": limit,
+                "next_cursor": next_cursor
+            }
+
+        except InvalidCursorError as e:
+            return {
+                "status":"error",
+                "status_code":400,
+                "comment": "Invalid cursor",
+                "data": str(e)
+            }
+
+        except MissingSortKeyError as e:
+            logger.error(f"Users cannot be paginated, error : {str(e)}")
+            return {
+                "status":"error",
+                "status_code":500,
+                "comment": "Some records have no created_at, run the backfill_created_at migration",
+                "data": str(e)
             }
         
         except Exception as e:
@@ -106,6 +124,11 @@ class UserService:
                 "data": str(e)
             }
         
+    @staticmethod
+    def stream_all_users(current_admin: dict):
+        """Stream every user as the cursor batches arrive, without the find_many cap"""
+        return iter_many(collection=settings.DB_TABLE.USERS, query={}, projection={"_id":0})
+
     @staticmethod
     async def get_user_by_id(user_id: str, current_admin: dict):
         try:
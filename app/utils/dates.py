@@ -0,0 +1,36 @@
+from datetime import date, datetime, timezone
+from typing import Dict
+
+# Format of every user-facing date string (plan_start_date, deposit_date)
+DATE_FORMAT = "%d-%m-%Y"
+
+
+def parse_date(value: str) -> date:
+    """
+    Parse a DD-MM-YYYY string.
+
+    Raises:
+        ValueError: If the value is not in DD-MM-YYYY format
+    """
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def year_month(value: date) -> int:
+    """Month bucket as a sortable integer, e.g. 202603 for March 2026"""
+    return value.year * 100 + value.month
+
+
+def deposit_date_fields(deposit_date: str) -> Dict[str, int]:
+    """
+    Queryable fields materialized from a deposit_date string: the month bucket
+    and the UTC-midnight epoch of the day, so lookups by month or date range
+    are index seeks instead of per-document string parsing.
+
+    Raises:
+        ValueError: If deposit_date is not in DD-MM-YYYY format
+    """
+    day = parse_date(deposit_date)
+    return {
+        "deposit_yyyymm": year_month(day),
+        "deposit_ts": int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()),
+    }
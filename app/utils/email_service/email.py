@@ -1,9 +1,9 @@
 import os
-import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.core.logging import get_logger
 from app.core.config import settings
+from app.utils.email_service.smtp_pool import smtp_pool
 
 logger = get_logger(__name__)
 
@@ -18,6 +18,7 @@ class EmailService:
     ):
         """
         Generic email sender for any purpose.
+        Failures are logged and re-raised so the outbox can retry them.
         """
         from_email = settings.SMTP.SMTP_FROM
         msg = MIMEMultipart("alternative")
@@ -30,17 +31,12 @@ class EmailService:
         msg.attach(MIMEText(html_content, "html"))
 
         try:
-            await aiosmtplib.send(
-                msg,
-                hostname=settings.SMTP.SMTP_HOST,
-                port=settings.SMTP.SMTP_PORT,
-                start_tls=True,
-                username=settings.SMTP.SMTP_USER,
-                password=settings.SMTP.SMTP_PASS,
-            )
+            # Reuses an authenticated session from the pool instead of a fresh TCP+TLS+AUTH handshake
+            await smtp_pool.send_message(msg)
             logger.info(f"✅ Email sent to {to_email}: {subject}")
         except Exception as e:
             logger.error(f"❌ Failed to send email to {to_email}: {str(e)}")
+            raise
 
 
 
@@ -76,6 +72,7 @@ class UserEmailTemplate:
             logger.info(f"✅ Sent account creation email to {user_email}")
         except Exception as e:
             logger.error(f"❌ Failed to send account creation email: {e}")
+            raise
 
 class SubscriptionEmailTemplate:
     """Handles all subscription-related emails."""
@@ -126,6 +123,7 @@ class SubscriptionEmailTemplate:
             logger.info(f"✅ Sent subscription created email to {user_email}")
         except Exception as e:
             logger.error(f"❌ Failed to send subscription created email: {e}")
+            raise
 
 class InvestmentConfirmationTemplate:
     @staticmethod
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.mongo.mongodb import insert_many, insert_one, update_and_return, update_many, update_one
+from app.utils.common import generate_uuid
+from app.utils.email_service.email import (
+    InvestmentConfirmationTemplate,
+    SubscriptionEmailTemplate,
+    UserEmailTemplate,
+)
+
+logger = get_logger(__name__)
+
+# Template name stored in the outbox -> coroutine that renders and sends it
+OUTBOX_TEMPLATES: Dict[str, Callable[..., Awaitable[None]]] = {
+    "account_created": UserEmailTemplate.send_account_created_email,
+    "subscription_created": SubscriptionEmailTemplate.send_subscription_created_email,
+    "investment_confirmation": InvestmentConfirmationTemplate.send_investment_confirmation,
+}
+
+
+class EmailOutbox:
+    """
+    Durable queue of outgoing emails backed by the EMAIL_OUTBOX collection.
+    Request handlers only enqueue; OutboxWorker delivers with retries.
+    """
+
+    _wakeup: Optional[asyncio.Event] = None
+
+    @staticmethod
+    async def _message(template: str, payload: Dict[str, Any], now: int) -> Dict[str, Any]:
+        if template not in OUTBOX_TEMPLATES:
+            raise ValueError(f"Unknown email template: {template}")
+
+        return {
+            "uuid": await generate_uuid(),
+            "template": template,
+            "payload": payload,
+            "status": "PENDING",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "locked_until": 0,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    @staticmethod
+    async def enqueue(template: str, payload: Dict[str, Any]) -> str:
+        """Persist an email for delivery and wake the workers"""
+        message = await EmailOutbox._message(template, payload, int(time.time()))
+        await insert_one(settings.DB_TABLE.EMAIL_OUTBOX, message)
+
+        if EmailOutbox._wakeup is not None:
+            EmailOutbox._wakeup.set()
+        return message["uuid"]
+
+    @staticmethod
+    async def enqueue_many(template: str, payloads: List[Dict[str, Any]]) -> int:
+        """Persist a batch of emails of one template in a single insert and wake the workers"""
+        if not payloads:
+            return 0
+
+        now = int(time.time())
+        messages = [await EmailOutbox._message(template, payload, now) for payload in payloads]
+        inserted = await insert_many(settings.DB_TABLE.EMAIL_OUTBOX, messages)
+
+        if EmailOutbox._wakeup is not None:
+            EmailOutbox._wakeup.set()
+        return inserted
+
+    @staticmethod
+    async def claim() -> Optional[Dict[str, Any]]:
+        """
+        Atomically lease the next due message.
+        Messages left in SENDING by a crashed worker become claimable once their lease
+        expires, unless they already used every attempt; those are failed instead, so a
+        message that crashes or hangs its worker is not retried forever.
+        """
+        now = int(time.time())
+        message = await update_and_return(
+            settings.DB_TABLE.EMAIL_OUTBOX,
+            {"$or": [
+                {"status": "PENDING", "next_attempt_at": {"$lte": now}},
+                {"status": "SENDING", "locked_until": {"$lt": now}, "attempts": {"$lt": settings.OUTBOX.MAX_ATTEMPTS}},
+            ]},
+            {
+                "$set": {"status": "SENDING", "locked_until": now + settings.OUTBOX.LEASE_SECONDS},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", 1)],
+        )
+        if message is None:
+            await EmailOutbox.fail_abandoned(now)
+        return message
+
+    @staticmethod
+    async def fail_abandoned(now: int) -> int:
+        """Fail messages whose last allowed attempt never reported back before its lease expired"""
+        failed = await update_many(
+            settings.DB_TABLE.EMAIL_OUTBOX,
+            {"status": "SENDING", "locked_until": {"$lt": now}, "attempts": {"$gte": settings.OUTBOX.MAX_ATTEMPTS}},
+            {"$set": {"status": "FAILED", "last_error": "Lease expired on the last attempt"}},
+        )
+        if failed:
+            logger.error(f"Gave up on {failed} emails whose last attempt never finished")
+        return failed
+
+    @staticmethod
+    def _lease_filter(message: Dict[str, Any]) -> Dict[str, Any]:
+        # A worker whose lease expired must not overwrite the outcome of the next holder
+        return {"uuid": message["uuid"], "status": "SENDING", "locked_until": message["locked_until"]}
+
+    @staticmethod
+    async def mark_sent(message: Dict[str, Any]) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.OUTBOX.RETENTION_DAYS)
+        updated = await update_one(
+            settings.DB_TABLE.EMAIL_OUTBOX,
+            EmailOutbox._lease_filter(message),
+            {"$set": {"status": "SENT", "last_error": None, "expires_at": expires_at}},
+        )
+        if not updated:
+            logger.warning(f"Email {message['uuid']} was sent after its lease expired; another worker may send it again")
+
+    @staticmethod
+    async def mark_failed(message: Dict[str, Any], error: str) -> None:
+        """Schedule a retry with exponential backoff, or give up after MAX_ATTEMPTS"""
+        attempts = message["attempts"]
+        if attempts >= settings.OUTBOX.MAX_ATTEMPTS:
+            logger.error(f"Giving up on email {message['uuid']} ({message['template']}) after {attempts} attempts: {error}")
+            update = {"status": "FAILED", "last_error": error}
+        else:
+            delay = min(settings.OUTBOX.BASE_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.OUTBOX.MAX_BACKOFF_SECONDS)
+            logger.warning(f"Email {message['uuid']} ({message['template']}) failed, retrying in {delay}s: {error}")
+            update = {"status": "PENDING", "next_attempt_at": int(time.time()) + delay, "last_error": error}
+
+        updated = await update_one(settings.DB_TABLE.EMAIL_OUTBOX, EmailOutbox._lease_filter(message), {"$set": update})
+        if not updated:
+            logger.warning(f"Lease on email {message['uuid']} expired before its failure was recorded; leaving it to the current holder")
+
+
+class OutboxWorker:
+    """In-process pool of workers draining the email outbox, started from the application lifespan"""
+
+    _tasks: List[asyncio.Task] = []
+
+    @staticmethod
+    async def deliver(message: Dict[str, Any]) -> None:
+        try:
+            send = OUTBOX_TEMPLATES[message["template"]]
+            await asyncio.wait_for(send(**message["payload"]), timeout=settings.OUTBOX.SEND_TIMEOUT_SECONDS)
+        except Exception as e:
+            await EmailOutbox.mark_failed(message, str(e) or type(e).__name__)
+        else:
+            await EmailOutbox.mark_sent(message)
+
+    @staticmethod
+    async def _run(worker_id: int) -> None:
+        wakeup = EmailOutbox._wakeup
+        while True:
+            try:
+                # Clear before claiming so an enqueue racing with an empty claim still wakes us
+                wakeup.clear()
+                message = await EmailOutbox.claim()
+                if message is None:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout=settings.OUTBOX.POLL_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await OutboxWorker.deliver(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker {worker_id} error: {str(e)}")
+                await asyncio.sleep(settings.OUTBOX.POLL_INTERVAL_SECONDS)
+
+    @staticmethod
+    def start() -> None:
+        if OutboxWorker._tasks:
+            return
+        EmailOutbox._wakeup = asyncio.Event()
+        OutboxWorker._tasks = [
+            asyncio.create_task(OutboxWorker._run(worker_id), name=f"email-outbox-{worker_id}")
+            for worker_id in range(settings.OUTBOX.WORKERS)
+        ]
+        logger.info(f"Started {settings.OUTBOX.WORKERS} email outbox workers")
+
+    @staticmethod
+    async def stop() -> None:
+        """Cancel the workers; an interrupted send is retried by whoever claims it after the lease"""
+        tasks, OutboxWorker._tasks = OutboxWorker._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        EmailOutbox._wakeup = None
+        logger.info("Email outbox workers stopped")
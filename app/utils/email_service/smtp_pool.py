@@ -0,0 +1,168 @@
+import asyncio
+import time
+from email.message import Message
+from typing import Any, Dict, List, Optional
+import aiosmtplib
+from aiosmtplib import SMTPServerDisconnected
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class _PooledConnection:
+    __slots__ = ("client", "last_used")
+
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated, persistent SMTP sessions.
+    Idle sessions are reused LIFO; a session idle longer than health_check_after
+    is probed with NOOP, one idle longer than idle_timeout is closed. A send that
+    hits a dropped session is retried once on a newly opened connection; the other
+    idle sessions are dropped as well, since a server restart or a network
+    failure kills them all at once and they are not probed when recently used.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        start_tls: bool = True,
+        max_size: int = 4,
+        idle_timeout: float = 60,
+        health_check_after: float = 10,
+        timeout: float = 30,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._idle: List[_PooledConnection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.connections_discarded = 0
+
+    @classmethod
+    def from_settings(cls) -> "SMTPConnectionPool":
+        return cls(
+            hostname=settings.SMTP.SMTP_HOST,
+            port=settings.SMTP.SMTP_PORT,
+            username=settings.SMTP.SMTP_USER,
+            password=settings.SMTP.SMTP_PASS,
+            start_tls=settings.SMTP.SMTP_START_TLS,
+            max_size=settings.SMTP.SMTP_POOL_SIZE,
+            idle_timeout=settings.SMTP.SMTP_IDLE_TIMEOUT_SECONDS,
+            health_check_after=settings.SMTP.SMTP_HEALTH_CHECK_AFTER_SECONDS,
+            timeout=settings.SMTP.SMTP_TIMEOUT_SECONDS,
+        )
+
+    async def _open(self) -> _PooledConnection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        # connect() also runs STARTTLS and AUTH when configured
+        await client.connect()
+        self.connections_opened += 1
+        return _PooledConnection(client)
+
+    async def _discard(self, connection: _PooledConnection) -> None:
+        self.connections_discarded += 1
+        try:
+            if connection.client.is_connected:
+                await connection.client.quit()
+        except Exception:
+            connection.client.close()
+
+    def _drop(self, connection: _PooledConnection) -> None:
+        """Close without the QUIT round trip"""
+        self.connections_discarded += 1
+        connection.client.close()
+
+    async def _acquire(self) -> _PooledConnection:
+        while self._idle:
+            connection = self._idle.pop()
+            idle_for = time.monotonic() - connection.last_used
+
+            if idle_for > self.idle_timeout or not connection.client.is_connected:
+                await self._discard(connection)
+                continue
+
+            if idle_for > self.health_check_after:
+                try:
+                    await connection.client.noop()
+                except Exception:
+                    await self._discard(connection)
+                    continue
+
+            self.connections_reused += 1
+            return connection
+
+        return await self._open()
+
+    async def _release(self, connection: _PooledConnection) -> None:
+        connection.last_used = time.monotonic()
+        self._idle.append(connection)
+
+        # Close whatever has gone stale at the bottom of the stack
+        now = time.monotonic()
+        while self._idle and now - self._idle[0].last_used > self.idle_timeout:
+            await self._discard(self._idle.pop(0))
+
+    async def send_message(self, message: Message) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_size)
+
+        async with self._semaphore:
+            for attempt in (1, 2):
+                connection = await self._acquire() if attempt == 1 else await self._open()
+                try:
+                    await connection.client.send_message(message)
+                except (SMTPServerDisconnected, ConnectionError) as e:
+                    self._drop(connection)
+                    if attempt == 2:
+                        raise
+                    idle, self._idle = self._idle, []
+                    for stale in idle:
+                        self._drop(stale)
+                    logger.info(f"SMTP session dropped ({str(e)}), dropped {len(idle)} idle sessions and reconnecting")
+                except BaseException:
+                    # Session state is unknown after a failed or cancelled transaction, do not reuse it
+                    self._drop(connection)
+                    raise
+                else:
+                    await self._release(connection)
+                    return
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._discard(connection) for connection in idle), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_size": self.max_size,
+            "idle": len(self._idle),
+            "opened": self.connections_opened,
+            "reused": self.connections_reused,
+            "discarded": self.connections_discarded,
+        }
+
+
+smtp_pool = SMTPConnectionPool.from_settings()
@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import BrokenExecutor, Executor, Future
+from typing import Any, Callable, Dict, Optional
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised instead of queueing when a BoundedExecutor is already at capacity"""
+
+
+class BoundedExecutor:
+    """
+    Size-limited pool for CPU-bound work that must stay off the event loop.
+    At most max_workers jobs run and max_queue jobs wait; anything beyond that
+    is rejected immediately with ExecutorSaturatedError.
+
+    A job stays in flight until the pool finishes it, even when the task awaiting
+    it is cancelled, so the bound reflects the work the pool is really doing.
+    """
+
+    def __init__(self, name: str, executor_factory: Callable[[int], Executor], max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor_factory = executor_factory
+        self._executor: Optional[Executor] = None
+        # Jobs finish on pool threads, so the counters are guarded by a lock
+        self._counter_lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._executor_factory(self.max_workers)
+        return self._executor
+
+    def _job_done(self, future: Future) -> None:
+        with self._counter_lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self._counter_lock:
+            saturated = self._in_flight >= self.max_workers + self.max_queue
+            if saturated:
+                self.rejected += 1
+            else:
+                self._in_flight += 1
+        if saturated:
+            logger.warning(f"{self.name} executor saturated ({self._in_flight} jobs in flight), rejecting")
+            raise ExecutorSaturatedError(f"{self.name} executor is saturated")
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException as err:
+            with self._counter_lock:
+                self._in_flight -= 1
+                self.failed += 1
+            if isinstance(err, BrokenExecutor):
+                self._discard(executor)
+            raise
+        # Counted when the pool finishes the job, not when the awaiting task gives up
+        future.add_done_callback(self._job_done)
+
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenExecutor:
+            self._discard(executor)
+            raise
+
+    def _discard(self, executor: Executor) -> None:
+        """
+        Drop a pool whose worker process died so the next job starts a fresh one.
+        Only the pool the failed job ran on: if another caller already replaced it,
+        the replacement and the jobs queued on it are left alone.
+        """
+        if self._executor is not executor:
+            return
+        logger.error(f"{self.name} executor is broken, recreating it")
+        self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
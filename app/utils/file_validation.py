@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional, Tuple
+
+# Leading bytes of each supported format. PDF readers accept the header anywhere
+# in the first KiB, so it is searched for rather than matched at offset 0.
+SIGNATURES: Dict[str, List[bytes]] = {
+    ".pdf": [b"%PDF-"],
+    ".jpg": [b"\xff\xd8\xff"],
+    ".jpeg": [b"\xff\xd8\xff"],
+    ".png": [b"\x89PNG\r\n\x1a\n"],
+}
+
+CONTENT_TYPES: Dict[str, str] = {
+    ".pdf": "application/pdf",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+}
+
+SNIFF_BYTES = 1024
+
+
+class FileValidationError(ValueError):
+    """Raised when uploaded content does not match its extension or exceeds the size limit"""
+
+
+def matches_signature(head: bytes, extension: str) -> bool:
+    """Whether the first bytes of a file are valid for its extension; unknown extensions always match"""
+    signatures = SIGNATURES.get(extension.lower())
+    if not signatures:
+        return True
+    if extension.lower() == ".pdf":
+        return any(signature in head[:SNIFF_BYTES] for signature in signatures)
+    return any(head.startswith(signature) for signature in signatures)
+
+
+def content_type_for(extension: str) -> Optional[str]:
+    return CONTENT_TYPES.get(extension.lower())
+
+
+class StreamingValidator:
+    """
+    Validates a file while it is read chunk by chunk.
+    The signature is checked as soon as the first SNIFF_BYTES have arrived and the
+    size limit as each chunk arrives, so bad files are rejected without reading the rest.
+    """
+
+    def __init__(self, extension: str, max_size: int):
+        self.extension = extension.lower()
+        self.max_size = max_size
+        self.size = 0
+        self._head = b""
+        self._signature_checked = False
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise FileValidationError(
+                f"File size exceeds {self.max_size / (1024 * 1024):.0f}MB limit"
+            )
+
+        if not self._signature_checked:
+            self._head += chunk[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._check_signature()
+
+    def finish(self) -> Tuple[int, Optional[str]]:
+        """Final checks once the stream is exhausted; returns the size and the content type to store with"""
+        if self.size == 0:
+            raise FileValidationError("File is empty")
+        if not self._signature_checked:
+            self._check_signature()
+        return self.size, content_type_for(self.extension)
+
+    def _check_signature(self) -> None:
+        self._signature_checked = True
+        if not matches_signature(self._head, self.extension):
+            raise FileValidationError(f"File content does not match its '{self.extension}' extension")
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.mongo.mongodb import delete_one, find_one, insert_one, update_and_return, update_one
+from app.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+STATUS_IN_PROGRESS = "IN_PROGRESS"
+STATUS_COMPLETED = "COMPLETED"
+
+# Failures that are final for this request body: validation errors and missing references.
+# Anything else that is not a success (lock busy, rate limited, unexpected server errors)
+# may succeed on a retry, so its claim is released instead of storing the response.
+FINAL_ERROR_STATUS_CODES = {400, 404, 422}
+
+# Completed responses by scoped key, so a retry hitting the same worker skips Mongo
+_completed_responses = TTLCache(
+    "idempotency_responses",
+    maxsize=settings.IDEMPOTENCY.CACHE_MAX_SIZE,
+    ttl_seconds=settings.IDEMPOTENCY.CACHE_TTL_SECONDS,
+)
+
+
+def _error(status_code: int, comment: str) -> Dict[str, Any]:
+    return {"status": "error", "status_code": status_code, "comment": comment, "data": None}
+
+
+def _fingerprint(endpoint: str, payload: BaseModel) -> str:
+    """SHA-256 of the endpoint and the canonical JSON of the request body"""
+    body = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{endpoint}\n{body}".encode()).hexdigest()
+
+
+def _is_final(result: Any) -> bool:
+    """Whether a response may be stored and replayed to every retry"""
+    if not isinstance(result, dict) or not isinstance(result.get("status_code"), int):
+        return False
+    status_code = result["status_code"]
+    if result.get("status") == "success":
+        return 200 <= status_code < 300
+    return status_code in FINAL_ERROR_STATUS_CODES
+
+
+class IdempotencyStore:
+    """
+    Replays the stored response of a write endpoint when a client retries it
+    with the same Idempotency-Key header.
+
+    The first request claims the key with an IN_PROGRESS record (the _id unique
+    index makes the claim atomic across workers), runs the operation and stores
+    its response. Retries are answered from the in-process cache or one _id
+    lookup and never run the operation again. Keys are scoped per endpoint and
+    admin, and reusing a key with a different body is rejected. Records are
+    purged by the TTL index after RETENTION_HOURS.
+    """
+
+    @staticmethod
+    def _replay(record: Dict[str, Any], fingerprint: str, response: Optional[Response]) -> Dict[str, Any]:
+        if record["fingerprint"] != fingerprint:
+            return _error(422, f"{IDEMPOTENCY_HEADER} was already used with a different request")
+        if record["status"] != STATUS_COMPLETED:
+            return _error(409, f"A request with this {IDEMPOTENCY_HEADER} is still being processed")
+
+        if response is not None:
+            response.headers[REPLAYED_HEADER] = "true"
+        return record["response"]
+
+    @staticmethod
+    async def _claim(scoped_key: str, fingerprint: str, owner: str, stale: bool) -> bool:
+        now = int(time.time())
+        locked_until = now + settings.IDEMPOTENCY.IN_PROGRESS_LEASE_SECONDS
+        if stale:
+            # Take over a claim whose worker died before storing a response
+            record = await update_and_return(
+                settings.DB_TABLE.IDEMPOTENCY_KEYS,
+                {"_id": scoped_key, "status": STATUS_IN_PROGRESS, "locked_until": {"$lt": now}},
+                {"$set": {"fingerprint": fingerprint, "owner": owner, "locked_until": locked_until}},
+                projection={"_id": 1},
+            )
+            return record is not None
+
+        try:
+            await insert_one(settings.DB_TABLE.IDEMPOTENCY_KEYS, {
+                "_id": scoped_key,
+                "fingerprint": fingerprint,
+                "status": STATUS_IN_PROGRESS,
+                "owner": owner,
+                "locked_until": locked_until,
+                "created_at": now,
+                "expires_at": datetime.now(timezone.utc) + timedelta(hours=settings.IDEMPOTENCY.RETENTION_HOURS),
+            })
+            return True
+        except DuplicateKeyError:
+            return False
+
+    @staticmethod
+    async def run(
+        endpoint: str,
+        idempotency_key: Optional[str],
+        current_admin: dict,
+        payload: BaseModel,
+        operation: Callable[[], Awaitable[Any]],
+        response: Optional[Response] = None,
+    ) -> Any:
+        """
+        Run operation at most once per idempotency key and return its response.
+        Without a key the operation simply runs.
+        """
+        if idempotency_key is None:
+            return await operation()
+
+        if not idempotency_key or len(idempotency_key) > settings.IDEMPOTENCY.MAX_KEY_LENGTH:
+            return _error(400, f"{IDEMPOTENCY_HEADER} must be 1 to {settings.IDEMPOTENCY.MAX_KEY_LENGTH} characters")
+
+        scoped_key = f"{endpoint}:{current_admin.get('uuid') or current_admin.get('email')}:{idempotency_key}"
+        fingerprint = _fingerprint(endpoint, payload)
+
+        cached = _completed_responses.get(scoped_key)
+        if cached is not None:
+            return IdempotencyStore._replay(cached, fingerprint, response)
+
+        record = await find_one(settings.DB_TABLE.IDEMPOTENCY_KEYS, {"_id": scoped_key})
+        stale = record is not None and record["status"] == STATUS_IN_PROGRESS \
+            and record["locked_until"] < int(time.time())
+
+        owner = uuid.uuid4().hex
+        if record is None or stale:
+            if await IdempotencyStore._claim(scoped_key, fingerprint, owner, stale):
+                return await IdempotencyStore._execute(scoped_key, fingerprint, owner, operation)
+            # Another worker claimed it first
+            record = await find_one(settings.DB_TABLE.IDEMPOTENCY_KEYS, {"_id": scoped_key})
+            if record is None:
+                return _error(409, f"A request with this {IDEMPOTENCY_HEADER} is still being processed")
+
+        if record["status"] == STATUS_COMPLETED:
+            _completed_responses.set(scoped_key, record)
+        return IdempotencyStore._replay(record, fingerprint, response)
+
+    @staticmethod
+    async def _execute(scoped_key: str, fingerprint: str, owner: str, operation: Callable[[], Awaitable[Any]]) -> Any:
+        claim = {"_id": scoped_key, "owner": owner}
+        try:
+            result = jsonable_encoder(await operation())
+        except Exception:
+            await IdempotencyStore._release(claim)
+            raise
+
+        if not _is_final(result):
+            await IdempotencyStore._release(claim)
+            return result
+
+        try:
+            await update_one(
+                settings.DB_TABLE.IDEMPOTENCY_KEYS,
+                claim,
+                {"$set": {"status": STATUS_COMPLETED, "response": result}, "$unset": {"locked_until": ""}},
+            )
+            _completed_responses.set(scoped_key, {"fingerprint": fingerprint, "status": STATUS_COMPLETED, "response": result})
+        except Exception as store_err:
+            # Retries get 409 until the claim lease runs out, after which they run the operation again
+            logger.error(f"Failed to store response for idempotency key {scoped_key}: {store_err}")
+        return result
+
+    @staticmethod
+    async def _release(claim: Dict[str, Any]) -> None:
+        try:
+            await delete_one(settings.DB_TABLE.IDEMPOTENCY_KEYS, claim)
+        except Exception as release_err:
+            logger.error(f"Failed to release idempotency key {claim['_id']}, it is freed after the lease: {release_err}")
@@ -0,0 +1,181 @@
+import asyncio
+import random
+import time
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Hashable, Iterable, Optional
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.mongo.mongodb import delete_one, update_and_return
+
+logger = get_logger(__name__)
+
+# Every lock manager registers itself here so its counters can be exposed in one place
+_LOCK_MANAGERS: Dict[str, "KeyedLockManager"] = {}
+
+
+class LockTimeoutError(TimeoutError):
+    """Raised when a keyed lock could not be acquired within the timeout"""
+
+
+@dataclass
+class _KeyedLock:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Holders plus waiters; the entry is dropped when this falls to zero
+    refs: int = 0
+
+
+class KeyedLockManager:
+    """
+    One asyncio.Lock per key, created on first use and dropped once nobody holds
+    or waits for it. Callers on different keys never contend, callers on the same
+    key queue in FIFO order. Only serializes within this worker process.
+    """
+
+    def __init__(self, name: str, timeout_seconds: Optional[float] = None):
+        self.name = name
+        self.timeout_seconds = timeout_seconds if timeout_seconds is not None else settings.LOCKS.ACQUIRE_TIMEOUT_SECONDS
+        self._locks: Dict[Hashable, _KeyedLock] = {}
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        _LOCK_MANAGERS[name] = self
+
+    @asynccontextmanager
+    async def _local(self, key: Hashable, deadline: float) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = _KeyedLock()
+        entry.refs += 1
+
+        try:
+            if entry.lock.locked():
+                self.contended += 1
+            try:
+                await asyncio.wait_for(entry.lock.acquire(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise LockTimeoutError(f"Timed out waiting for {self.name} lock on {key}")
+
+            try:
+                yield
+            finally:
+                entry.lock.release()
+        finally:
+            entry.refs -= 1
+            if entry.refs == 0:
+                del self._locks[key]
+
+    @asynccontextmanager
+    async def lock(self, key: Hashable, timeout_seconds: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold the lock for key for the duration of the block.
+
+        Raises:
+            LockTimeoutError: If the lock is not acquired within the timeout
+        """
+        timeout = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+        async with self._local(key, time.monotonic() + timeout):
+            self.acquired += 1
+            yield
+
+    @asynccontextmanager
+    async def lock_many(self, keys: Iterable[Hashable], timeout_seconds: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold the locks of several keys at once.
+        Keys are taken in sorted order, so two callers locking overlapping sets
+        cannot deadlock; the timeout applies to each key.
+
+        Raises:
+            LockTimeoutError: If any lock is not acquired within the timeout
+        """
+        async with AsyncExitStack() as stack:
+            for key in sorted(set(keys)):
+                await stack.enter_async_context(self.lock(key, timeout_seconds))
+            yield
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "held_or_awaited": len(self._locks),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "timeouts": self.timeouts,
+        }
+
+
+class MongoLeaseLockManager(KeyedLockManager):
+    """
+    Keyed locks shared by every worker through lease documents in the locks collection.
+
+    Same-worker callers first queue on the in-process lock, so only one request per
+    key and worker polls Mongo. The lease is taken with an upsert that only matches
+    an expired lease, so a live lease makes the insert fail on the _id unique index.
+    Leases expire after LEASE_SECONDS, which bounds how long a crashed worker can
+    block a key; critical sections must be shorter than that.
+    """
+
+    def __init__(self, name: str, timeout_seconds: Optional[float] = None, lease_seconds: Optional[float] = None):
+        super().__init__(name, timeout_seconds)
+        self.lease_seconds = lease_seconds or settings.LOCKS.LEASE_SECONDS
+        self.lease_polls = 0
+
+    async def _try_lease(self, lease_id: str, owner: str) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await update_and_return(
+                settings.DB_TABLE.LOCKS,
+                {"_id": lease_id, "expires_at": {"$lt": now}},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=self.lease_seconds)}},
+                projection={"_id": 1},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    @asynccontextmanager
+    async def lock(self, key: Hashable, timeout_seconds: Optional[float] = None) -> AsyncIterator[None]:
+        timeout = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+        deadline = time.monotonic() + timeout
+        lease_id = f"{self.name}:{key}"
+        owner = uuid.uuid4().hex
+
+        async with self._local(key, deadline):
+            delay = settings.LOCKS.RETRY_INTERVAL_MS / 1000
+            while not await self._try_lease(lease_id, owner):
+                self.lease_polls += 1
+                if time.monotonic() + delay > deadline:
+                    self.timeouts += 1
+                    raise LockTimeoutError(f"Timed out waiting for {self.name} lease on {key}")
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, settings.LOCKS.MAX_RETRY_INTERVAL_MS / 1000)
+
+            self.acquired += 1
+            try:
+                yield
+            finally:
+                # Only our own lease is removed; an expired one may already belong to someone else
+                try:
+                    await delete_one(settings.DB_TABLE.LOCKS, {"_id": lease_id, "owner": owner})
+                except Exception as release_err:
+                    logger.error(f"Failed to release {lease_id}, it expires on its own: {release_err}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "backend": "mongo", "lease_polls": self.lease_polls}
+
+
+def get_lock_manager(name: str) -> KeyedLockManager:
+    """Lock manager for the configured backend (settings.LOCKS.BACKEND)"""
+    if settings.LOCKS.BACKEND == "mongo":
+        return MongoLeaseLockManager(name)
+    return KeyedLockManager(name)
+
+
+def lock_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters for every registered lock manager"""
+    return {name: manager.stats() for name, manager in _LOCK_MANAGERS.items()}
@@ -0,0 +1,116 @@
+import base64
+import functools
+import hashlib
+import hmac
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+# Keyset sort order shared by every paginated listing, backed by (..., created_at, uuid) indexes
+PAGE_SORT = [("created_at", 1), ("uuid", 1)]
+
+# Context for deriving the cursor key, so cursors and access tokens never share a signing key
+CURSOR_KEY_CONTEXT = b"goldvault:pagination-cursor:v1"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a continuation token is malformed or its signature does not match"""
+
+
+class MissingSortKeyError(ValueError):
+    """Raised when a document has no created_at, so its page position cannot be encoded"""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+@functools.lru_cache(maxsize=1)
+def _cursor_key() -> bytes:
+    return hmac.new(settings.JWT.SECRET_KEY.encode(), CURSOR_KEY_CONTEXT, hashlib.sha256).digest()
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_cursor_key(), payload, hashlib.sha256).digest()[:16]
+
+
+def _sort_key(document: Dict[str, Any]) -> Tuple[int, str]:
+    """
+    The (created_at, uuid) position of a document in PAGE_SORT.
+
+    Raises:
+        MissingSortKeyError: If the document has no created_at; the backfill_created_at
+            migration sets it on documents written before it was recorded
+    """
+    created_at = document.get("created_at")
+    if created_at is None:
+        raise MissingSortKeyError(f"Document {document.get('uuid')} has no created_at and cannot be paginated")
+    return created_at, document["uuid"]
+
+
+def encode_cursor(document: Dict[str, Any]) -> str:
+    """Build an opaque, signed continuation token from the last document of a page"""
+    payload = json.dumps(list(_sort_key(document)), separators=(",", ":")).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(token: str) -> Tuple[int, str]:
+    """
+    Verify and decode a continuation token.
+
+    Raises:
+        InvalidCursorError: If the token was not issued by this service
+    """
+    try:
+        payload_part, signature_part = token.split(".", 1)
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Malformed cursor")
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise InvalidCursorError("Cursor signature mismatch")
+
+    try:
+        created_at, uuid = json.loads(payload)
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Malformed cursor")
+    return created_at, uuid
+
+
+def keyset_query(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """Restrict a query to the documents that sort after the given cursor"""
+    if not cursor:
+        return query
+
+    created_at, uuid = decode_cursor(cursor)
+    after_cursor = {
+        "$or": [
+            {"created_at": {"$gt": created_at}},
+            {"created_at": created_at, "uuid": {"$gt": uuid}},
+        ]
+    }
+    return {"$and": [query, after_cursor]} if query else after_cursor
+
+
+def page_from_sorted(documents: List[Dict[str, Any]], limit: int, cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Apply keyset pagination to an in-memory list already ordered by PAGE_SORT.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or tampered with
+        MissingSortKeyError: If a document the page depends on has no created_at
+    """
+    if cursor:
+        after = decode_cursor(cursor)
+        documents = [doc for doc in documents if _sort_key(doc) > after]
+
+    if len(documents) <= limit:
+        return documents, None
+
+    documents = documents[:limit]
+    return documents, encode_cursor(documents[-1])
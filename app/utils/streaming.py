@@ -0,0 +1,43 @@
+import json
+from typing import Any, AsyncIterator, Dict, Literal
+from fastapi.responses import StreamingResponse
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+StreamFormat = Literal["ndjson", "json"]
+
+
+def _dumps(document: Dict[str, Any]) -> str:
+    return json.dumps(document, default=str)
+
+
+async def ndjson_lines(documents: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """One JSON document per line"""
+    try:
+        async for document in documents:
+            yield _dumps(document) + "\n"
+    except Exception as e:
+        logger.error(f"Error while streaming documents: {str(e)}")
+        raise
+
+
+async def json_array_chunks(documents: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """A single JSON array, emitted one element at a time"""
+    yield "["
+    first = True
+    try:
+        async for document in documents:
+            yield ("" if first else ",") + _dumps(document)
+            first = False
+    except Exception as e:
+        logger.error(f"Error while streaming documents: {str(e)}")
+        raise
+    yield "]"
+
+
+def streaming_response(documents: AsyncIterator[Dict[str, Any]], stream_format: StreamFormat) -> StreamingResponse:
+    """Wrap a document iterator in a chunked StreamingResponse"""
+    if stream_format == "ndjson":
+        return StreamingResponse(ndjson_lines(documents), media_type="application/x-ndjson")
+    return StreamingResponse(json_array_chunks(documents), media_type="application/json")
@@ -0,0 +1,9 @@
+import time
+from typing import Dict
+
+
+def record_timing(timings: Dict[str, float], stage: str, stage_start: float) -> float:
+    """Store the milliseconds since stage_start under stage and return the start of the next stage"""
+    now = time.perf_counter()
+    timings[stage] = round((now - stage_start) * 1000, 2)
+    return now
@@ -14,8 +14,13 @@ from app.db.mongo.mongodb import (
     initialize_collections,
     get_database, 
 )
-from app.core.security import create_access_token
+from app.core.security import create_access_token, password_hasher
 from app.api.v1 import router as v1_router
+from app.utils.email_service.outbox import OutboxWorker
+from app.utils.email_service.smtp_pool import smtp_pool
+from app.services.common.utils.storage.storage import close_storage, start_storage
+from app.services.common.utils.images.pipeline import ImagePipeline
+from app.core.middleware import BodySizeLimitMiddleware
 
 # Set up logging
 setup_logging()
@@ -42,6 +47,12 @@ async def lifespan(app: FastAPI):
         # Let the exception propagate to prevent app startup if DB connection fails
         raise
 
+    # Start the email outbox workers (pending emails survive restarts)
+    OutboxWorker.start()
+
+    # Open the storage backend (shared S3 client or local root directory)
+    await start_storage()
+
    
     
     # Add any other startup tasks here:
@@ -59,11 +70,27 @@ async def lifespan(app: FastAPI):
     # ----- SHUTDOWN SECTION -----
     logger.info("Application shutting down...")
     
+    # Stop the email outbox workers before the database goes away
+    await OutboxWorker.stop()
+
+    # Close pooled SMTP sessions
+    await smtp_pool.close()
+
+    # Close the storage backend
+    try:
+        await close_storage()
+    except Exception as e:
+        logger.error(f"Error during storage shutdown: {str(e)}")
+
     # Close MongoDB connection
     try:
         await close_mongodb_connection()
     except Exception as e:
         logger.error(f"Error during MongoDB shutdown: {str(e)}")
+
+    # Stop the password hashing and image processing pools
+    password_hasher.shutdown()
+    ImagePipeline.shutdown()
     
     # Add any other cleanup tasks here:
     # - Close Redis connections
@@ -84,6 +111,17 @@ app = FastAPI(
     lifespan=lifespan  # This handles all startup/shutdown processes
 )
 
+# Refuse oversized bodies before they are spooled; single-file uploads get the per-file limit
+upload_path_limits = {}
+if settings.S3_CREDENTIALS.MAX_FILE_SIZE_MB:
+    # Leave room for the multipart envelope around the file
+    upload_path_limits["/v1/upload/file/"] = int(settings.S3_CREDENTIALS.MAX_FILE_SIZE_MB) * 1024 * 1024 + 64 * 1024
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=settings.SERVER.MAX_REQUEST_BODY_MB * 1024 * 1024,
+    path_limits=upload_path_limits,
+)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,138 @@
+"""
+Compare the concurrent batch upload against the same files uploaded one at a time.
+
+Runs against an in-process moto server by default (pip install "moto[server]"),
+or against any S3-compatible endpoint with --endpoint-url. A local moto server
+answers in well under a millisecond, so --latency-ms adds a simulated network
+round trip to every PUT. --backend local stores to a temporary directory
+instead, which measures the upload pipeline itself without any network cost.
+Deduplication is bypassed by giving every file random content.
+
+Usage:
+    uv run scripts/bench_batch_upload.py --files 20 --size-kb 512 --concurrency 5
+    uv run scripts/bench_batch_upload.py --backend local --files 200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def configure_env(args) -> None:
+    """Point the app settings at the benchmark endpoint before they are imported"""
+    if args.endpoint_url:
+        os.environ["AWS_ENDPOINT_URL"] = args.endpoint_url
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    os.environ["AWS_BUCKET_NAME"] = args.bucket
+    os.environ["MAX_CONCURRENT_UPLOADS"] = str(args.concurrency)
+    os.environ.setdefault("MAX_FILE_SIZE_MB", "100")
+    os.environ.setdefault("BASE_DIR", "bench")
+    os.environ.setdefault("ALLOWED_FILE_EXTENSIONS", "pdf")
+    os.environ["STORAGE__BACKEND"] = args.backend
+    if args.backend == "local":
+        os.environ["STORAGE__LOCAL_ROOT"] = tempfile.mkdtemp(prefix="goldvault-bench-")
+
+
+def build_files(count: int, size_kb: int):
+    from starlette.datastructures import UploadFile
+
+    files = []
+    for index in range(count):
+        spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        spool.write(os.urandom(size_kb * 1024))
+        spool.seek(0)
+        files.append(UploadFile(spool, filename=f"document_{index}.pdf", size=size_kb * 1024))
+    return files
+
+
+async def run(args) -> None:
+    from mongomock_motor import AsyncMongoMockClient
+
+    import app.db.mongo.mongodb as mongodb
+    from app.services.common.utils.s3.upload import S3FileUploadService
+    from app.services.common.utils.storage.storage import close_storage, get_storage, start_storage
+
+    # The dedup index lives in Mongo; an in-memory stand-in keeps the benchmark self-contained
+    mongodb._db_client = AsyncMongoMockClient()
+    mongodb._db = mongodb._db_client["bench"]
+
+    await start_storage()
+    storage = get_storage()
+    print(f"Storage backend: {storage.name} ({storage.location})")
+
+    if args.backend == "s3":
+        try:
+            await storage.client.create_bucket(Bucket=args.bucket)
+        except Exception:
+            pass
+
+    if args.latency_ms:
+        print(f"Simulating {args.latency_ms:.0f} ms per PUT")
+        put = storage.put
+
+        async def put_with_latency(*put_args, **put_kwargs):
+            await asyncio.sleep(args.latency_ms / 1000)
+            return await put(*put_args, **put_kwargs)
+
+        storage.put = put_with_latency
+
+    async def sequential(files) -> None:
+        for file in files:
+            await S3FileUploadService.upload_single_file(file, "bench@goldvault.local", "KYC_DOCS")
+
+    async def concurrent(files) -> None:
+        await S3FileUploadService.upload_multiple_files(files, "bench@goldvault.local", "KYC_DOCS")
+
+    for name, upload in (("sequential single uploads", sequential), ("concurrent batch upload", concurrent)):
+        files = build_files(args.files, args.size_kb)
+        start = time.perf_counter()
+        await upload(files)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>26}: {args.files} files in {elapsed:.2f}s ({args.files / elapsed:.1f} files/s)")
+
+    await close_storage()
+    if args.backend == "local":
+        shutil.rmtree(storage.location, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["s3", "local"], default="s3")
+    parser.add_argument("--endpoint-url", default=None, help="Existing S3 endpoint instead of moto")
+    parser.add_argument("--bucket", default="goldvault-bench")
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=None, help="Simulated round trip per PUT (default 50 with moto, 0 otherwise)")
+    args = parser.parse_args()
+
+    server = None
+    if args.backend == "s3" and args.endpoint_url is None:
+        from moto.server import ThreadedMotoServer
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = ThreadedMotoServer(ip_address="127.0.0.1", port=5055)
+        server.start()
+        args.endpoint_url = "http://127.0.0.1:5055"
+        if args.latency_ms is None:
+            args.latency_ms = 50
+
+    configure_env(args)
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Measure per-deposit latency of InvestmentService.create_investment_entry with the
+concurrent prefetch stage against the same flow with its reads issued one after another,
+then the throughput of the same number of deposits sent through the bulk CSV import.
+
+Runs against an in-memory Mongo stand-in (mongomock-motor) by default, which
+answers instantly, so --latency-ms adds a simulated round trip (with +/-50%
+jitter) to every database call. --mongo-url runs against a real server instead;
+the benchmark writes to a throwaway database there and drops it afterwards.
+Outbox delivery is stubbed so only the deposit path is measured.
+
+Usage:
+    uv run scripts/bench_deposit.py --deposits 200 --latency-ms 2
+    uv run scripts/bench_deposit.py --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+LATENCY_METHODS = ("find_one", "insert_one", "insert_many", "find_one_and_update", "update_one", "count_documents", "bulk_write")
+
+
+def configure_env(args) -> None:
+    """Collection names and secrets the settings need before they are imported"""
+    for name in ("ADMINS", "USERS", "SUBSCRIPTIONS", "INVENTORY", "INVESTMENT_ENTRIES", "AVAILABLE_INVESTMENT_PLANS"):
+        os.environ.setdefault(name, name.lower())
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key-bench-secret-key")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ.setdefault("VERIFICATION_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ.setdefault("MAX_FILE_SIZE_MB", "10")
+
+
+def add_latency(collection_class, latency_ms: float) -> None:
+    """Delay every database call made through collection_class by a jittered round trip"""
+    for method_name in LATENCY_METHODS:
+        method = getattr(collection_class, method_name)
+
+        async def delayed(self, *call_args, _method=method, **call_kwargs):
+            await asyncio.sleep(latency_ms * random.uniform(0.5, 1.5) / 1000)
+            return await _method(self, *call_args, **call_kwargs)
+
+        setattr(collection_class, method_name, delayed)
+
+
+def patch_mongomock_post_image() -> None:
+    """
+    mongomock looks the post-image of find_one_and_update up again by the original
+    filter when _id is projected out, so compare-and-swap updates come back as None.
+    MongoDB returns the updated document; make the stand-in do the same.
+    """
+    from mongomock.collection import Collection
+
+    find_and_modify = Collection._find_and_modify
+
+    def with_id(self, query, projection=None, *call_args, **call_kwargs):
+        if isinstance(projection, dict) and projection.get("_id") == 0:
+            projection = {key: value for key, value in projection.items() if key != "_id"} or None
+            document = find_and_modify(self, query, projection, *call_args, **call_kwargs)
+            if document is not None:
+                document.pop("_id", None)
+            return document
+        return find_and_modify(self, query, projection, *call_args, **call_kwargs)
+
+    Collection._find_and_modify = with_id
+
+
+def patch_mongomock_bulk_write() -> None:
+    """mongomock's bulk_write does not accept current pymongo operations; apply them one by one"""
+    from types import SimpleNamespace
+
+    from mongomock.collection import Collection
+    from pymongo import InsertOne
+
+    def bulk_write(self, operations, ordered=True, **_kwargs):
+        matched = modified = inserted = 0
+        for operation in operations:
+            if isinstance(operation, InsertOne):
+                self.insert_one(dict(operation._doc))
+                inserted += 1
+            else:
+                result = self.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+                matched += result.matched_count
+                modified += result.modified_count
+        return SimpleNamespace(matched_count=matched, modified_count=modified, inserted_count=inserted)
+
+    Collection.bulk_write = bulk_write
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def seed(db, subscriptions: int) -> None:
+    from app.core.config import settings
+
+    plan = {"plan_name": "Bench", "bonus_percentage": 12, "relaxation_days": 5, "minimum_investment_amount": 10}
+    for index in range(subscriptions):
+        await db[settings.DB_TABLE.USERS].insert_one({"uuid": f"user-{index}", "email": f"user{index}@goldvault.local", "full_name": "Bench"})
+        await db[settings.DB_TABLE.SUBSCRIPTIONS].insert_one({
+            "uuid": f"sub-{index}", "user_id": f"user-{index}", "plan_start_date": "01-01-2020",
+            "metadata": {"plan_details": plan}, "installments_paid": 0,
+        })
+        await db[settings.DB_TABLE.INVENTORY].insert_one({
+            "subscription_id": f"sub-{index}", "invested_amount": 0, "gold_grams_24k": 0, "version": 0,
+        })
+
+
+async def run(args) -> None:
+    import app.db.mongo.mongodb as mongodb
+    from app.core.config import settings
+    from app.schemas.investment import CreateMonthlyInvestment
+    from app.services.investment.investment import InvestmentService
+    from app.services.investment.investment_import import InvestmentImportService
+    from app.utils.email_service.outbox import EmailOutbox
+
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.mongo_url)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+
+        client = AsyncMongoMockClient()
+        patch_mongomock_post_image()
+        patch_mongomock_bulk_write()
+
+    db_name = f"goldvault_bench_{os.getpid()}"
+    mongodb._db_client = client
+    mongodb._db = client[db_name]
+
+    async def skip_email(*_args, **_kwargs):
+        return None
+
+    EmailOutbox.enqueue = skip_email
+    await seed(mongodb._db, args.deposits)
+
+    if args.latency_ms:
+        print(f"Simulating {args.latency_ms:.1f} ms (+/-50%) per database call")
+        add_latency(type(mongodb._db[settings.DB_TABLE.USERS]), args.latency_ms)
+
+    prefetch = InvestmentService.prefetch_deposit_context
+
+    async def sequential_prefetch(request, deposit_yyyymm):
+        # The pre-change ordering: each read waits for the previous one
+        original_gather = asyncio.gather
+
+        async def one_by_one(*aws, **_kwargs):
+            return [await aw for aw in aws]
+
+        asyncio.gather = one_by_one
+        try:
+            return await prefetch(request, deposit_yyyymm)
+        finally:
+            asyncio.gather = original_gather
+
+    admin = {"email": "bench@goldvault.local"}
+    variants = (("sequential reads", sequential_prefetch), ("concurrent prefetch", prefetch))
+
+    for round_index, (name, prefetch_impl) in enumerate(variants):
+        InvestmentService.prefetch_deposit_context = staticmethod(prefetch_impl)
+        samples = []
+        for index in range(args.deposits):
+            request = CreateMonthlyInvestment(
+                user_id=f"user-{index}",
+                subscription_id=f"sub-{index}",
+                deposit_date=f"{round_index + 1:02d}-01-2020",
+                amount_invested=100,
+                gold_rate=250,
+                grams_purchased=0.4,
+                payment_method="CASH",
+            )
+            start = time.perf_counter()
+            result = await InvestmentService.create_investment_entry(request, admin)
+            samples.append((time.perf_counter() - start) * 1000)
+            if result["status_code"] != 200:
+                raise RuntimeError(f"Deposit failed: {result}")
+
+        print(
+            f"{name:>20}: p50 {percentile(samples, 0.50):6.2f} ms  p99 {percentile(samples, 0.99):6.2f} ms  "
+            f"mean {statistics.fmean(samples):6.2f} ms over {args.deposits} deposits "
+            f"({args.deposits / (sum(samples) / 1000):.0f} deposits/s)"
+        )
+
+    InvestmentService.prefetch_deposit_context = staticmethod(prefetch)
+
+    # The same number of deposits, one month later, as a single CSV import
+    from starlette.datastructures import UploadFile
+    import tempfile
+
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+b")
+    spool.write(b"user_id,subscription_id,deposit_date,amount_invested,gold_rate,grams_purchased,payment_method\n")
+    for index in range(args.deposits):
+        spool.write(f"user-{index},sub-{index},{len(variants) + 1:02d}-01-2020,100,250,0.4,CASH\n".encode())
+    start = time.perf_counter()
+    result = await InvestmentImportService.import_entries(UploadFile(spool, filename="deposits.csv"), admin)
+    elapsed = time.perf_counter() - start
+    if result["status_code"] != 200 or result["data"]["summary"]["failed"]:
+        raise RuntimeError(f"Import failed: {result['comment']}")
+    print(f"{'bulk csv import':>20}: {args.deposits} deposits in {elapsed * 1000:.0f} ms ({args.deposits / elapsed:.0f} deposits/s)")
+    if args.mongo_url:
+        await client.drop_database(db_name)
+    client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deposits", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=None, help="Simulated round trip per call (default 2 in memory, 0 with --mongo-url)")
+    parser.add_argument("--mongo-url", default=None, help="Real MongoDB server instead of the in-memory stand-in")
+    args = parser.parse_args()
+    if args.latency_ms is None:
+        args.latency_ms = 0 if args.mongo_url else 2
+
+    configure_env(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
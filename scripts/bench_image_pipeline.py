@@ -0,0 +1,105 @@
+"""
+Measure the KYC image normalization pipeline: size reduction, per-stage timings
+and how long the event loop stalls while images are processed.
+
+Generates phone-sized JPEG photos with EXIF unless --image is given.
+Requires Pillow (pip install "investment[images]").
+
+Usage:
+    uv run scripts/bench_image_pipeline.py --images 8 --width 4032 --height 3024
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from PIL import Image
+
+
+def build_photo(width: int, height: int) -> bytes:
+    """Noisy gradient photo (compresses like a real camera shot) with an EXIF block"""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 64)
+    photo = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90
+    exif[0x010F] = "BenchCam"
+    output = BytesIO()
+    photo.save(output, "JPEG", quality=95, exif=exif)
+    return output.getvalue()
+
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list) -> None:
+    """Record how late a 10 ms timer fires; long delays mean the loop was blocked"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append((time.perf_counter() - start - 0.01) * 1000)
+
+
+async def run(args) -> None:
+    from starlette.datastructures import UploadFile
+
+    from app.core.config import settings
+    from app.services.common.utils.images.pipeline import ImagePipeline
+    from app.services.common.utils.images.transform import normalize_image
+
+    data = Path(args.image).read_bytes() if args.image else build_photo(args.width, args.height)
+    print(f"Input: {len(data) / 1024 / 1024:.2f} MB per image, {args.images} images, {settings.IMAGES.WORKERS} workers\n")
+
+    def upload_file() -> UploadFile:
+        return UploadFile(BytesIO(data), filename="passport.jpg")
+
+    async def inline() -> list:
+        return [
+            normalize_image(data, settings.IMAGES.MAX_DIMENSION, settings.IMAGES.JPEG_QUALITY, settings.IMAGES.THUMBNAIL_SIZE, settings.IMAGES.MAX_PIXELS)
+            for _ in range(args.images)
+        ]
+
+    async def pooled() -> list:
+        return await asyncio.gather(*(ImagePipeline.process(upload_file()) for _ in range(args.images)))
+
+    # Start the worker processes outside the measurement
+    await ImagePipeline.process(upload_file())
+
+    for name, bench in (("inline on the event loop", inline), ("process pool", pooled)):
+        stop, lag = asyncio.Event(), []
+        monitor = asyncio.create_task(measure_loop_lag(stop, lag))
+        await asyncio.sleep(0)  # let the monitor arm its first timer
+        start = time.perf_counter()
+        results = await bench()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await monitor
+
+        print(f"{name}: {elapsed:.2f}s total, worst loop stall {max(lag or [0]):.0f} ms")
+
+    result = results[0]
+    print(f"\nOutput: {len(result['image']) / 1024:.0f} KB image ({len(data) / len(result['image']):.1f}x smaller), "
+          f"{len(result['thumbnail']) / 1024:.0f} KB thumbnail, "
+          f"{result['original_width']}x{result['original_height']} -> {result['width']}x{result['height']}")
+    print("Median stage timings (ms):")
+    for stage in result["timings_ms"]:
+        print(f"  {stage:>10}: {statistics.median(r['timings_ms'][stage] for r in results):.1f}")
+    print(f"EXIF kept: {bool(Image.open(BytesIO(result['image'])).getexif())}")
+
+    ImagePipeline.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=None, help="Use an existing photo instead of a generated one")
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
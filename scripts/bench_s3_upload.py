@@ -0,0 +1,94 @@
+"""
+Compare a shared long-lived S3 client against a new session+client per upload.
+
+Runs against an in-process moto server by default (pip install "moto[server]"),
+or against any S3-compatible endpoint with --endpoint-url.
+
+Usage:
+    uv run scripts/bench_s3_upload.py --uploads 200 --size-kb 256 --concurrency 10
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def configure_env(args) -> None:
+    """Point the app settings at the benchmark endpoint before they are imported"""
+    os.environ["AWS_ENDPOINT_URL"] = args.endpoint_url
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    os.environ["AWS_BUCKET_NAME"] = args.bucket
+
+
+async def run(args) -> None:
+    from app.services.common.utils.storage.s3 import S3Storage
+
+    payload = os.urandom(args.size_kb * 1024)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def per_upload_client(index: int) -> None:
+        async with semaphore:
+            session = S3Storage.get_session()
+            async with session.client("s3", endpoint_url=args.endpoint_url) as s3_client:
+                await s3_client.put_object(Bucket=args.bucket, Key=f"bench/per-upload/{index}", Body=io.BytesIO(payload))
+
+    async def shared_client(index: int) -> None:
+        async with semaphore:
+            await storage.client.put_object(
+                Bucket=args.bucket, Key=f"bench/shared/{index}", Body=io.BytesIO(payload)
+            )
+
+    storage = S3Storage(args.bucket)
+    await storage.start()
+    try:
+        await storage.client.create_bucket(Bucket=args.bucket)
+    except Exception:
+        pass
+
+    for name, upload in (("session per upload", per_upload_client), ("shared client", shared_client)):
+        start = time.perf_counter()
+        await asyncio.gather(*(upload(i) for i in range(args.uploads)))
+        elapsed = time.perf_counter() - start
+        megabytes = args.uploads * args.size_kb / 1024
+        print(f"{name:>20}: {args.uploads} uploads in {elapsed:.2f}s "
+              f"({args.uploads / elapsed:.0f} uploads/s, {megabytes / elapsed:.1f} MB/s)")
+
+    await storage.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint-url", default=None, help="Existing S3 endpoint instead of moto")
+    parser.add_argument("--bucket", default="goldvault-bench")
+    parser.add_argument("--uploads", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    server = None
+    if args.endpoint_url is None:
+        from moto.server import ThreadedMotoServer
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = ThreadedMotoServer(ip_address="127.0.0.1", port=5055)
+        server.start()
+        args.endpoint_url = "http://127.0.0.1:5055"
+
+    configure_env(args)
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
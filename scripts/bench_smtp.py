@@ -0,0 +1,82 @@
+"""
+Compare pooled SMTP sessions against one connection per message.
+
+Runs against a local aiosmtpd stand-in by default (pip install aiosmtpd), or
+against a real server with --host/--port.
+
+Usage:
+    uv run scripts/bench_smtp.py --messages 500 --pool-size 4
+"""
+import argparse
+import asyncio
+import sys
+import time
+from email.mime.text import MIMEText
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import aiosmtplib
+
+from app.utils.email_service.smtp_pool import SMTPConnectionPool
+
+
+def build_message(index: int) -> MIMEText:
+    message = MIMEText(f"Benchmark message {index}")
+    message["From"] = "bench@goldvault.local"
+    message["To"] = "recipient@goldvault.local"
+    message["Subject"] = f"Benchmark {index}"
+    return message
+
+
+async def bench_unpooled(args) -> float:
+    semaphore = asyncio.Semaphore(args.pool_size)
+
+    async def send(index: int) -> None:
+        async with semaphore:
+            await aiosmtplib.send(build_message(index), hostname=args.host, port=args.port, start_tls=args.start_tls)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(args.messages)))
+    return time.perf_counter() - start
+
+
+async def bench_pooled(args) -> float:
+    pool = SMTPConnectionPool(hostname=args.host, port=args.port, start_tls=args.start_tls, max_size=args.pool_size)
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.send_message(build_message(i)) for i in range(args.messages)))
+    elapsed = time.perf_counter() - start
+    print(f"pool stats: {pool.stats()}")
+    await pool.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=None, help="Use an existing SMTP server instead of aiosmtpd")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--start-tls", action="store_true")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    controller = None
+    if args.host is None:
+        from aiosmtpd.controller import Controller
+        from aiosmtpd.handlers import Sink
+
+        controller = Controller(Sink(), hostname="127.0.0.1", port=args.port)
+        controller.start()
+        args.host = "127.0.0.1"
+
+    try:
+        for name, bench in (("one connection per message", bench_unpooled), ("pooled sessions", bench_pooled)):
+            elapsed = asyncio.run(bench(args))
+            print(f"{name:>28}: {args.messages} messages in {elapsed:.2f}s ({args.messages / elapsed:.0f} msg/s)")
+    finally:
+        if controller is not None:
+            controller.stop()
+
+
+if __name__ == "__main__":
+    main()
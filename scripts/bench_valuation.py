@@ -0,0 +1,178 @@
+"""
+Measure the inventory revaluation: the vectorized engine (app.services.inventory.valuation)
+against the same totals and groups computed per document in Python, then the
+end-to-end load of the columns from Mongo through the projected streaming cursor.
+
+The compute comparison runs on synthetic columns, 1M inventories by default.
+The load runs against an in-memory Mongo stand-in (mongomock-motor) by default,
+which decodes documents far slower than a real server, so it uses a smaller
+--load-inventories count. --mongo-url loads from a real server instead; the
+benchmark writes to a throwaway database there and drops it afterwards.
+
+Usage:
+    uv run scripts/bench_valuation.py --inventories 1000000
+    uv run scripts/bench_valuation.py --mongo-url mongodb://localhost:27017 --load-inventories 1000000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+GROUP_BY = ("plan", "currency", "country")
+CURRENCIES = ("AED", "USD", "INR")
+COUNTRIES = ("AE", "IN", "SA", "OM", "QA", "KW", "BH", "GB")
+GOLD_RATES = {"AED": 250.0, "USD": 68.0}
+
+
+def configure_env() -> None:
+    """Collection names and secrets the settings need before they are imported"""
+    for name in ("ADMINS", "USERS", "SUBSCRIPTIONS", "INVENTORY", "INVESTMENT_ENTRIES", "AVAILABLE_INVESTMENT_PLANS"):
+        os.environ.setdefault(name, name.lower())
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key-bench-secret-key")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ.setdefault("VERIFICATION_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ.setdefault("MAX_FILE_SIZE_MB", "10")
+
+
+def synthetic_columns(count: int, plans: int, seed: int = 7):
+    from app.services.inventory.valuation import InventoryColumns
+
+    rng = np.random.default_rng(seed)
+    return InventoryColumns(
+        gold_grams_24k=rng.uniform(0, 200, count),
+        invested_amount=rng.uniform(0, 50000, count),
+        bonus_percentage_earned=rng.choice([0, 1, 2, 3, 4], count).astype(np.float64),
+        codes={
+            "currency": rng.integers(0, len(CURRENCIES), count),
+            "plan": rng.integers(0, plans, count),
+            "country": rng.integers(0, len(COUNTRIES), count),
+        },
+        labels={"currency": list(CURRENCIES), "plan": [f"plan-{index}" for index in range(plans)], "country": list(COUNTRIES)},
+    )
+
+
+def per_document(columns, gold_rates, group_by):
+    """The pre-change approach: one Python dict per inventory, valued and grouped in a loop"""
+    names = list(columns.codes)
+    documents = []
+    rows = zip(
+        columns.gold_grams_24k.tolist(), columns.invested_amount.tolist(), columns.bonus_percentage_earned.tolist(),
+        *(columns.codes[name].tolist() for name in names),
+    )
+    for grams, invested, bonus, *codes in rows:
+        document = {"gold_grams_24k": grams, "invested_amount": invested, "bonus_percentage_earned": bonus}
+        for name, code in zip(names, codes):
+            document[name] = columns.labels[name][code]
+        documents.append(document)
+
+    start = time.perf_counter()
+    groups = {}
+    for document in documents:
+        rate = gold_rates.get(document["currency"])
+        if rate is None:
+            continue
+        market_value = document["gold_grams_24k"] * rate
+        group = groups.setdefault(tuple(document[name] for name in group_by), [0, 0.0, 0.0, 0.0, 0.0, 0.0])
+        group[0] += 1
+        group[1] += document["gold_grams_24k"]
+        group[2] += document["invested_amount"]
+        group[3] += market_value
+        group[4] += market_value - document["invested_amount"]
+        group[5] += document["invested_amount"] * document["bonus_percentage_earned"] / 100
+    return groups, time.perf_counter() - start
+
+
+def bench_compute(args) -> None:
+    from app.services.inventory.valuation import revalue
+
+    columns = synthetic_columns(args.inventories, args.plans)
+    for group_by in ((), GROUP_BY):
+        start = time.perf_counter()
+        valuation = revalue(columns, GOLD_RATES, group_by)
+        elapsed = time.perf_counter() - start
+        print(f"{'vectorized':>14} by {list(group_by)!s:<32}: {elapsed * 1000:8.1f} ms for {args.inventories} inventories, {len(valuation['groups'])} groups")
+
+    groups, elapsed = per_document(columns, GOLD_RATES, GROUP_BY)
+    for currency, totals in valuation["totals"].items():
+        expected = sum(group[3] for key, group in groups.items() if key[GROUP_BY.index("currency")] == currency)
+        if not np.isclose(expected, totals["market_value"]):
+            raise RuntimeError(f"{currency} market value mismatch: {expected} != {totals['market_value']}")
+    print(f"{'per document':>14} by {list(GROUP_BY)!s:<32}: {elapsed * 1000:8.1f} ms for {args.inventories} inventories, {len(groups)} groups")
+
+
+async def bench_load(args) -> None:
+    import app.db.mongo.mongodb as mongodb
+    from app.core.config import settings
+    from app.services.inventory.valuation import InventoryValuationService, revalue
+
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.mongo_url)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+
+        client = AsyncMongoMockClient()
+
+    db_name = f"goldvault_bench_{os.getpid()}"
+    mongodb._db_client = client
+    mongodb._db = client[db_name]
+    db = mongodb._db
+
+    count = args.load_inventories
+    rng = np.random.default_rng(11)
+    await db[settings.DB_TABLE.USERS].insert_many([
+        {"uuid": f"user-{index}", "country": COUNTRIES[index % len(COUNTRIES)]} for index in range(count)
+    ])
+    await db[settings.DB_TABLE.SUBSCRIPTIONS].insert_many([
+        {"uuid": f"sub-{index}", "user_id": f"user-{index}", "plan_id": f"plan-{index % args.plans}"} for index in range(count)
+    ])
+    await db[settings.DB_TABLE.INVENTORY].insert_many([
+        {
+            "subscription_id": f"sub-{index}", "user_id": f"user-{index}", "currency": CURRENCIES[index % len(CURRENCIES)],
+            "gold_grams_24k": float(grams), "invested_amount": float(invested), "bonus_percentage_earned": 1.0, "status": "ACTIVE",
+        }
+        for index, (grams, invested) in enumerate(zip(rng.uniform(0, 200, count), rng.uniform(0, 50000, count)))
+    ])
+
+    for group_by in ((), GROUP_BY):
+        start = time.perf_counter()
+        columns = await InventoryValuationService.load_columns(group_by)
+        loaded = time.perf_counter()
+        revalue(columns, GOLD_RATES, group_by)
+        done = time.perf_counter()
+        print(
+            f"{'load + value':>14} by {list(group_by)!s:<32}: load {(loaded - start) * 1000:8.1f} ms, "
+            f"compute {(done - loaded) * 1000:6.1f} ms for {len(columns)} inventories ({len(columns) / (done - start):.0f}/s)"
+        )
+
+    if args.mongo_url:
+        await client.drop_database(db_name)
+    client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--inventories", type=int, default=1_000_000, help="Synthetic inventories for the compute comparison")
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--load-inventories", type=int, default=None, help="Inventories loaded from Mongo (default 20000 in memory, 200000 with --mongo-url)")
+    parser.add_argument("--mongo-url", default=None, help="Real MongoDB server instead of the in-memory stand-in")
+    args = parser.parse_args()
+    if args.load_inventories is None:
+        args.load_inventories = 200_000 if args.mongo_url else 20_000
+
+    configure_env()
+    bench_compute(args)
+    if args.load_inventories:
+        asyncio.run(bench_load(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measure Argon2 hashing cost on this host and recommend parameters for a target latency.
+
+Usage:
+    uv run scripts/calibrate_argon2.py --target-ms 250
+"""
+import argparse
+import os
+import statistics
+import time
+
+from passlib.hash import argon2
+
+MEMORY_COSTS_KIB = [19456, 47104, 65536, 131072]
+
+
+def measure(time_cost: int, memory_cost: int, parallelism: int, samples: int) -> float:
+    """Median wall-clock milliseconds for one hash"""
+    hasher = argon2.using(rounds=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250, help="Upper bound for a single hash")
+    parser.add_argument("--parallelism", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--max-time-cost", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Host CPUs: {os.cpu_count()}, parallelism: {args.parallelism}, target: {args.target_ms:.0f} ms\n")
+    print(f"{'memory_cost (KiB)':>18} {'time_cost':>10} {'median ms':>10}")
+
+    best = None
+    for memory_cost in MEMORY_COSTS_KIB:
+        for time_cost in range(1, args.max_time_cost + 1):
+            elapsed = measure(time_cost, memory_cost, args.parallelism, args.samples)
+            print(f"{memory_cost:>18} {time_cost:>10} {elapsed:>10.1f}")
+            if elapsed > args.target_ms:
+                break
+            # Prefer more memory over more passes at equal latency (OWASP guidance)
+            best = (memory_cost, time_cost, elapsed)
+
+    if best is None:
+        print("\nEven the cheapest configuration exceeds the target; raise --target-ms.")
+        return
+
+    memory_cost, time_cost, elapsed = best
+    # Each worker holds memory_cost KiB while hashing; keep a core free for the event loop
+    workers = max(1, ((os.cpu_count() or 2) - 1) // max(1, args.parallelism))
+    print(f"\nRecommended ({elapsed:.1f} ms per hash, ~{workers * 1000 / elapsed:.0f} hashes/s with {workers} workers):")
+    print(f"HASHING__ARGON2_TIME_COST={time_cost}")
+    print(f"HASHING__ARGON2_MEMORY_COST={memory_cost}")
+    print(f"HASHING__ARGON2_PARALLELISM={args.parallelism}")
+    print(f"HASHING__MAX_WORKERS={workers}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+
+# Settings read these at import time; give the test run harmless values
+for _name in ("ADMINS", "USERS", "SUBSCRIPTIONS", "INVENTORY", "INVESTMENT_ENTRIES", "AVAILABLE_INVESTMENT_PLANS"):
+    os.environ.setdefault(_name, _name.lower())
+os.environ.setdefault("SECRET_KEY", "test-secret-key-test-secret-key-0000")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ.setdefault("VERIFICATION_TOKEN_EXPIRE_MINUTES", "60")
+os.environ.setdefault("MAX_FILE_SIZE_MB", "10")
+os.environ.setdefault("MAX_CONCURRENT_UPLOADS", "5")
+os.environ.setdefault("ALLOWED_FILE_EXTENSIONS", "pdf,jpg,jpeg,png")
+
+import mongomock.collection
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import app.db.mongo.mongodb as mongodb
+from app.utils.cache import _CACHES
+
+
+def _patch_mongomock_post_image() -> None:
+    """
+    mongomock looks the post-image of find_one_and_update up again by the original
+    filter when _id is projected out, so compare-and-swap updates come back as None.
+    MongoDB returns the updated document; make the stand-in do the same.
+    """
+    find_and_modify = mongomock.collection.Collection._find_and_modify
+
+    def with_id(self, query, projection=None, *args, **kwargs):
+        if isinstance(projection, dict) and projection.get("_id") == 0:
+            projection = {key: value for key, value in projection.items() if key != "_id"} or None
+            document = find_and_modify(self, query, projection, *args, **kwargs)
+            if document is not None:
+                document.pop("_id", None)
+            return document
+        return find_and_modify(self, query, projection, *args, **kwargs)
+
+    mongomock.collection.Collection._find_and_modify = with_id
+
+
+def _patch_mongomock_bulk_sort() -> None:
+    """pymongo 4.9+ passes sort= to bulk update builders, which mongomock does not accept"""
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+
+    def without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    mongomock.collection.BulkOperationBuilder.add_update = without_sort
+
+
+_patch_mongomock_post_image()
+_patch_mongomock_bulk_sort()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    """A fresh in-memory database behind the mongodb helpers, with every cache emptied"""
+    client = AsyncMongoMockClient()
+    mongodb._db_client = client
+    mongodb._db = client["test"]
+    for cache in _CACHES.values():
+        cache.clear()
+    yield mongodb._db
+    mongodb._db_client = None
+    mongodb._db = None
@@ -0,0 +1,94 @@
+import pytest
+
+from app.core.config import settings
+from app.schemas.investment import CreateMonthlyInvestment
+from app.services.inventory.inventory import InventoryService, InventoryVersionConflict
+from app.services.investment.investment import InvestmentService
+
+pytestmark = pytest.mark.anyio
+
+ADMIN = {"uuid": "admin-1", "email": "admin@goldvault.local"}
+PLAN = {"plan_name": "Gold 12", "bonus_percentage": 12, "relaxation_days": 5, "minimum_investment_amount": 10}
+
+
+@pytest.fixture
+async def subscription(db):
+    await db[settings.DB_TABLE.USERS].insert_one({"uuid": "user-1", "email": "user@goldvault.local", "full_name": "User One"})
+    await db[settings.DB_TABLE.SUBSCRIPTIONS].insert_one({
+        "uuid": "sub-1", "user_id": "user-1", "plan_start_date": "01-01-2026",
+        "metadata": {"plan_details": PLAN}, "installments_paid": 0,
+    })
+    await db[settings.DB_TABLE.INVENTORY].insert_one({
+        "uuid": "inv-1", "subscription_id": "sub-1", "user_id": "user-1", "currency": "AED",
+        "invested_amount": 0, "gold_grams_24k": 0, "bonus_percentage_earned": 0, "version": 0,
+    })
+    return "sub-1"
+
+
+def deposit(deposit_date="01-01-2026", amount=100):
+    return CreateMonthlyInvestment(
+        user_id="user-1", subscription_id="sub-1", deposit_date=deposit_date,
+        amount_invested=amount, gold_rate=250, grams_purchased=amount / 250, payment_method="CASH",
+    )
+
+
+async def inventory(db):
+    return await db[settings.DB_TABLE.INVENTORY].find_one({"subscription_id": "sub-1"}, {"_id": 0})
+
+
+async def test_balance_change_applies_at_the_read_version(db, subscription):
+    updated = await InventoryService.apply_balance_change("sub-1", 0, {"invested_amount": 100})
+    assert updated["invested_amount"] == 100
+    assert updated["version"] == 1
+
+
+async def test_balance_change_conflict_applies_nothing(db, subscription):
+    with pytest.raises(InventoryVersionConflict):
+        await InventoryService.apply_balance_change("sub-1", 7, {"invested_amount": 100})
+    assert (await inventory(db))["invested_amount"] == 0
+
+
+async def test_balance_change_without_inventory(db):
+    assert await InventoryService.apply_balance_change("sub-missing", 0, {"invested_amount": 100}) is None
+
+
+async def test_deposit_is_revalidated_after_an_outside_bonus_credit(db, subscription, monkeypatch):
+    """A writer outside the lock credits this month's bonus between our read and our balance update"""
+    apply_balance_change = InventoryService.apply_balance_change
+    interfered = []
+
+    async def outside_writer_first(subscription_id, version, increments):
+        if not interfered:
+            interfered.append(True)
+            await db[settings.DB_TABLE.INVESTMENT_ENTRIES].insert_one({
+                "uuid": "outside", "subscription_id": "sub-1", "deposit_yyyymm": 202601, "is_bonus_credited": True,
+            })
+            await db[settings.DB_TABLE.INVENTORY].update_one(
+                {"subscription_id": "sub-1"}, {"$inc": {"bonus_percentage_earned": 1, "version": 1}},
+            )
+        return await apply_balance_change(subscription_id, version, increments)
+
+    monkeypatch.setattr(InventoryService, "apply_balance_change", staticmethod(outside_writer_first))
+    result = await InvestmentService.create_investment_entry(deposit(), ADMIN)
+
+    assert result["status_code"] == 200
+    # The second attempt saw the outside bonus, so the month is not credited twice
+    assert result["data"]["is_bonus_credited"] is False
+    balances = await inventory(db)
+    assert balances["bonus_percentage_earned"] == 1
+    assert balances["invested_amount"] == 100
+    assert await db[settings.DB_TABLE.INVESTMENT_ENTRIES].count_documents({"subscription_id": "sub-1"}) == 2
+    assert (await db[settings.DB_TABLE.SUBSCRIPTIONS].find_one({"uuid": "sub-1"}))["installments_paid"] == 1
+
+
+async def test_deposit_gives_up_when_inventory_keeps_changing(db, subscription, monkeypatch):
+    async def always_conflicts(subscription_id, version, increments):
+        raise InventoryVersionConflict(f"Inventory of {subscription_id} moved")
+
+    monkeypatch.setattr(InventoryService, "apply_balance_change", staticmethod(always_conflicts))
+    result = await InvestmentService.create_investment_entry(deposit(), ADMIN)
+
+    assert result["status_code"] == 409
+    # Every attempt was rolled back
+    assert await db[settings.DB_TABLE.INVESTMENT_ENTRIES].count_documents({}) == 0
+    assert (await db[settings.DB_TABLE.SUBSCRIPTIONS].find_one({"uuid": "sub-1"}))["installments_paid"] == 0
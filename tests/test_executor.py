@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor, Future, ThreadPoolExecutor
+
+import pytest
+
+from app.utils.executor import BoundedExecutor, ExecutorSaturatedError
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def executor():
+    pool = BoundedExecutor("test", lambda workers: ThreadPoolExecutor(max_workers=workers), 1, 1)
+    yield pool
+    pool.shutdown()
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def fail():
+    raise ValueError("bad input")
+
+
+async def test_success_and_failure_are_counted_separately(executor):
+    assert await executor.run(sum, [1, 2]) == 3
+    with pytest.raises(ValueError):
+        await executor.run(fail)
+
+    stats = executor.stats()
+    assert (stats["completed"], stats["failed"], stats["in_flight"]) == (1, 1, 0)
+
+
+async def test_cancelled_caller_keeps_the_running_job_in_flight(executor):
+    release = threading.Event()
+    task = asyncio.create_task(executor.run(release.wait, 5))
+    await wait_for(lambda: executor.stats()["in_flight"] == 1)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # The worker is still busy, so the slot is not handed out again yet
+    assert executor.stats()["in_flight"] == 1
+
+    release.set()
+    await wait_for(lambda: executor.stats()["in_flight"] == 0)
+    assert executor.stats()["completed"] == 1
+
+
+async def test_cancelled_queued_job_is_counted_as_cancelled(executor):
+    release = threading.Event()
+    running = asyncio.create_task(executor.run(release.wait, 5))
+    await wait_for(lambda: executor.stats()["in_flight"] == 1)
+    queued = asyncio.create_task(executor.run(sum, [1]))
+    await wait_for(lambda: executor.stats()["in_flight"] == 2)
+
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    await wait_for(lambda: executor.stats()["in_flight"] == 1)
+    assert executor.stats()["cancelled"] == 1
+
+    release.set()
+    await running
+
+
+async def test_saturated_executor_rejects(executor):
+    release = threading.Event()
+    jobs = [asyncio.create_task(executor.run(release.wait, 5)) for _ in range(2)]
+    await wait_for(lambda: executor.stats()["in_flight"] == 2)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await executor.run(sum, [1])
+    assert executor.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(*jobs)
+
+
+
+class ControlledPool(Executor):
+    """A pool whose jobs finish only when the test resolves their futures"""
+
+    def __init__(self):
+        self.futures = []
+        self.shut_down = False
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.shut_down = True
+
+
+async def test_late_broken_job_does_not_shut_down_the_replacement_pool():
+    pools = []
+    executor = BoundedExecutor("test", lambda workers: pools.append(ControlledPool()) or pools[-1], 2, 2)
+    first = asyncio.create_task(executor.run(sum, [1]))
+    second = asyncio.create_task(executor.run(sum, [2]))
+    await wait_for(lambda: len(pools) == 1 and len(pools[0].futures) == 2)
+
+    # One job reports the dead worker and the pool is replaced; the next job runs on the new pool
+    pools[0].futures[0].set_exception(BrokenExecutor("worker died"))
+    with pytest.raises(BrokenExecutor):
+        await first
+    third = asyncio.create_task(executor.run(sum, [3]))
+    await wait_for(lambda: len(pools) == 2 and pools[1].futures)
+
+    # The other job of the old pool fails afterwards and must leave the new pool running
+    pools[0].futures[1].set_exception(BrokenExecutor("worker died"))
+    with pytest.raises(BrokenExecutor):
+        await second
+    assert pools[0].shut_down and not pools[1].shut_down
+    assert executor._executor is pools[1]
+
+    pools[1].futures[0].set_result(3)
+    assert await third == 3
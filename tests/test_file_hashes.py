@@ -0,0 +1,76 @@
+import pytest
+
+import app.services.common.utils.s3.upload as upload
+from app.core.config import settings
+from app.db.mongo.indexes import ensure_indexes
+from app.services.common.utils.s3.upload import S3FileUploadService
+from app.services.common.utils.storage.local import LocalStorage
+from app.services.common.utils.storage.storage import set_storage
+
+pytestmark = pytest.mark.anyio
+
+USER = "user@goldvault.local"
+SHA256 = "ab" * 32
+
+
+@pytest.fixture
+def storage(tmp_path):
+    local = LocalStorage(root=str(tmp_path))
+    set_storage(local)
+    yield local
+    set_storage(None)
+
+
+def put(storage, key):
+    path = storage.resolve(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"%PDF-1.7 test")
+    return {"file_key": key, "file_url": storage.get_url(key), "file_size": 13}
+
+
+async def test_same_content_is_deduplicated_per_file_type(db, storage):
+    await ensure_indexes(db)
+    passport = put(storage, "docs/PASSPORT/a.pdf")
+    await S3FileUploadService.record_file_hash(USER, SHA256, "PASSPORT", passport)
+
+    assert (await S3FileUploadService.find_existing_upload(USER, SHA256, "PASSPORT"))["file_key"] == passport["file_key"]
+    assert await S3FileUploadService.find_existing_upload(USER, SHA256, "KYC_DOCS") is None
+
+    # The other type stores its own object under its own folder
+    kyc = put(storage, "docs/KYC_DOCS/a.pdf")
+    assert await S3FileUploadService.record_file_hash(USER, SHA256, "KYC_DOCS", kyc) == kyc
+    assert await db[settings.DB_TABLE.FILE_HASHES].count_documents({"user_email": USER}) == 2
+
+
+async def test_concurrent_duplicate_returns_the_winner(db, storage):
+    await ensure_indexes(db)
+    winner = put(storage, "docs/PASSPORT/first.pdf")
+    await S3FileUploadService.record_file_hash(USER, SHA256, "PASSPORT", winner)
+
+    loser = put(storage, "docs/PASSPORT/second.pdf")
+    assert await S3FileUploadService.record_file_hash(USER, SHA256, "PASSPORT", loser) == winner
+    assert await storage.head(loser["file_key"]) is None
+
+
+async def test_vanished_winner_keeps_our_object(db, storage, monkeypatch):
+    await ensure_indexes(db)
+    await S3FileUploadService.record_file_hash(USER, SHA256, "PASSPORT", put(storage, "docs/PASSPORT/first.pdf"))
+
+    async def stale_dropped(*_args, **_kwargs):
+        return None
+
+    # The winner's entry is deleted as stale between our insert and the re-read
+    monkeypatch.setattr(upload, "find_one", stale_dropped)
+    ours = put(storage, "docs/PASSPORT/second.pdf")
+    assert await S3FileUploadService.record_file_hash(USER, SHA256, "PASSPORT", ours) == ours
+    assert await storage.head(ours["file_key"]) is not None
+
+
+async def test_obsolete_file_hash_index_is_dropped(db):
+    collection = db[settings.DB_TABLE.FILE_HASHES]
+    await collection.create_index([("user_email", 1), ("sha256", 1)], name="user_email_sha256_unique", unique=True)
+    await ensure_indexes(db)
+
+    indexes = await collection.index_information()
+    assert "user_email_sha256_unique" not in indexes
+    assert "user_email_file_type_sha256_unique" in indexes
@@ -0,0 +1,144 @@
+import pytest
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.utils.idempotency import REPLAYED_HEADER, STATUS_IN_PROGRESS, IdempotencyStore, _completed_responses, _fingerprint
+
+pytestmark = pytest.mark.anyio
+
+ADMIN = {"uuid": "admin-1", "email": "admin@goldvault.local"}
+
+
+class Body(BaseModel):
+    amount: int
+
+
+class Operation:
+    """Counts calls and returns the given results in turn"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        result = self.results[min(self.calls, len(self.results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def success(data=None):
+    return {"status": "success", "status_code": 200, "comment": "ok", "data": data}
+
+
+async def stored(db, key):
+    return await db[settings.DB_TABLE.IDEMPOTENCY_KEYS].find_one({"_id": f"entry:{ADMIN['uuid']}:{key}"})
+
+
+async def test_without_key_always_runs(db):
+    operation = Operation(success())
+    await IdempotencyStore.run("entry", None, ADMIN, Body(amount=1), operation)
+    await IdempotencyStore.run("entry", None, ADMIN, Body(amount=1), operation)
+    assert operation.calls == 2
+    assert await db[settings.DB_TABLE.IDEMPOTENCY_KEYS].count_documents({}) == 0
+
+
+async def test_first_request_claims_and_stores_response(db):
+    operation = Operation(success({"n": 1}))
+    result = await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation)
+
+    assert result["data"] == {"n": 1}
+    record = await stored(db, "k1")
+    assert record["status"] == "COMPLETED"
+    assert record["response"] == result
+
+
+async def test_retry_replays_without_running_again(db):
+    operation = Operation(success({"n": 1}), success({"n": 2}))
+    first = await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation)
+
+    response = Response()
+    replayed = await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation, response)
+    assert replayed == first
+    assert response.headers[REPLAYED_HEADER] == "true"
+
+    # Another worker has an empty front cache and answers from the stored record
+    _completed_responses.clear()
+    assert await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation) == first
+    assert operation.calls == 1
+
+
+async def test_key_reused_with_different_body_is_rejected(db):
+    operation = Operation(success())
+    await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation)
+
+    result = await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=2), operation)
+    assert result["status_code"] == 422
+    assert operation.calls == 1
+
+
+async def test_keys_are_scoped_per_endpoint_and_admin(db):
+    operation = Operation(success())
+    await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation)
+    await IdempotencyStore.run("user", "k1", ADMIN, Body(amount=1), operation)
+    await IdempotencyStore.run("entry", "k1", {"uuid": "admin-2"}, Body(amount=1), operation)
+    assert operation.calls == 3
+
+
+async def test_request_in_progress_gets_conflict(db):
+    await db[settings.DB_TABLE.IDEMPOTENCY_KEYS].insert_one({
+        "_id": f"entry:{ADMIN['uuid']}:k1", "status": STATUS_IN_PROGRESS, "owner": "other",
+        "fingerprint": _fingerprint("entry", Body(amount=1)), "locked_until": 2**40,
+    })
+    operation = Operation(success())
+    result = await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation)
+
+    assert result["status_code"] == 409
+    assert operation.calls == 0
+
+
+@pytest.mark.parametrize("failure", [
+    {"status": "error", "status_code": 500, "comment": "Something went wrong", "data": "connection reset"},
+    {"status": "error", "status_code": 409, "comment": "busy", "data": None},
+    {"status": "error", "status_code": 429, "comment": "slow down", "data": None},
+])
+async def test_transient_failure_releases_the_claim(db, failure):
+    operation = Operation(failure, success({"n": 2}))
+    assert (await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation))["status_code"] == failure["status_code"]
+    assert await stored(db, "k1") is None
+
+    result = await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation)
+    assert result["data"] == {"n": 2}
+    assert operation.calls == 2
+
+
+async def test_exception_releases_the_claim(db):
+    operation = Operation(ConnectionResetError("connection reset"), success())
+    with pytest.raises(ConnectionResetError):
+        await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation)
+    assert await stored(db, "k1") is None
+
+    assert (await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation))["status"] == "success"
+
+
+async def test_validation_failure_is_replayed(db):
+    failure = {"status": "error", "status_code": 404, "comment": "Subscription not found", "data": None}
+    operation = Operation(failure, success())
+    await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation)
+
+    assert await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation) == failure
+    assert operation.calls == 1
+
+
+async def test_stale_claim_is_taken_over(db):
+    await db[settings.DB_TABLE.IDEMPOTENCY_KEYS].insert_one({
+        "_id": f"entry:{ADMIN['uuid']}:k1", "status": STATUS_IN_PROGRESS, "owner": "crashed",
+        "fingerprint": "unused", "locked_until": 0,
+    })
+    operation = Operation(success())
+    result = await IdempotencyStore.run("entry", "k1", ADMIN, Body(amount=1), operation)
+
+    assert result["status"] == "success"
+    assert (await stored(db, "k1"))["status"] == "COMPLETED"
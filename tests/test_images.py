@@ -0,0 +1,64 @@
+from io import BytesIO
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+
+from app.core.config import settings
+from app.services.common.utils.images.pipeline import ImagePipeline
+from app.services.common.utils.images.transform import normalize_image
+
+pytestmark = pytest.mark.anyio
+
+
+def encode(image, image_format):
+    output = BytesIO()
+    image.save(output, image_format)
+    return output.getvalue()
+
+
+def normalize(data, max_pixels=10_000_000):
+    return normalize_image(data, 64, 82, 16, max_pixels)
+
+
+def test_photo_becomes_jpeg():
+    result = normalize(encode(Image.new("RGB", (200, 100), (10, 20, 30)), "PNG"))
+
+    assert result["format"] == "JPEG" and result["content_type"] == "image/jpeg"
+    assert (result["width"], result["height"]) == (64, 32)
+    assert Image.open(BytesIO(result["thumbnail"])).format == "JPEG"
+
+
+def test_transparent_image_stays_png_with_its_alpha():
+    image = Image.new("RGBA", (100, 100), (255, 0, 0, 255))
+    image.paste((0, 0, 0, 0), (0, 0, 50, 100))
+    result = normalize(encode(image, "PNG"))
+
+    assert result["format"] == "PNG" and result["content_type"] == "image/png"
+    stored = Image.open(BytesIO(result["image"]))
+    assert stored.mode == "RGBA"
+    assert stored.getpixel((0, 0))[3] == 0
+    assert Image.open(BytesIO(result["thumbnail"])).format == "PNG"
+
+
+def test_opaque_alpha_channel_becomes_jpeg():
+    result = normalize(encode(Image.new("RGBA", (100, 100), (255, 0, 0, 255)), "PNG"))
+    assert result["format"] == "JPEG"
+
+
+def test_too_many_pixels_is_rejected_before_decoding():
+    with pytest.raises(ValueError, match="exceeds 100 pixels"):
+        normalize(encode(Image.new("RGB", (20, 20)), "PNG"), max_pixels=100)
+
+
+async def test_oversized_upload_is_not_read_into_the_pool(monkeypatch):
+    monkeypatch.setattr(settings.IMAGES, "MAX_INPUT_MB", 1)
+    upload = UploadFile(BytesIO(b"\0" * (1024 * 1024 + 1)), filename="large.png")
+
+    assert await ImagePipeline.process(upload) is None
+    assert await upload.read(1) == b"\0"
+
+
+def test_normalized_filename_follows_the_format():
+    assert ImagePipeline.normalized_filename("scan.PNG", "PNG") == "scan.png"
+    assert ImagePipeline.normalized_filename("photo.jpeg", "JPEG") == "photo.jpg"
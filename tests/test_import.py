@@ -0,0 +1,147 @@
+import io
+
+import pytest
+from fastapi import UploadFile
+
+import app.services.investment.investment_import as investment_import
+from app.core.config import settings
+from app.services.inventory.inventory import InventoryService, InventoryVersionConflict
+from app.services.investment.investment_import import InvestmentImportService
+
+pytestmark = pytest.mark.anyio
+
+ADMIN = {"uuid": "admin-1", "email": "admin@goldvault.local"}
+PLAN = {"plan_name": "Gold 12", "bonus_percentage": 12, "relaxation_days": 5, "minimum_investment_amount": 10}
+HEADER = "user_id,subscription_id,deposit_date,amount_invested,gold_rate,grams_purchased,payment_method\n"
+
+
+@pytest.fixture
+async def subscriptions(db):
+    await db[settings.DB_TABLE.USERS].insert_one({"uuid": "user-1", "email": "user@goldvault.local", "full_name": "User One"})
+    for name in ("sub-1", "sub-2"):
+        await db[settings.DB_TABLE.SUBSCRIPTIONS].insert_one({
+            "uuid": name, "user_id": "user-1", "plan_start_date": "01-01-2026",
+            "metadata": {"plan_details": PLAN}, "installments_paid": 0,
+        })
+        await db[settings.DB_TABLE.INVENTORY].insert_one({
+            "subscription_id": name, "user_id": "user-1", "currency": "AED",
+            "invested_amount": 0, "gold_grams_24k": 0, "bonus_percentage_earned": 0, "version": 0,
+        })
+
+
+def csv_upload(*rows):
+    lines = "".join(f"user-1,{subscription_id},{deposit_date},100,250,0.4,CASH\n" for subscription_id, deposit_date in rows)
+    return UploadFile(io.BytesIO((HEADER + lines).encode()), filename="entries.csv")
+
+
+async def state(db, subscription_id):
+    subscription = await db[settings.DB_TABLE.SUBSCRIPTIONS].find_one({"uuid": subscription_id})
+    inventory = await db[settings.DB_TABLE.INVENTORY].find_one({"subscription_id": subscription_id})
+    entries = await db[settings.DB_TABLE.INVESTMENT_ENTRIES].count_documents({"subscription_id": subscription_id})
+    return subscription["installments_paid"], inventory["invested_amount"], inventory["version"], entries
+
+
+def statuses(result):
+    return [row["status"] for row in result["data"]["results"]]
+
+
+async def test_import_applies_counters_and_balances(db, subscriptions):
+    result = await InvestmentImportService.import_entries(
+        csv_upload(("sub-1", "01-01-2026"), ("sub-1", "31-01-2026"), ("sub-2", "01-01-2026")), ADMIN,
+    )
+
+    assert result["status_code"] == 200
+    assert statuses(result) == ["CREATED"] * 3
+    assert await state(db, "sub-1") == (2, 200, 1, 2)
+    assert await state(db, "sub-2") == (1, 100, 1, 1)
+    subscription = await db[settings.DB_TABLE.SUBSCRIPTIONS].find_one({"uuid": "sub-1"})
+    assert subscription["last_deposit_date"] == "31-01-2026"
+
+
+async def test_missing_inventory_fails_its_rows(db, subscriptions):
+    await db[settings.DB_TABLE.INVENTORY].delete_one({"subscription_id": "sub-2"})
+    result = await InvestmentImportService.import_entries(csv_upload(("sub-1", "01-01-2026"), ("sub-2", "01-01-2026")), ADMIN)
+
+    assert statuses(result) == ["CREATED", "FAILED"]
+    assert "Inventory not found" in result["data"]["results"][1]["error"]
+    assert await db[settings.DB_TABLE.INVESTMENT_ENTRIES].count_documents({"subscription_id": "sub-2"}) == 0
+    assert (await db[settings.DB_TABLE.SUBSCRIPTIONS].find_one({"uuid": "sub-2"}))["installments_paid"] == 0
+
+
+async def test_rejected_insert_rolls_back_and_revalidates_its_subscription(db, subscriptions, monkeypatch):
+    await db[settings.DB_TABLE.INVESTMENT_ENTRIES].create_index("uuid", unique=True)
+    await db[settings.DB_TABLE.INVESTMENT_ENTRIES].insert_one({"uuid": "taken", "subscription_id": "other"})
+    uuids = iter(["taken", "sub-1-second", "sub-2-first", "sub-1-retry"])
+
+    async def next_uuid():
+        return next(uuids)
+
+    monkeypatch.setattr(investment_import, "generate_uuid", next_uuid)
+    result = await InvestmentImportService.import_entries(
+        csv_upload(("sub-1", "01-01-2026"), ("sub-1", "31-01-2026"), ("sub-2", "01-01-2026")), ADMIN,
+    )
+
+    assert statuses(result) == ["FAILED", "CREATED", "CREATED"]
+    # The surviving sub-1 row was validated again as the first installment, which 31-01 is late for
+    retried = await db[settings.DB_TABLE.INVESTMENT_ENTRIES].find_one({"uuid": "sub-1-retry"})
+    assert retried["is_bonus_eligible"] is False
+    assert await db[settings.DB_TABLE.INVESTMENT_ENTRIES].find_one({"uuid": "sub-1-second"}) is None
+    assert await state(db, "sub-1") == (1, 100, 1, 1)
+    assert await state(db, "sub-2") == (1, 100, 1, 1)
+
+
+async def test_inventory_conflict_rolls_back_and_retries(db, subscriptions, monkeypatch):
+    apply_balance_change = InventoryService.apply_balance_change
+    interfered = []
+
+    async def outside_writer_first(subscription_id, version, increments):
+        if subscription_id == "sub-1" and not interfered:
+            interfered.append(True)
+            await db[settings.DB_TABLE.INVENTORY].update_one({"subscription_id": "sub-1"}, {"$inc": {"invested_amount": 50, "version": 1}})
+        return await apply_balance_change(subscription_id, version, increments)
+
+    monkeypatch.setattr(InventoryService, "apply_balance_change", staticmethod(outside_writer_first))
+    result = await InvestmentImportService.import_entries(csv_upload(("sub-1", "01-01-2026"), ("sub-2", "01-01-2026")), ADMIN)
+
+    assert statuses(result) == ["CREATED", "CREATED"]
+    assert await state(db, "sub-1") == (1, 150, 2, 1)
+    assert await state(db, "sub-2") == (1, 100, 1, 1)
+
+
+async def test_counter_conflict_that_never_settles_fails_the_rows(db, subscriptions, monkeypatch):
+    async def always_conflicts(subscription_id, version, increments):
+        raise InventoryVersionConflict(f"Inventory of {subscription_id} moved")
+
+    monkeypatch.setattr(InventoryService, "apply_balance_change", staticmethod(always_conflicts))
+    result = await InvestmentImportService.import_entries(csv_upload(("sub-1", "01-01-2026")), ADMIN)
+
+    assert statuses(result) == ["FAILED"]
+    assert await state(db, "sub-1") == (0, 0, 0, 0)
+
+
+async def test_counter_moved_by_another_writer_is_revalidated(db, subscriptions, monkeypatch):
+    claim_installment = investment_import.SubscriptionService.claim_installment
+    interfered = []
+
+    async def outside_deposit_first(subscription_id, subscription, installments_paid, deposit_date, deposit_ts, count=1):
+        if not interfered:
+            interfered.append(True)
+            await db[settings.DB_TABLE.SUBSCRIPTIONS].update_one({"uuid": subscription_id}, {"$inc": {"installments_paid": 1}})
+        return await claim_installment(subscription_id, subscription, installments_paid, deposit_date, deposit_ts, count)
+
+    monkeypatch.setattr(investment_import.SubscriptionService, "claim_installment", staticmethod(outside_deposit_first))
+    result = await InvestmentImportService.import_entries(csv_upload(("sub-1", "01-01-2026")), ADMIN)
+
+    assert statuses(result) == ["CREATED"]
+    installments_paid, invested, _, entries = await state(db, "sub-1")
+    assert (installments_paid, invested, entries) == (2, 100, 1)
+
+
+async def test_unexpected_failure_is_a_server_error(db, subscriptions, monkeypatch):
+    async def outage(*args, **kwargs):
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(InvestmentImportService, "_preload", staticmethod(outage))
+    result = await InvestmentImportService.import_entries(csv_upload(("sub-1", "01-01-2026")), ADMIN)
+
+    assert result["status_code"] == 500
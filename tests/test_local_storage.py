@@ -0,0 +1,46 @@
+import io
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.services.common.utils.storage.local import LocalStorage
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = bytes(range(256)) * 64
+
+
+@pytest.fixture
+async def client(tmp_path):
+    storage = LocalStorage(root=str(tmp_path), chunk_size=1000)
+    await storage.put("docs/a.bin", io.BytesIO(CONTENT))
+
+    async def download(request):
+        return await storage.file_response(request.path_params["key"]) or Response(status_code=404)
+
+    app = Starlette(routes=[Route("/{key:path}", download, methods=["GET", "HEAD"])])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_download_streams_the_stored_file(client):
+    response = await client.get("/docs/a.bin")
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-length"] == str(len(CONTENT))
+    assert 'filename="a.bin"' in response.headers["content-disposition"]
+
+
+async def test_range_request_returns_the_slice(client):
+    response = await client.get("/docs/a.bin", headers={"Range": "bytes=10-19"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+
+
+async def test_missing_file_has_no_response(client):
+    assert (await client.get("/docs/missing.bin")).status_code == 404
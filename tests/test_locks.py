@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.utils.locks import KeyedLockManager, LockTimeoutError, MongoLeaseLockManager
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_same_key_runs_in_fifo_order():
+    manager = KeyedLockManager("test-fifo")
+    order = []
+
+    async def hold(index):
+        async with manager.lock("sub-1"):
+            order.append(index)
+            await asyncio.sleep(0.005)
+
+    await asyncio.gather(*(hold(index) for index in range(5)))
+    assert order == [0, 1, 2, 3, 4]
+    assert manager.contended == 4
+
+
+async def test_different_keys_do_not_wait():
+    manager = KeyedLockManager("test-keys", timeout_seconds=0.05)
+    async with manager.lock("sub-1"):
+        async with manager.lock("sub-2"):
+            pass
+    assert manager.contended == 0
+
+
+async def test_timeout_raises_and_cleans_up():
+    manager = KeyedLockManager("test-timeout")
+    async with manager.lock("sub-1"):
+        with pytest.raises(LockTimeoutError):
+            async with manager.lock("sub-1", timeout_seconds=0.01):
+                pass
+        assert manager.timeouts == 1
+
+    # Entries are dropped once nobody holds or waits, timed-out waiters included
+    assert manager._locks == {}
+    assert manager.stats()["held_or_awaited"] == 0
+
+
+async def test_lock_many_takes_keys_in_sorted_order():
+    manager = KeyedLockManager("test-many", timeout_seconds=1)
+
+    async def both(keys):
+        async with manager.lock_many(keys):
+            await asyncio.sleep(0.005)
+
+    # Opposite orders would deadlock without sorting; duplicates are taken once
+    await asyncio.gather(both(["b", "a", "a"]), both(["a", "b"]))
+    assert manager.acquired == 4
+    assert manager._locks == {}
+
+
+@pytest.fixture
+def lease_settings(monkeypatch):
+    monkeypatch.setattr(settings.LOCKS, "RETRY_INTERVAL_MS", 1)
+    monkeypatch.setattr(settings.LOCKS, "MAX_RETRY_INTERVAL_MS", 5)
+
+
+async def test_lease_blocks_other_workers_until_released(db, lease_settings):
+    # Two managers with the same name stand in for two worker processes
+    first = MongoLeaseLockManager("test-lease", timeout_seconds=0.05)
+    second = MongoLeaseLockManager("test-lease", timeout_seconds=0.05)
+
+    async with first.lock("sub-1"):
+        assert await db[settings.DB_TABLE.LOCKS].count_documents({"_id": "test-lease:sub-1"}) == 1
+        with pytest.raises(LockTimeoutError):
+            async with second.lock("sub-1"):
+                pass
+        assert second.lease_polls > 0
+
+    assert await db[settings.DB_TABLE.LOCKS].count_documents({}) == 0
+    async with second.lock("sub-1"):
+        pass
+
+
+async def test_expired_lease_is_taken_over(db, lease_settings):
+    await db[settings.DB_TABLE.LOCKS].insert_one({
+        "_id": "test-lease:sub-1", "owner": "crashed-worker",
+        "expires_at": datetime.now(timezone.utc) - timedelta(seconds=1),
+    })
+    manager = MongoLeaseLockManager("test-lease", timeout_seconds=0.05)
+
+    async with manager.lock("sub-1"):
+        lease = await db[settings.DB_TABLE.LOCKS].find_one({"_id": "test-lease:sub-1"})
+        assert lease["owner"] != "crashed-worker"
+
+
+async def test_release_only_removes_own_lease(db, lease_settings):
+    manager = MongoLeaseLockManager("test-lease", timeout_seconds=0.05)
+    async with manager.lock("sub-1"):
+        # Our lease expired and another worker took the key over
+        await db[settings.DB_TABLE.LOCKS].update_one({"_id": "test-lease:sub-1"}, {"$set": {"owner": "other-worker"}})
+
+    assert await db[settings.DB_TABLE.LOCKS].count_documents({"owner": "other-worker"}) == 1
@@ -0,0 +1,21 @@
+import pytest
+
+from app.db.mongo.crud import MongoHelper
+from app.db.mongo.mongodb import update_one, with_updated_at
+
+pytestmark = pytest.mark.anyio
+
+
+def test_updated_at_keeps_a_caller_supplied_value():
+    assert with_updated_at({"$set": {"updated_at": 5, "a": 1}})["$set"] == {"updated_at": 5, "a": 1}
+    assert "updated_at" in with_updated_at({"$inc": {"n": 1}})["$set"]
+
+
+@pytest.mark.parametrize("helper", [update_one, MongoHelper.update_one])
+async def test_update_one_counts_matched_documents(db, helper):
+    await db["things"].insert_one({"uuid": "t-1", "status": "ACTIVE"})
+
+    # Setting the value it already has still matches, and still bumps updated_at
+    assert await helper("things", {"uuid": "t-1"}, {"$set": {"status": "ACTIVE"}}) == 1
+    assert "updated_at" in await db["things"].find_one({"uuid": "t-1"})
+    assert await helper("things", {"uuid": "missing"}, {"$set": {"status": "ACTIVE"}}) == 0
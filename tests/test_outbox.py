@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.utils.email_service.outbox import EmailOutbox
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed(db, **fields):
+    message = {
+        "uuid": "mail-1", "template": "account_created", "payload": {}, "status": "PENDING",
+        "attempts": 0, "next_attempt_at": 0, "locked_until": 0, "last_error": None, **fields,
+    }
+    await db[settings.DB_TABLE.EMAIL_OUTBOX].insert_one(message)
+
+
+async def stored(db):
+    return await db[settings.DB_TABLE.EMAIL_OUTBOX].find_one({"uuid": "mail-1"})
+
+
+async def test_expired_lease_is_reclaimed_while_attempts_remain(db):
+    await seed(db, status="SENDING", attempts=1, locked_until=int(time.time()) - 1)
+
+    message = await EmailOutbox.claim()
+    assert message["attempts"] == 2
+    assert message["locked_until"] > time.time()
+
+
+async def test_expired_lease_on_the_last_attempt_fails_the_message(db):
+    await seed(db, status="SENDING", attempts=settings.OUTBOX.MAX_ATTEMPTS, locked_until=int(time.time()) - 1)
+
+    assert await EmailOutbox.claim() is None
+    message = await stored(db)
+    assert message["status"] == "FAILED"
+    assert message["attempts"] == settings.OUTBOX.MAX_ATTEMPTS
+
+
+async def test_outcome_of_an_expired_lease_does_not_overwrite_the_new_holder(db):
+    await seed(db)
+    stale = await EmailOutbox.claim()
+    # The lease ran out and another worker took the message over
+    await db[settings.DB_TABLE.EMAIL_OUTBOX].update_one({"uuid": "mail-1"}, {"$set": {"locked_until": stale["locked_until"] + 60}})
+
+    await EmailOutbox.mark_failed(stale, "timed out")
+    await EmailOutbox.mark_sent(stale)
+    message = await stored(db)
+    assert (message["status"], message["last_error"]) == ("SENDING", None)
+
+
+async def test_lease_holder_records_its_outcome(db):
+    await seed(db)
+    message = await EmailOutbox.claim()
+
+    await EmailOutbox.mark_failed(message, "mailbox unavailable")
+    assert (await stored(db))["status"] == "PENDING"
+
+    await db[settings.DB_TABLE.EMAIL_OUTBOX].update_one({"uuid": "mail-1"}, {"$set": {"next_attempt_at": 0}})
+    message = await EmailOutbox.claim()
+    await EmailOutbox.mark_sent(message)
+    assert (await stored(db))["status"] == "SENT"
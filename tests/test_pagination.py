@@ -0,0 +1,78 @@
+import hashlib
+import hmac
+
+import pytest
+from bson import ObjectId
+
+from app.core.config import settings
+from app.db.mongo.migrations import backfill_created_at
+from app.services.user_service.user_service import UserService
+from app.utils.pagination import (
+    InvalidCursorError, MissingSortKeyError, _b64decode, _b64encode, decode_cursor, encode_cursor, page_from_sorted
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor({"created_at": 100, "uuid": "u-1"})) == (100, "u-1")
+
+
+def test_tampered_cursor_is_rejected():
+    payload, signature = encode_cursor({"created_at": 100, "uuid": "u-1"}).split(".")
+    forged = _b64encode(b'[999,"u-1"]')
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(f"{forged}.{signature}")
+
+
+def test_cursor_is_not_signed_with_the_jwt_secret():
+    payload = _b64decode(encode_cursor({"created_at": 100, "uuid": "u-1"}).split(".")[0])
+    jwt_signature = hmac.new(settings.JWT.SECRET_KEY.encode(), payload, hashlib.sha256).digest()[:16]
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(f"{_b64encode(payload)}.{_b64encode(jwt_signature)}")
+
+
+@pytest.mark.parametrize("document", [{"uuid": "u-1"}, {"uuid": "u-1", "created_at": None}])
+def test_document_without_created_at_has_no_cursor(document):
+    with pytest.raises(MissingSortKeyError, match="no created_at"):
+        encode_cursor(document)
+
+
+def test_in_memory_pages_follow_the_cursor():
+    documents = [{"created_at": index // 2, "uuid": f"u-{index}"} for index in range(5)]
+    first, cursor = page_from_sorted(documents, 2, None)
+    second, cursor = page_from_sorted(documents, 2, cursor)
+    third, cursor = page_from_sorted(documents, 2, cursor)
+
+    assert [doc["uuid"] for doc in first + second + third] == [f"u-{index}" for index in range(5)]
+    assert cursor is None
+
+
+async def test_listing_without_created_at_reports_the_migration(db):
+    await db[settings.DB_TABLE.USERS].insert_many([
+        {"uuid": "legacy"},
+        {"uuid": "recent", "created_at": 5},
+    ])
+
+    response = await UserService.get_all_users(current_admin={}, limit=1)
+
+    assert response["status_code"] == 500
+    assert "backfill_created_at" in response["comment"]
+
+
+async def test_backfill_created_at_uses_the_object_id_time(db):
+    users = db[settings.DB_TABLE.USERS]
+    missing = ObjectId.from_datetime(ObjectId().generation_time.replace(year=2024))
+    await users.insert_many([
+        {"_id": missing, "uuid": "missing"},
+        {"_id": ObjectId(), "uuid": "kept", "created_at": 5},
+        {"_id": "custom-id", "uuid": "custom"},
+    ])
+
+    await backfill_created_at(db, batch_size=1)
+
+    assert (await users.find_one({"uuid": "missing"}))["created_at"] == int(missing.generation_time.timestamp())
+    assert (await users.find_one({"uuid": "kept"}))["created_at"] == 5
+    assert "created_at" not in await users.find_one({"uuid": "custom"})
+    state = await db[settings.DB_TABLE.MIGRATIONS].find_one({"_id": "backfill_created_at"})
+    assert (state["status"], state["processed"], state["skipped"]) == ("COMPLETED", 1, 1)
@@ -0,0 +1,41 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.security import create_access_token, get_current_admin, invalidate_admin_principal
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def token_expiry(monkeypatch):
+    # The settings read it from the environment as a string
+    monkeypatch.setattr(settings.JWT, "ACCESS_TOKEN_EXPIRE_MINUTES", 60)
+
+
+async def test_role_change_applies_once_the_principal_is_invalidated(db):
+    admins = db[settings.DB_TABLE.ADMINS]
+    await admins.insert_one({"uuid": "admin-1", "email": "a@goldvault.local", "user_roles": ["VIEWER"], "password": "hash"})
+    token = await create_access_token({"uuid": "admin-1", "email": "a@goldvault.local"})
+
+    principal = await get_current_admin(token)
+    assert principal["user_roles"] == ["VIEWER"] and "password" not in principal
+
+    await admins.update_one({"uuid": "admin-1"}, {"$set": {"user_roles": ["SUPER_ADMIN"]}})
+    assert (await get_current_admin(token))["user_roles"] == ["VIEWER"]
+
+    invalidate_admin_principal("admin-1")
+    assert (await get_current_admin(token))["user_roles"] == ["SUPER_ADMIN"]
+
+
+async def test_deleted_admin_is_rejected_once_invalidated(db):
+    admins = db[settings.DB_TABLE.ADMINS]
+    await admins.insert_one({"uuid": "admin-2", "email": "b@goldvault.local"})
+    token = await create_access_token({"uuid": "admin-2", "email": "b@goldvault.local"})
+    await get_current_admin(token)
+
+    await admins.delete_one({"uuid": "admin-2"})
+    invalidate_admin_principal("admin-2")
+    with pytest.raises(HTTPException) as raised:
+        await get_current_admin(token)
+    assert raised.value.status_code == 404
@@ -0,0 +1,129 @@
+import asyncio
+import socket
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.utils.email_service.smtp_pool import SMTPConnectionPool
+
+pytestmark = pytest.mark.anyio
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content)
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class Relay:
+    """TCP relay in front of the SMTP server that can silently kill the open sessions
+
+    After cut() the client side of every existing session stays open, like a
+    connection dropped by a NAT or load balancer, and is closed only when the
+    client writes to it. Sessions opened afterwards are relayed normally.
+    """
+
+    def __init__(self, upstream_port: int):
+        self.upstream_port = upstream_port
+        self.generation = 0
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    def cut(self):
+        self.generation += 1
+
+    async def close(self):
+        self.server.close()
+
+    async def _handle(self, client_reader, client_writer):
+        generation = self.generation
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", self.upstream_port)
+
+        async def pump(reader, writer):
+            try:
+                while data := await reader.read(65536):
+                    if generation != self.generation:
+                        break
+                    writer.write(data)
+                    await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                client_writer.close()
+                upstream_writer.close()
+
+        await asyncio.gather(
+            pump(client_reader, upstream_writer),
+            pump(upstream_reader, client_writer),
+        )
+
+
+@pytest.fixture
+def smtp_server():
+    controller = Controller(Inbox(), hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+@pytest.fixture
+def inbox(smtp_server):
+    return smtp_server.handler
+
+
+@pytest.fixture
+async def relay(smtp_server):
+    relay = Relay(smtp_server.port)
+    yield relay
+    await relay.close()
+
+
+@pytest.fixture
+async def pool(relay):
+    smtp_pool = SMTPConnectionPool("127.0.0.1", await relay.start(), start_tls=False, max_size=3)
+    yield smtp_pool
+    await smtp_pool.close()
+
+
+def message(index):
+    mail = EmailMessage()
+    mail["From"] = "noreply@goldvault.local"
+    mail["To"] = "user@goldvault.local"
+    mail["Subject"] = f"Message {index}"
+    mail.set_content("body")
+    return mail
+
+
+async def test_sessions_are_reused(inbox, pool):
+    for index in range(5):
+        await pool.send_message(message(index))
+
+    assert len(inbox.messages) == 5
+    assert pool.stats()["opened"] == 1
+    assert pool.stats()["reused"] == 4
+
+
+async def test_dead_idle_sessions_are_not_retried(inbox, relay, pool):
+    # Three concurrent sends leave three idle sessions, all recently used
+    await asyncio.gather(*(pool.send_message(message(index)) for index in range(3)))
+    assert pool.stats()["idle"] == 3
+
+    relay.cut()
+
+    await pool.send_message(message(3))
+    assert len(inbox.messages) == 4
+    assert pool.stats()["opened"] == 4
+    assert pool.stats()["idle"] == 1
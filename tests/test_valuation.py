@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.schemas.investment import InventoryValuationRequest
+from app.services.inventory.valuation import InventoryColumns, InventoryValuationService, revalue
+
+
+def columns():
+    # AED: 10 g for 2000 and 4 g for 1000; USD: 1 g for 70; INR has no rate below
+    return InventoryColumns(
+        gold_grams_24k=np.array([10.0, 4.0, 1.0, 2.0]),
+        invested_amount=np.array([2000.0, 1000.0, 70.0, 100.0]),
+        bonus_percentage_earned=np.array([2.0, 1.0, 0.0, 0.0]),
+        codes={"currency": np.array([0, 0, 1, 2]), "plan": np.array([0, 1, 0, 0])},
+        labels={"currency": ["AED", "USD", "INR"], "plan": ["p1", "p2"]},
+    )
+
+
+def test_totals_are_kept_per_currency():
+    valuation = revalue(columns(), {"AED": 250, "USD": 68})
+
+    assert set(valuation["totals"]) == {"AED", "USD"}
+    aed = valuation["totals"]["AED"]
+    assert (aed["inventories"], aed["market_value"], aed["unrealized_pnl"], aed["bonus_accrued"]) == (2, 3500.0, 500.0, 50.0)
+    assert valuation["totals"]["USD"]["market_value"] == 68.0
+    assert valuation["unpriced_inventories"] == 1
+    assert valuation["missing_rates"] == ["INR"]
+
+
+def test_groups_always_split_by_currency():
+    groups = revalue(columns(), {"AED": 250, "USD": 68}, ["plan"])["groups"]
+
+    assert [(group["plan"], group["currency"], group["market_value"]) for group in groups] == [
+        ("p1", "AED", 2500.0),
+        ("p2", "AED", 1000.0),
+        ("p1", "USD", 68.0),
+    ]
+
+
+def test_nothing_priced():
+    valuation = revalue(columns(), {"EUR": 60}, ["plan"])
+    assert valuation["totals"] == {}
+    assert valuation["groups"] == []
+    assert valuation["unpriced_inventories"] == 4
+
+
+@pytest.mark.parametrize("rate", [0, -1, math.inf, math.nan])
+def test_rates_must_be_positive_and_finite(rate):
+    with pytest.raises(ValidationError):
+        InventoryValuationRequest(gold_rates={"AED": rate})
+
+
+def test_group_by_is_deduplicated():
+    request = InventoryValuationRequest(gold_rates={"AED": 250}, group_by=["plan", "country", "plan"])
+    assert request.group_by == ["plan", "country"]
+
+
+@pytest.mark.anyio
+async def test_columns_are_loaded_with_joined_labels(db):
+    await db[settings.DB_TABLE.SUBSCRIPTIONS].insert_one({"uuid": "sub-1", "plan_id": "p1"})
+    await db[settings.DB_TABLE.USERS].insert_one({"uuid": "user-1", "country": "AE"})
+    await db[settings.DB_TABLE.INVENTORY].insert_many([
+        {"subscription_id": "sub-1", "user_id": "user-1", "currency": "AED", "gold_grams_24k": 10, "invested_amount": 2000},
+        {"subscription_id": "sub-x", "user_id": "user-x", "currency": "AED", "gold_grams_24k": 1, "invested_amount": 200},
+    ])
+
+    loaded = await InventoryValuationService.load_columns(["plan", "country"])
+    groups = revalue(loaded, {"AED": 250}, ["plan", "country"])["groups"]
+    assert [(group["plan"], group["country"], group["inventories"]) for group in groups] == [("p1", "AE", 1), ("UNKNOWN", "UNKNOWN", 1)]